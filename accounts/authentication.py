@@ -0,0 +1,49 @@
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from .models import HRUser
+from .revocation import revocation_store
+from .scope import get_scope_version
+
+TOKEN_USER_CLAIMS = ('username', 'email', 'hr_company_id', 'is_superuser', 'is_staff')
+
+
+class ScopedJWTAuthentication(JWTAuthentication):
+    """
+    Stateless JWT authentication based on the claims of ScopedRefreshToken.
+
+    The request user is an HRUser instance built from the token claims; the
+    remaining fields are deferred and only loaded if a view reads them. A
+    token whose scope version no longer matches the current one is rejected,
+    so the client has to refresh it and pick up the new claims. Revoked
+    tokens are checked through the per-process bloom filter.
+    """
+
+    def get_user(self, validated_token):
+        if revocation_store.is_revoked(validated_token[api_settings.JTI_CLAIM]):
+            raise InvalidToken(_('Token is revoked'), code='token_revoked')
+
+        if 'scope_version' not in validated_token:
+            # Tokens minted before scope claims existed
+            return super().get_user(validated_token)
+
+        try:
+            user_id = int(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, ValueError) as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+        if validated_token['scope_version'] != get_scope_version(user_id):
+            raise InvalidToken(_('Token scope is outdated, refresh the token'), code='token_scope_outdated')
+
+        claims = {'id': user_id, 'is_active': True}
+        for claim in TOKEN_USER_CLAIMS:
+            claims[claim] = validated_token.get(claim)
+
+        field_names = [f.attname for f in HRUser._meta.concrete_fields if f.attname in claims]
+        return HRUser.from_db(None, field_names, [claims[name] for name in field_names])
+
+
+class ScopedJWTScheme(SimpleJWTScheme):
+    target_class = 'accounts.authentication.ScopedJWTAuthentication'
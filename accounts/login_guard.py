@@ -0,0 +1,163 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from django.conf import settings
+from django.contrib.auth import get_user_model, user_login_failed
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+from rest_framework.exceptions import Throttled
+from common.redis import get_redis
+
+LOGIN_FAILURES_KEY = 'login_failures:{kind}:{value}'
+LOGIN_METRICS_KEY = 'login_throttle_metrics'
+
+
+class LoginThrottle:
+    """
+    Sliding window of failed logins per email and per client IP.
+
+    Each failure is a member of a Redis sorted set scored by its timestamp;
+    members older than the window are dropped on every check, so the count
+    is exact for the last LOGIN_THROTTLE_WINDOW seconds.
+    """
+
+    def keys(self, email, ip):
+        keys = []
+        if email:
+            keys.append(('email', LOGIN_FAILURES_KEY.format(kind='email', value=email.strip().lower())))
+        if ip:
+            keys.append(('ip', LOGIN_FAILURES_KEY.format(kind='ip', value=ip)))
+        return keys
+
+    def check(self, email, ip):
+        keys = self.keys(email, ip)
+        now = time.time()
+        window_start = now - settings.LOGIN_THROTTLE_WINDOW
+
+        pipe = get_redis().pipeline()
+        for kind, key in keys:
+            pipe.zremrangebyscore(key, 0, window_start)
+            pipe.zrange(key, 0, 0, withscores=True)
+            pipe.zcard(key)
+        results = pipe.execute()
+
+        limits = {
+            'email': settings.LOGIN_THROTTLE_EMAIL_LIMIT,
+            'ip': settings.LOGIN_THROTTLE_IP_LIMIT,
+        }
+        for index, (kind, key) in enumerate(keys):
+            oldest, count = results[index * 3 + 1], results[index * 3 + 2]
+            if count >= limits[kind]:
+                record_metric(f'rejected_{kind}')
+                wait = oldest[0][1] + settings.LOGIN_THROTTLE_WINDOW - now if oldest else None
+                raise Throttled(wait=wait)
+
+        record_metric('allowed')
+
+    def record_failure(self, email, ip):
+        now = time.time()
+        pipe = get_redis().pipeline()
+        for kind, key in self.keys(email, ip):
+            pipe.zadd(key, {uuid.uuid4().hex: now})
+            pipe.expire(key, settings.LOGIN_THROTTLE_WINDOW)
+        pipe.execute()
+
+    def reset(self, email=None, ip=None):
+        keys = [key for kind, key in self.keys(email, ip)]
+        if keys:
+            get_redis().delete(*keys)
+
+
+class PasswordHashingExecutor:
+    """
+    Runs password verification on a bounded thread pool.
+
+    At most PASSWORD_HASHING_WORKERS hashes run at once and at most
+    PASSWORD_HASHING_QUEUE_LIMIT more may wait; anything beyond that is
+    rejected right away instead of piling up on the request workers.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.executor = None
+        self.slots = None
+
+    def get_executor(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASHING_WORKERS,
+                    thread_name_prefix='password-hashing'
+                )
+                self.slots = threading.BoundedSemaphore(
+                    settings.PASSWORD_HASHING_WORKERS + settings.PASSWORD_HASHING_QUEUE_LIMIT
+                )
+            return self.executor
+
+    def run(self, func, *args):
+        executor = self.get_executor()
+        if not self.slots.acquire(blocking=False):
+            record_metric('rejected_busy')
+            raise Throttled(wait=1)
+
+        try:
+            future = executor.submit(func, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda f: self.slots.release())
+        try:
+            return future.result(timeout=settings.PASSWORD_HASHING_TIMEOUT)
+        except TimeoutError:
+            record_metric('rejected_busy')
+            raise Throttled(wait=1)
+
+
+def record_metric(name):
+    get_redis().hincrby(LOGIN_METRICS_KEY, name, 1)
+
+
+def get_login_metrics():
+    return {
+        name.decode(): int(value)
+        for name, value in get_redis().hgetall(LOGIN_METRICS_KEY).items()
+    }
+
+
+login_throttle = LoginThrottle()
+password_executor = PasswordHashingExecutor()
+
+
+def authenticate_login(request, email, password):
+    """
+    Throttled replacement for authenticate() on the login endpoints.
+
+    The user row is read on the request thread, only the password hash runs
+    on the executor. Returns the active user or None, raises Throttled when
+    the caller is over its failure budget or the executor is saturated.
+    """
+    ip = request.META.get('REMOTE_ADDR') if request is not None else None
+    login_throttle.check(email, ip)
+
+    UserModel = get_user_model()
+    try:
+        user = UserModel._default_manager.get_by_natural_key(email)
+    except UserModel.DoesNotExist:
+        # Hash anyway so unknown emails cost the same as wrong passwords
+        password_executor.run(make_password, password)
+        user = None
+    else:
+        encoded = user.password
+        if not password_executor.run(check_password, password, encoded):
+            user = None
+        elif identify_hasher(encoded).must_update(encoded):
+            user.set_password(password)
+            user.save(update_fields=['password'])
+
+    if user is None or not user.is_active:
+        login_throttle.record_failure(email, ip)
+        user_login_failed.send(sender=__name__, credentials={'username': email}, request=request)
+        return None
+
+    login_throttle.reset(email=email)
+    return user
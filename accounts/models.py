@@ -3,6 +3,7 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from companies.models import HRCompany, CustomerCompany
+from .scope import get_authorization_scope
 
 class HRUser(AbstractUser):
     USERNAME_FIELD = 'email'
@@ -37,10 +38,11 @@ class HRUser(AbstractUser):
         return self.authorized_customer_companies.filter(is_active=True)
     
     def has_customer_company_permission(self, customer_company):
-        return self.authorized_customer_companies.filter(
-            id=customer_company.id, 
-            is_active=True
-        ).exists()
+        return customer_company.id in self.authorization_scope.customer_company_ids
+    
+    @property
+    def authorization_scope(self):
+        return get_authorization_scope(self)
     
     @property
     def is_hr_staff(self):
@@ -0,0 +1,234 @@
+import csv
+import io
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import IntegrityError, connection, transaction
+from companies.counters import refresh_hr_users_count, refresh_authorized_hr_users_count
+from companies.models import HRCompany, CustomerCompany
+from .models import HRUser
+from .scope import invalidate_authorization_scope
+from .serializers import HRUserBulkRowSerializer
+
+ID_LIST_SEPARATOR = re.compile(r'[;,|\s]+')
+
+
+class BulkProvisioningError(Exception):
+    pass
+
+
+def read_rows(request):
+    """Returns the uploaded rows as a list of dicts (CSV or JSON file, or a JSON body)."""
+    upload = request.FILES.get('file')
+    if upload is None:
+        data = request.data
+        rows = data.get('users') if hasattr(data, 'get') else data
+        if not isinstance(rows, list):
+            raise BulkProvisioningError('Send a list of users, a {"users": [...]} object or a CSV/JSON file.')
+        return rows
+
+    if upload.name.lower().endswith('.json') or upload.content_type == 'application/json':
+        try:
+            rows = json.load(upload)
+        except ValueError as e:
+            raise BulkProvisioningError(f'Invalid JSON file: {e}')
+        if isinstance(rows, dict):
+            rows = rows.get('users')
+        if not isinstance(rows, list):
+            raise BulkProvisioningError('JSON file must contain a list of users.')
+        return rows
+
+    reader = csv.DictReader(io.TextIOWrapper(upload, encoding='utf-8-sig'))
+    rows = []
+    for record in reader:
+        row = {key.strip(): value.strip() for key, value in record.items() if key and value and value.strip()}
+        companies = row.get('authorized_customer_companies')
+        if companies:
+            row['authorized_customer_companies'] = [
+                value for value in ID_LIST_SEPARATOR.split(companies) if value
+            ]
+        rows.append(row)
+    return rows
+
+
+def validate_rows(rows, requester):
+    """
+    Validates every row before anything is written.
+
+    Field validation runs per row; uniqueness of email/username and the
+    referenced companies are checked with one query each for the whole
+    upload. Returns (valid, errors): valid is a list of (index, data) and
+    errors maps the index of each rejected row to its errors.
+    """
+    valid = []
+    errors = {}
+    for index, row in enumerate(rows):
+        serializer = HRUserBulkRowSerializer(data=row)
+        if serializer.is_valid():
+            data = dict(serializer.validated_data)
+            data['email'] = HRUser.objects.normalize_email(data['email'])
+            data['username'] = HRUser.normalize_username(data['username'])
+            valid.append((index, data))
+        else:
+            errors[index] = serializer.errors
+
+    emails = {data['email'] for index, data in valid}
+    usernames = {data['username'] for index, data in valid}
+    taken_emails = set(HRUser.objects.filter(email__in=emails).values_list('email', flat=True))
+    taken_usernames = set(HRUser.objects.filter(username__in=usernames).values_list('username', flat=True))
+
+    hr_company_ids = set(HRCompany.objects.filter(
+        id__in={data['hr_company'] for index, data in valid if data.get('hr_company')}
+    ).values_list('id', flat=True))
+    customer_company_ids = set(CustomerCompany.objects.filter(
+        id__in={pk for index, data in valid for pk in data.get('authorized_customer_companies', [])}
+    ).values_list('id', flat=True))
+
+    if not requester.is_superuser:
+        scope = requester.authorization_scope
+        hr_company_ids &= {scope.hr_company_id}
+        customer_company_ids &= scope.customer_company_ids
+
+    checked = []
+    for index, data in valid:
+        row_errors = {}
+
+        if data['email'] in taken_emails:
+            row_errors['email'] = ['A user with this email already exists.']
+        if data['username'] in taken_usernames:
+            row_errors['username'] = ['A user with this username already exists.']
+
+        if not requester.is_superuser and not data.get('hr_company'):
+            data['hr_company'] = requester.authorization_scope.hr_company_id
+        if data.get('hr_company') and data['hr_company'] not in hr_company_ids:
+            row_errors['hr_company'] = [f"Invalid pk \"{data['hr_company']}\" - object does not exist."]
+
+        unknown = [pk for pk in data.get('authorized_customer_companies', []) if pk not in customer_company_ids]
+        if unknown:
+            row_errors['authorized_customer_companies'] = [
+                f'Invalid pk "{pk}" - object does not exist.' for pk in unknown
+            ]
+
+        if row_errors:
+            errors[index] = row_errors
+        else:
+            taken_emails.add(data['email'])
+            taken_usernames.add(data['username'])
+            checked.append((index, data))
+
+    return checked, errors
+
+
+def hash_passwords(passwords):
+    """
+    Hashes the passwords, spreading large batches over a thread pool.
+
+    hashlib's PBKDF2 releases the GIL, so threads hash in parallel without
+    forking a web process that already runs the logging, audit and bloom
+    filter threads (a forked child could inherit one of their locks held).
+    """
+    if len(passwords) < settings.BULK_PROVISIONING_POOL_THRESHOLD:
+        return [make_password(password) for password in passwords]
+
+    workers = min(settings.BULK_PROVISIONING_HASH_WORKERS, len(passwords))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bulk-provisioning') as pool:
+        return list(pool.map(make_password, passwords))
+
+
+def provision_users(rows, requester):
+    """
+    Creates the valid rows with one bulk insert for the users and one for
+    their customer-company authorizations. Returns a per-row report.
+    """
+    if len(rows) > settings.BULK_PROVISIONING_MAX_ROWS:
+        raise BulkProvisioningError(
+            f'At most {settings.BULK_PROVISIONING_MAX_ROWS} users can be provisioned at once.'
+        )
+
+    valid, errors = validate_rows(rows, requester)
+    passwords = hash_passwords([data.pop('password') for index, data in valid])
+
+    users = []
+    for (index, data), password in zip(valid, passwords):
+        users.append(HRUser(
+            username=data['username'],
+            email=data['email'],
+            first_name=data.get('first_name', ''),
+            last_name=data.get('last_name', ''),
+            phone=data.get('phone'),
+            hr_company_id=data.get('hr_company'),
+            is_active=data.get('is_active', True),
+            password=password,
+        ))
+
+    AuthorizedCompanies = HRUser.authorized_customer_companies.through
+    try:
+        with transaction.atomic():
+            HRUser.objects.bulk_create(users)
+            AuthorizedCompanies.objects.bulk_create([
+                AuthorizedCompanies(hruser_id=user.id, customercompany_id=company_id)
+                for user, (index, data) in zip(users, valid)
+                for company_id in set(data.get('authorized_customer_companies', []))
+            ])
+            # bulk_create sends no signals, so the company counters are refreshed here
+            refresh_hr_users_count(user.hr_company_id for user in users if user.is_active)
+            refresh_authorized_hr_users_count(
+                company_id
+                for user, (index, data) in zip(users, valid) if user.is_active
+                for company_id in data.get('authorized_customer_companies', [])
+            )
+    except IntegrityError:
+        raise BulkProvisioningError('Some users were created concurrently by another request, retry the upload.')
+
+    invalidate_authorization_scope(user.id for user in users)
+
+    created = {index: user for user, (index, data) in zip(users, valid)}
+    results = []
+    for index in range(len(rows)):
+        if index in created:
+            user = created[index]
+            results.append({'row': index + 1, 'status': 'created', 'id': user.id, 'email': user.email})
+        else:
+            results.append({'row': index + 1, 'status': 'failed', 'errors': errors[index]})
+
+    return {
+        'created': len(created),
+        'failed': len(errors),
+        'results': results,
+    }
+
+
+def apply_authorization_changes(user_ids, grant_ids, revoke_ids):
+    """
+    Applies a users x customer companies change set with one insert and one
+    delete on the through table, then drops the scope of every affected user.
+    """
+    AuthorizedCompanies = HRUser.authorized_customer_companies.through
+    with transaction.atomic():
+        granted = 0
+        if grant_ids:
+            # Raw so the rowcount tells how many authorizations were new;
+            # bulk_create(ignore_conflicts=True) cannot report that
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    INSERT INTO {AuthorizedCompanies._meta.db_table} (hruser_id, customercompany_id)
+                    SELECT user_id, company_id
+                    FROM unnest(%s::bigint[]) AS user_id CROSS JOIN unnest(%s::bigint[]) AS company_id
+                    ON CONFLICT DO NOTHING
+                    """,
+                    [list(user_ids), list(grant_ids)]
+                )
+                granted = cursor.rowcount
+        revoked = 0
+        if revoke_ids:
+            revoked, _ = AuthorizedCompanies.objects.filter(
+                hruser_id__in=user_ids,
+                customercompany_id__in=revoke_ids
+            ).delete()
+        refresh_authorized_hr_users_count(set(grant_ids) | set(revoke_ids))
+
+    invalidate_authorization_scope(user_ids)
+    return {'users': len(user_ids), 'granted': granted, 'revoked': revoked}
@@ -0,0 +1,91 @@
+import threading
+import time
+from django.conf import settings
+from rest_framework_simplejwt.settings import api_settings
+from common.bloom import BloomFilter
+from common.redis import get_redis
+
+REVOKED_JTI_KEY = 'revoked_jti:{jti}'
+REVOCATION_STREAM_KEY = 'revoked_jti_stream'
+STREAM_READ_BATCH = 10000
+
+
+class TokenRevocationStore:
+    """
+    Revoked token ids (jti) kept in Redis, fronted by a per-process bloom filter.
+
+    Every revocation is written as a `revoked_jti:<jti>` key that expires with
+    the token and appended to a Redis stream. Each process replays the stream
+    into its own bloom filter at most every TOKEN_REVOCATION_SYNC_INTERVAL
+    seconds, so a jti that is not in the filter is answered as not revoked
+    without a round trip; only filter hits are confirmed against Redis.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bloom = None
+        self.built_at = 0
+        self.synced_at = 0
+        self.last_stream_id = '0-0'
+
+    def revoke(self, jti, exp):
+        """Revokes the jti until `exp`. Returns False if it was already revoked."""
+        now = time.time()
+        retention = api_settings.REFRESH_TOKEN_LIFETIME.total_seconds() + settings.TOKEN_REVOCATION_SYNC_INTERVAL
+
+        pipe = get_redis().pipeline()
+        pipe.set(REVOKED_JTI_KEY.format(jti=jti), 1, ex=max(1, int(exp - now) + 1), nx=True)
+        pipe.xadd(REVOCATION_STREAM_KEY, {'jti': jti})
+        pipe.xtrim(REVOCATION_STREAM_KEY, minid=f'{int((now - retention) * 1000)}-0', approximate=True)
+        newly_revoked = pipe.execute()[0]
+
+        with self.lock:
+            if self.bloom is not None:
+                self.bloom.add(jti)
+        return bool(newly_revoked)
+
+    def is_revoked(self, jti):
+        self.sync()
+        if jti not in self.bloom:
+            return False
+        return bool(get_redis().exists(REVOKED_JTI_KEY.format(jti=jti)))
+
+    def sync(self):
+        now = time.monotonic()
+        with self.lock:
+            if self.bloom is not None and now - self.synced_at < settings.TOKEN_REVOCATION_SYNC_INTERVAL:
+                return
+
+            # Bloom filters cannot forget, so the filter is rebuilt from the
+            # (trimmed) stream now and then to drop expired revocations.
+            if self.bloom is None or now - self.built_at > settings.TOKEN_REVOCATION_REBUILD_INTERVAL:
+                bloom = BloomFilter(
+                    settings.TOKEN_REVOCATION_BLOOM_CAPACITY,
+                    settings.TOKEN_REVOCATION_BLOOM_ERROR_RATE
+                )
+                last_stream_id = '0-0'
+                built_at = now
+            else:
+                bloom = self.bloom
+                last_stream_id = self.last_stream_id
+                built_at = self.built_at
+
+            client = get_redis()
+            while True:
+                entries = client.xrange(
+                    REVOCATION_STREAM_KEY, min=f'({last_stream_id}', count=STREAM_READ_BATCH
+                )
+                for stream_id, fields in entries:
+                    bloom.add(fields[b'jti'].decode())
+                if entries:
+                    last_stream_id = entries[-1][0].decode()
+                if len(entries) < STREAM_READ_BATCH:
+                    break
+
+            self.bloom = bloom
+            self.built_at = built_at
+            self.last_stream_id = last_stream_id
+            self.synced_at = now
+
+
+revocation_store = TokenRevocationStore()
@@ -0,0 +1,87 @@
+import time
+from django.conf import settings
+from django.core.cache import cache
+
+SCOPE_CACHE_KEY = 'auth_scope:{user_id}'
+SCOPE_VERSION_CACHE_KEY = 'auth_scope_version:{user_id}'
+
+
+class AuthorizationScope:
+    """Tenant boundaries of a user: own HR company and active authorized customer companies."""
+
+    __slots__ = ('hr_company_id', 'customer_company_ids', 'is_superuser')
+
+    def __init__(self, hr_company_id, customer_company_ids, is_superuser=False):
+        self.hr_company_id = hr_company_id
+        self.customer_company_ids = frozenset(customer_company_ids)
+        self.is_superuser = is_superuser
+
+    def allows_customer_company(self, customer_company_id):
+        return self.is_superuser or customer_company_id in self.customer_company_ids
+
+    def to_cache(self):
+        return (self.hr_company_id, sorted(self.customer_company_ids), self.is_superuser)
+
+    @classmethod
+    def from_cache(cls, value):
+        hr_company_id, customer_company_ids, is_superuser = value
+        return cls(hr_company_id, customer_company_ids, is_superuser)
+
+    @classmethod
+    def for_user(cls, user):
+        customer_company_ids = user.authorized_customer_companies.filter(
+            is_active=True
+        ).values_list('id', flat=True)
+        return cls(user.hr_company_id, customer_company_ids, user.is_superuser)
+
+
+def get_authorization_scope(user):
+    """
+    Returns the scope of the user, computed at most once per request.
+
+    The scope is memoized on the user instance (one instance per request) and
+    shared across requests through the cache until one of the invalidation
+    signals in accounts.signals drops it.
+    """
+    scope = getattr(user, '_authorization_scope', None)
+    if scope is not None:
+        return scope
+
+    key = SCOPE_CACHE_KEY.format(user_id=user.pk)
+    cached = cache.get(key)
+    if cached is not None:
+        scope = AuthorizationScope.from_cache(cached)
+    else:
+        scope = AuthorizationScope.for_user(user)
+        cache.set(key, scope.to_cache(), settings.AUTHORIZATION_SCOPE_CACHE_TIMEOUT)
+
+    user._authorization_scope = scope
+    return scope
+
+
+def get_scope_version(user_id):
+    """
+    Returns the current scope version of the user, as embedded in access tokens.
+
+    A missing version (first use, or an evicted key) starts from the current
+    timestamp, so it never matches a version handed out before the key was lost.
+    """
+    key = SCOPE_VERSION_CACHE_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_authorization_scope(user_ids):
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+
+    cache.delete_many([SCOPE_CACHE_KEY.format(user_id=user_id) for user_id in user_ids])
+    for user_id in user_ids:
+        try:
+            cache.incr(SCOPE_VERSION_CACHE_KEY.format(user_id=user_id))
+        except ValueError:
+            pass
@@ -1,6 +1,14 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
-from django.contrib.auth import authenticate
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.validators import UniqueValidator
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
 from .models import HRUser
+from companies.models import CustomerCompany
+from .login_guard import authenticate_login
+from .revocation import revocation_store
+from .tokens import ScopedRefreshToken
 from companies.serializers import HRCompanySimpleSerializer, CustomerCompanySimpleSerializer
 
 class HRUserSerializer(serializers.ModelSerializer):
@@ -39,7 +47,32 @@ class HRUserSerializer(serializers.ModelSerializer):
         }
     
     def get_authorized_companies_count(self, obj):
+        count = getattr(obj, 'active_authorized_companies_count', None)
+        if count is not None:
+            return count
+        if 'authorized_customer_companies' in getattr(obj, '_prefetched_objects_cache', {}):
+            return sum(company.is_active for company in obj.authorized_customer_companies.all())
         return obj.authorized_customer_companies.filter(is_active=True).count()
+    
+    @staticmethod
+    def eager_loading(queryset, prefix=''):
+        """Loads what this serializer reads for the users at `prefix` of `queryset`."""
+        return queryset.select_related(f'{prefix}hr_company').prefetch_related(
+            Prefetch(
+                f'{prefix}authorized_customer_companies',
+                queryset=CustomerCompany.objects.only('id', 'name', 'code', 'is_active')
+            )
+        )
+    
+    def update(self, instance, validated_data):
+        # The annotated count is stale once the authorizations change
+        instance.__dict__.pop('active_authorized_companies_count', None)
+        return super().update(instance, validated_data)
+
+class HRUserSimpleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = HRUser
+        fields = ['id', 'username', 'first_name', 'last_name']
 
 class HRUserCreateSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=8)
@@ -74,6 +107,78 @@ class HRUserCreateSerializer(serializers.ModelSerializer):
         user.authorized_customer_companies.set(authorized_companies)
         return user
 
+class HRUserBulkRowSerializer(serializers.ModelSerializer):
+    """
+    One row of a bulk provisioning upload.
+
+    Uniqueness and foreign keys are checked for all rows at once by
+    accounts.provisioning, so the per-row query validators are left out.
+    """
+    password = serializers.CharField(write_only=True, min_length=8)
+    hr_company = serializers.IntegerField(required=False, allow_null=True)
+    authorized_customer_companies = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False
+    )
+    
+    class Meta:
+        model = HRUser
+        fields = [
+            'username',
+            'email',
+            'first_name',
+            'last_name',
+            'phone',
+            'password',
+            'hr_company',
+            'authorized_customer_companies',
+            'is_active'
+        ]
+    
+    def get_fields(self):
+        fields = super().get_fields()
+        for name in ('username', 'email'):
+            fields[name].validators = [
+                validator for validator in fields[name].validators
+                if not isinstance(validator, UniqueValidator)
+            ]
+        return fields
+
+class AuthorizationChangeSerializer(serializers.Serializer):
+    """Grants and/or revokes customer companies for every listed user."""
+    users = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    grant = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+    revoke = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+    
+    def validate(self, attrs):
+        users = set(attrs['users'])
+        grant = set(attrs['grant'])
+        revoke = set(attrs['revoke'])
+        
+        if not grant and not revoke:
+            raise serializers.ValidationError('Nothing to grant or revoke.')
+        if grant & revoke:
+            raise serializers.ValidationError('A customer company cannot be granted and revoked at once.')
+        
+        requester = self.context['request'].user
+        user_queryset = HRUser.objects.filter(id__in=users)
+        company_ids = grant | revoke
+        if not requester.is_superuser:
+            user_queryset = user_queryset.filter(hr_company_id=requester.hr_company_id)
+            company_ids = company_ids & requester.authorization_scope.customer_company_ids
+        
+        unknown_users = users - set(user_queryset.values_list('id', flat=True))
+        if unknown_users:
+            raise serializers.ValidationError({'users': [f'Invalid pk "{pk}" - object does not exist.' for pk in sorted(unknown_users)]})
+        
+        known_companies = set(CustomerCompany.objects.filter(id__in=company_ids).values_list('id', flat=True))
+        for field, ids in (('grant', grant), ('revoke', revoke)):
+            unknown = ids - known_companies
+            if unknown:
+                raise serializers.ValidationError({field: [f'Invalid pk "{pk}" - object does not exist.' for pk in sorted(unknown)]})
+        
+        return {'users': users, 'grant': grant, 'revoke': revoke}
+
 class LoginSerializer(serializers.Serializer):
     email = serializers.CharField()
     password = serializers.CharField()
@@ -83,17 +188,56 @@ class LoginSerializer(serializers.Serializer):
         password = attrs.get('password')
 
         if email and password:
-            user = authenticate(email=email, password=password)
+            user = authenticate_login(self.context.get('request'), email, password)
+            # Inactive users are rejected by authenticate_login() like wrong passwords
             if not user:
                 raise serializers.ValidationError('Email veya şifre hatalı!')
-            if not user.is_active:
-                raise serializers.ValidationError('Hesap deaktif!')
             attrs['user'] = user
         else:
             raise serializers.ValidationError('Email ve şifre gerekli!')
         
         return attrs
 
+class TokenRefreshSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
+    access = serializers.CharField(read_only=True)
+    
+    def validate(self, attrs):
+        try:
+            refresh = ScopedRefreshToken(attrs['refresh'])
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+        
+        jti = refresh[api_settings.JTI_CLAIM]
+        if revocation_store.is_revoked(jti):
+            raise InvalidToken('Token is revoked')
+        
+        user = HRUser.objects.filter(pk=refresh[api_settings.USER_ID_CLAIM]).first()
+        if not user or not user.is_active:
+            raise AuthenticationFailed('User not found or inactive', code='user_inactive')
+        
+        # Claims are re-read from the user, so the new access token always
+        # carries the current scope version
+        new_refresh = ScopedRefreshToken.for_user(user)
+        data = {'access': str(new_refresh.access_token)}
+        
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if not revocation_store.revoke(jti, refresh['exp']):
+                raise InvalidToken('Token is revoked')
+            data['refresh'] = str(new_refresh)
+        
+        return data
+
+class TokenRevokeSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
+    
+    def validate(self, attrs):
+        try:
+            attrs['token'] = ScopedRefreshToken(attrs['refresh'])
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+        return attrs
+
 class HRUserProfileSerializer(serializers.ModelSerializer):
     hr_company_name = serializers.CharField(source='hr_company.name', read_only=True)
     authorized_companies_list = serializers.StringRelatedField(
@@ -0,0 +1,112 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from companies.counters import refresh_hr_users_count, refresh_authorized_hr_users_count
+from companies.models import CustomerCompany
+from .models import HRUser
+from .scope import invalidate_authorization_scope
+
+AuthorizedCompanies = HRUser.authorized_customer_companies.through
+
+
+def invalidate_on_commit(user_ids):
+    # Dropped right away and once more after commit, so a concurrent request
+    # cannot re-cache the pre-transaction scope in between.
+    user_ids = list(user_ids)
+    invalidate_authorization_scope(user_ids)
+    transaction.on_commit(lambda: invalidate_authorization_scope(user_ids))
+
+
+@receiver(m2m_changed, sender=AuthorizedCompanies)
+def authorized_companies_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action == 'pre_clear':
+            instance._cleared_company_ids = list(
+                AuthorizedCompanies.objects.filter(hruser_id=instance.pk).values_list('customercompany_id', flat=True)
+            )
+        elif action in ('post_add', 'post_remove'):
+            drop_user_scope(instance)
+            refresh_authorized_hr_users_count(pk_set)
+        elif action == 'post_clear':
+            drop_user_scope(instance)
+            refresh_authorized_hr_users_count(instance.__dict__.pop('_cleared_company_ids', []))
+        return
+
+    if action in ('post_add', 'post_remove'):
+        invalidate_on_commit(pk_set)
+        refresh_authorized_hr_users_count([instance.pk])
+    elif action == 'pre_clear':
+        invalidate_on_commit(
+            AuthorizedCompanies.objects.filter(
+                customercompany_id=instance.pk
+            ).values_list('hruser_id', flat=True)
+        )
+    elif action == 'post_clear':
+        refresh_authorized_hr_users_count([instance.pk])
+
+
+@receiver(post_save, sender=CustomerCompany)
+def customer_company_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        return
+    if update_fields is not None and 'is_active' not in update_fields:
+        return
+
+    invalidate_on_commit(
+        AuthorizedCompanies.objects.filter(
+            customercompany_id=instance.pk
+        ).values_list('hruser_id', flat=True)
+    )
+
+
+def drop_user_scope(user):
+    user.__dict__.pop('_authorization_scope', None)
+    invalidate_on_commit([user.pk])
+
+
+def counts_unaffected(update_fields):
+    return update_fields is not None and not {'hr_company', 'is_active'} & set(update_fields)
+
+
+@receiver(pre_save, sender=HRUser)
+def hr_user_saving(sender, instance, update_fields=None, **kwargs):
+    if instance._state.adding or counts_unaffected(update_fields):
+        return
+    instance._counted_state = HRUser.objects.filter(pk=instance.pk).values_list(
+        'hr_company_id', 'is_active'
+    ).first()
+
+
+@receiver(post_save, sender=HRUser)
+def hr_user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    drop_user_scope(instance)
+
+    if created:
+        refresh_hr_users_count([instance.hr_company_id])
+        return
+    previous = instance.__dict__.pop('_counted_state', None)
+    if previous is None:
+        return
+    hr_company_id, is_active = previous
+    if hr_company_id != instance.hr_company_id or is_active != instance.is_active:
+        refresh_hr_users_count([hr_company_id, instance.hr_company_id])
+    if is_active != instance.is_active:
+        refresh_authorized_hr_users_count(
+            AuthorizedCompanies.objects.filter(hruser_id=instance.pk).values_list('customercompany_id', flat=True)
+        )
+
+
+@receiver(pre_delete, sender=HRUser)
+def hr_user_deleting(sender, instance, **kwargs):
+    instance._counted_company_ids = list(
+        AuthorizedCompanies.objects.filter(hruser_id=instance.pk).values_list('customercompany_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=HRUser)
+def hr_user_deleted(sender, instance, **kwargs):
+    drop_user_scope(instance)
+    refresh_hr_users_count([instance.hr_company_id])
+    refresh_authorized_hr_users_count(instance.__dict__.pop('_counted_company_ids', []))
@@ -1,5 +1,10 @@
 import json
-from django.test import TestCase
+import threading
+import time
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from rest_framework.test import APITestCase, APIClient
@@ -7,6 +12,10 @@ from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
 from companies.models import HRCompany, CustomerCompany
 from .models import HRUser
+from .scope import get_authorization_scope
+from .tokens import ScopedRefreshToken
+from common.bloom import BloomFilter
+from .login_guard import login_throttle, get_login_metrics
 from .serializers import (
     HRUserSerializer,
     HRUserCreateSerializer,
@@ -137,6 +146,7 @@ class HRUserModelTest(TestCase):
 
 class HRUserSerializerTest(TestCase):
     def setUp(self):
+        login_throttle.reset(email='test@example.com', ip='127.0.0.1')
         self.hr_company = HRCompany.objects.create(
             name="Test HR Company",
             code="THR001"
@@ -244,7 +254,7 @@ class HRUserSerializerTest(TestCase):
         
         serializer = LoginSerializer(data=data)
         self.assertFalse(serializer.is_valid())
-        self.assertIn('non_field_errors', serializer.errors)
+        self.assertEqual(serializer.errors['non_field_errors'], ['Email veya şifre hatalı!'])
         
     def test_hr_user_profile_serializer(self):
         user = HRUser.objects.create_user(
@@ -268,6 +278,7 @@ class HRUserSerializerTest(TestCase):
 
 class AuthViewSetTest(APITestCase):
     def setUp(self):
+        login_throttle.reset(email='test@example.com', ip='127.0.0.1')
         self.client = APIClient()
         self.hr_company = HRCompany.objects.create(
             name="Test HR Company",
@@ -507,6 +518,189 @@ class HRUserViewSetTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
 
+    def test_list_query_count_independent_of_page_size(self):
+        self.client.force_authenticate(user=self.superuser)
+        url = reverse('hruser-list')
+        self.hr_user1.authorized_customer_companies.add(self.customer_company)
+        
+        with CaptureQueriesContext(connection) as small_page:
+            self.client.get(url)
+        
+        for i in range(10):
+            user = HRUser.objects.create_user(
+                username=f"bulkuser{i}",
+                email=f"bulk{i}@example.com",
+                password="hrpass123",
+                hr_company=self.hr_company1
+            )
+            user.authorized_customer_companies.add(self.customer_company)
+        
+        with self.assertNumQueries(len(small_page.captured_queries)):
+            response = self.client.get(url)
+        
+        self.assertEqual(response.data['count'], 13)
+        counts = {row['username']: row['authorized_companies_count'] for row in response.data['results']}
+        self.assertEqual(counts['bulkuser0'], 1)
+        self.assertEqual(counts['admin'], 0)
+
+
+class HRUserBulkImportTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.hr_company = HRCompany.objects.create(name="HR Company", code="HR001")
+        self.customer_company1 = CustomerCompany.objects.create(name="Customer Company 1", code="CC001")
+        self.customer_company2 = CustomerCompany.objects.create(name="Customer Company 2", code="CC002")
+        self.superuser = HRUser.objects.create_superuser(
+            username="admin",
+            email="admin@example.com",
+            password="adminpass123"
+        )
+        self.client.force_authenticate(user=self.superuser)
+        self.url = reverse('hruser-bulk-import')
+        
+    def user_row(self, i, **extra):
+        row = {
+            'username': f'bulkuser{i}',
+            'email': f'bulk{i}@example.com',
+            'password': 'bulkpass123',
+            'hr_company': self.hr_company.id,
+            'authorized_customer_companies': [self.customer_company1.id],
+        }
+        row.update(extra)
+        return row
+        
+    def test_json_import(self):
+        rows = [self.user_row(i) for i in range(10)]
+        
+        response = self.client.post(self.url, rows, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 10)
+        user = HRUser.objects.get(email='bulk3@example.com')
+        self.assertTrue(user.check_password('bulkpass123'))
+        self.assertEqual(user.hr_company, self.hr_company)
+        self.assertEqual(list(user.authorized_customer_companies.all()), [self.customer_company1])
+        
+    def test_csv_import(self):
+        content = (
+            "username,email,password,hr_company,authorized_customer_companies\n"
+            f"csvuser,csv@example.com,csvpass123,{self.hr_company.id},"
+            f"\"{self.customer_company1.id};{self.customer_company2.id}\"\n"
+        )
+        upload = SimpleUploadedFile('users.csv', content.encode(), content_type='text/csv')
+        
+        response = self.client.post(self.url, {'file': upload}, format='multipart')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        user = HRUser.objects.get(email='csv@example.com')
+        self.assertEqual(user.authorized_customer_companies.count(), 2)
+        
+    def test_invalid_rows_reported(self):
+        rows = [
+            self.user_row(1),
+            self.user_row(2, email='admin@example.com'),
+            self.user_row(3, email='bulk1@example.com'),
+            self.user_row(4, password='short'),
+            self.user_row(5, authorized_customer_companies=[999999]),
+        ]
+        
+        response = self.client.post(self.url, rows, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['failed'], 4)
+        results = response.data['results']
+        self.assertEqual(results[0]['status'], 'created')
+        self.assertIn('email', results[1]['errors'])
+        self.assertIn('email', results[2]['errors'])
+        self.assertIn('password', results[3]['errors'])
+        self.assertIn('authorized_customer_companies', results[4]['errors'])
+        
+    def test_hr_user_limited_to_own_scope(self):
+        hr_user = HRUser.objects.create_user(
+            username="hruser",
+            email="hr@example.com",
+            password="hrpass123",
+            hr_company=self.hr_company
+        )
+        hr_user.authorized_customer_companies.add(self.customer_company1)
+        self.client.force_authenticate(user=hr_user)
+        rows = [
+            self.user_row(1, hr_company=None),
+            self.user_row(2, authorized_customer_companies=[self.customer_company2.id]),
+        ]
+        
+        response = self.client.post(self.url, rows, format='json')
+        
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(HRUser.objects.get(email='bulk1@example.com').hr_company, self.hr_company)
+        self.assertIn('authorized_customer_companies', response.data['results'][1]['errors'])
+
+
+class BulkAuthorizeTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.hr_company = HRCompany.objects.create(name="HR Company", code="HR001")
+        self.customer_company1 = CustomerCompany.objects.create(name="Customer Company 1", code="CC001")
+        self.customer_company2 = CustomerCompany.objects.create(name="Customer Company 2", code="CC002")
+        self.superuser = HRUser.objects.create_superuser(
+            username="admin",
+            email="admin@example.com",
+            password="adminpass123"
+        )
+        self.users = []
+        for i in range(3):
+            user = HRUser.objects.create_user(
+                username=f"hruser{i}",
+                email=f"hr{i}@example.com",
+                password="hrpass123",
+                hr_company=self.hr_company
+            )
+            user.authorized_customer_companies.add(self.customer_company1)
+            self.users.append(user)
+        self.client.force_authenticate(user=self.superuser)
+        self.url = reverse('hruser-bulk-authorize')
+        
+    def test_grant_and_revoke(self):
+        user_ids = [user.id for user in self.users]
+        scope = get_authorization_scope(HRUser.objects.get(pk=user_ids[0]))
+        self.assertEqual(scope.customer_company_ids, frozenset([self.customer_company1.id]))
+        
+        with self.assertNumQueries(9):
+            response = self.client.post(self.url, {
+                'users': user_ids,
+                'grant': [self.customer_company2.id],
+                'revoke': [self.customer_company1.id],
+            }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['granted'], 3)
+        self.assertEqual(response.data['revoked'], 3)
+        for user in self.users:
+            self.assertEqual(list(user.authorized_customer_companies.all()), [self.customer_company2])
+        scope = get_authorization_scope(HRUser.objects.get(pk=user_ids[0]))
+        self.assertEqual(scope.customer_company_ids, frozenset([self.customer_company2.id]))
+        
+    def test_grant_is_idempotent(self):
+        response = self.client.post(self.url, {
+            'users': [self.users[0].id],
+            'grant': [self.customer_company1.id],
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['granted'], 0)
+        self.assertEqual(self.users[0].authorized_customer_companies.count(), 1)
+        
+    def test_unknown_ids_rejected(self):
+        response = self.client.post(self.url, {
+            'users': [self.users[0].id, 999999],
+            'grant': [self.customer_company2.id],
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('users', response.data)
+
+
 class PermissionTest(APITestCase):
     def setUp(self):
         self.client = APIClient()
@@ -600,6 +794,7 @@ class PermissionTest(APITestCase):
 
 class AuthenticationFlowTest(APITestCase):
     def setUp(self):
+        login_throttle.reset(email='test@example.com', ip='127.0.0.1')
         self.client = APIClient()
         self.hr_company = HRCompany.objects.create(
             name="Test HR Company",
@@ -656,6 +851,33 @@ class AuthenticationFlowTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['username'], self.user.username)
         
+    def test_scoped_token_authenticates_without_user_query(self):
+        access_token = str(ScopedRefreshToken.for_user(self.user).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+        url = reverse('hruser-list')
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        user_lookup = f'WHERE "accounts_hruser"."id" = {self.user.id}'
+        self.assertFalse(any(user_lookup in query['sql'] for query in queries.captured_queries))
+        
+    def test_scoped_token_rejected_after_scope_change(self):
+        access_token = str(ScopedRefreshToken.for_user(self.user).access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+        url = reverse('hruser-me')
+        
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        
+        customer_company = CustomerCompany.objects.create(name="Customer Company", code="CC001")
+        self.user.authorized_customer_companies.add(customer_company)
+        
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.data['code'], 'token_scope_outdated')
+        
     def test_invalid_jwt_token(self):
         self.client.credentials(HTTP_AUTHORIZATION='Bearer invalid_token')
         url = reverse('auth-profile')
@@ -665,6 +887,311 @@ class AuthenticationFlowTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+class AuthorizationScopeTest(TestCase):
+    def setUp(self):
+        self.hr_company = HRCompany.objects.create(
+            name="Test HR Company",
+            code="THR001"
+        )
+        self.customer_company1 = CustomerCompany.objects.create(
+            name="Customer Company 1",
+            code="CC001"
+        )
+        self.customer_company2 = CustomerCompany.objects.create(
+            name="Customer Company 2",
+            code="CC002"
+        )
+        self.user = HRUser.objects.create_user(
+            username="testuser",
+            email="test@example.com",
+            password="testpass123",
+            hr_company=self.hr_company
+        )
+        self.user.authorized_customer_companies.add(self.customer_company1)
+        
+    def fresh_user(self):
+        return HRUser.objects.get(pk=self.user.pk)
+        
+    def test_scope_contents(self):
+        scope = get_authorization_scope(self.fresh_user())
+        
+        self.assertEqual(scope.hr_company_id, self.hr_company.id)
+        self.assertEqual(scope.customer_company_ids, frozenset([self.customer_company1.id]))
+        self.assertFalse(scope.is_superuser)
+        
+    def test_scope_memoized_per_instance_and_cached_across_instances(self):
+        user = self.fresh_user()
+        with self.assertNumQueries(1):
+            get_authorization_scope(user)
+            get_authorization_scope(user)
+        
+        with self.assertNumQueries(0):
+            get_authorization_scope(HRUser(pk=self.user.pk, hr_company_id=self.hr_company.id))
+        
+    def test_invalidated_on_authorization_change(self):
+        get_authorization_scope(self.fresh_user())
+        
+        self.user.authorized_customer_companies.add(self.customer_company2)
+        
+        scope = get_authorization_scope(self.fresh_user())
+        self.assertEqual(
+            scope.customer_company_ids,
+            frozenset([self.customer_company1.id, self.customer_company2.id])
+        )
+        
+    def test_invalidated_on_reverse_authorization_change(self):
+        get_authorization_scope(self.fresh_user())
+        
+        self.customer_company1.authorized_hr_users.clear()
+        
+        self.assertEqual(get_authorization_scope(self.fresh_user()).customer_company_ids, frozenset())
+        
+    def test_invalidated_on_customer_company_deactivation(self):
+        get_authorization_scope(self.fresh_user())
+        
+        self.customer_company1.is_active = False
+        self.customer_company1.save()
+        
+        self.assertEqual(get_authorization_scope(self.fresh_user()).customer_company_ids, frozenset())
+
+
+class CompanyCounterTest(TestCase):
+    def setUp(self):
+        self.hr_company = HRCompany.objects.create(name="HR Company", code="HR001")
+        self.other_hr_company = HRCompany.objects.create(name="Other HR Company", code="HR002")
+        self.customer_company1 = CustomerCompany.objects.create(name="Customer Company 1", code="CC001")
+        self.customer_company2 = CustomerCompany.objects.create(name="Customer Company 2", code="CC002")
+        self.user = HRUser.objects.create_user(
+            username="hruser",
+            email="hr@example.com",
+            password="hrpass123",
+            hr_company=self.hr_company
+        )
+        self.user.authorized_customer_companies.add(self.customer_company1, self.customer_company2)
+        
+    def assertCounts(self, hr_company, other_hr_company, customer_company1, customer_company2):
+        counts = (
+            HRCompany.objects.get(pk=self.hr_company.pk).active_hr_users_count,
+            HRCompany.objects.get(pk=self.other_hr_company.pk).active_hr_users_count,
+            CustomerCompany.objects.get(pk=self.customer_company1.pk).active_authorized_hr_users_count,
+            CustomerCompany.objects.get(pk=self.customer_company2.pk).active_authorized_hr_users_count,
+        )
+        self.assertEqual(counts, (hr_company, other_hr_company, customer_company1, customer_company2))
+        
+    def test_counts_follow_user_changes(self):
+        self.assertCounts(1, 0, 1, 1)
+        
+        self.user.hr_company = self.other_hr_company
+        self.user.save()
+        self.assertCounts(0, 1, 1, 1)
+        
+        self.user.is_active = False
+        self.user.save()
+        self.assertCounts(0, 0, 0, 0)
+        
+    def test_counts_follow_authorization_changes(self):
+        self.user.authorized_customer_companies.remove(self.customer_company1)
+        self.assertCounts(1, 0, 0, 1)
+        
+        self.customer_company2.authorized_hr_users.clear()
+        self.assertCounts(1, 0, 0, 0)
+        
+        self.user.authorized_customer_companies.add(self.customer_company1)
+        self.user.authorized_customer_companies.clear()
+        self.assertCounts(1, 0, 0, 0)
+        
+    def test_counts_follow_user_deletion(self):
+        self.user.delete()
+        self.assertCounts(0, 0, 0, 0)
+        
+    def test_full_company_save_keeps_counts(self):
+        hr_company = HRCompany.objects.get(pk=self.hr_company.pk)
+        customer_company = CustomerCompany.objects.get(pk=self.customer_company1.pk)
+        # Counted after the companies were loaded
+        HRUser.objects.create_user(
+            username="hruser2", email="hr2@example.com", password="hrpass123", hr_company=self.hr_company
+        ).authorized_customer_companies.add(self.customer_company1)
+        
+        hr_company.name = "Renamed HR Company"
+        hr_company.save()
+        customer_company.is_active = False
+        customer_company.save()
+        
+        self.assertCounts(2, 0, 2, 1)
+        self.assertEqual(HRCompany.objects.get(pk=self.hr_company.pk).name, "Renamed HR Company")
+        
+    def test_nested_company_renders_without_queries(self):
+        from companies.serializers import HRCompanySerializer
+        company = HRCompany.objects.get(pk=self.hr_company.pk)
+        
+        with self.assertNumQueries(0):
+            data = HRCompanySerializer(company).data
+        self.assertEqual(data['hr_users_count'], 1)
+
+
+
+class CompanyCounterConcurrencyTest(TransactionTestCase):
+    def setUp(self):
+        self.hr_company = HRCompany.objects.create(name="HR Company", code="HR001")
+        
+    def create_user(self, index, created=None, proceed=None):
+        try:
+            with transaction.atomic():
+                HRUser.objects.create_user(
+                    username=f"hruser{index}",
+                    email=f"hr{index}@example.com",
+                    password="hrpass123",
+                    hr_company=self.hr_company
+                )
+                if created:
+                    created.set()
+                if proceed:
+                    proceed.wait(5)
+                    # Let the other transaction block on the company row
+                    time.sleep(1.5)
+        finally:
+            connection.close()
+        
+    def test_concurrent_recounts_see_each_other(self):
+        first_created, second_started = threading.Event(), threading.Event()
+        first = threading.Thread(target=self.create_user, args=(1, first_created, second_started))
+        first.start()
+        first_created.wait(5)
+        
+        def second_user():
+            second_started.set()
+            self.create_user(2)
+        second = threading.Thread(target=second_user)
+        second.start()
+        first.join()
+        second.join()
+        
+        self.assertEqual(HRCompany.objects.get(pk=self.hr_company.pk).active_hr_users_count, 2)
+
+
+class TokenRefreshTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.hr_company = HRCompany.objects.create(
+            name="Test HR Company",
+            code="THR001"
+        )
+        self.user = HRUser.objects.create_user(
+            username="testuser",
+            email="test@example.com",
+            password="testpass123",
+            hr_company=self.hr_company
+        )
+        self.refresh = ScopedRefreshToken.for_user(self.user)
+        
+    def test_refresh_returns_rotated_tokens(self):
+        url = reverse('auth-refresh')
+        
+        response = self.client.post(url, {'refresh': str(self.refresh)}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('access', response.data)
+        self.assertNotEqual(response.data['refresh'], str(self.refresh))
+        
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.assertEqual(self.client.get(reverse('hruser-me')).status_code, status.HTTP_200_OK)
+        
+    def test_rotated_refresh_token_cannot_be_reused(self):
+        url = reverse('auth-refresh')
+        
+        self.client.post(url, {'refresh': str(self.refresh)}, format='json')
+        response = self.client.post(url, {'refresh': str(self.refresh)}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        
+    def test_refresh_picks_up_new_scope_version(self):
+        customer_company = CustomerCompany.objects.create(name="Customer Company", code="CC001")
+        self.user.authorized_customer_companies.add(customer_company)
+        
+        response = self.client.post(reverse('auth-refresh'), {'refresh': str(self.refresh)}, format='json')
+        
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.assertEqual(self.client.get(reverse('hruser-me')).status_code, status.HTTP_200_OK)
+        
+    def test_refresh_rejected_for_inactive_user(self):
+        self.user.is_active = False
+        self.user.save()
+        
+        response = self.client.post(reverse('auth-refresh'), {'refresh': str(self.refresh)}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        
+    def test_logout_revokes_refresh_and_access_token(self):
+        access_token = str(self.refresh.access_token)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+        
+        response = self.client.post(reverse('auth-logout'), {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        self.assertEqual(self.client.get(reverse('hruser-me')).status_code, status.HTTP_401_UNAUTHORIZED)
+        
+        self.client.credentials()
+        response = self.client.post(reverse('auth-refresh'), {'refresh': str(self.refresh)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(LOGIN_THROTTLE_EMAIL_LIMIT=3, LOGIN_THROTTLE_IP_LIMIT=5)
+class LoginThrottleTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = HRUser.objects.create_user(
+            username="throttled",
+            email="throttled@example.com",
+            password="testpass123"
+        )
+        self.url = reverse('auth-login')
+        login_throttle.reset(email='throttled@example.com', ip='127.0.0.1')
+        for email in ['other@example.com'] + [f'unknown{i}@example.com' for i in range(5)]:
+            login_throttle.reset(email=email)
+        
+    def login(self, email, password):
+        return self.client.post(self.url, {'email': email, 'password': password}, format='json')
+        
+    def test_email_rejected_after_failures(self):
+        for i in range(3):
+            self.assertEqual(self.login('throttled@example.com', 'wrongpass').status_code, status.HTTP_400_BAD_REQUEST)
+        
+        rejected_before = get_login_metrics().get('rejected_email', 0)
+        response = self.login('throttled@example.com', 'testpass123')
+        
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(get_login_metrics()['rejected_email'], rejected_before + 1)
+        
+    def test_ip_rejected_after_failures(self):
+        for i in range(5):
+            self.login(f'unknown{i}@example.com', 'wrongpass')
+        
+        response = self.login('other@example.com', 'wrongpass')
+        
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        
+    def test_successful_login_clears_email_failures(self):
+        for i in range(2):
+            self.login('throttled@example.com', 'wrongpass')
+        self.assertEqual(self.login('throttled@example.com', 'testpass123').status_code, status.HTTP_200_OK)
+        
+        for i in range(2):
+            self.login('throttled@example.com', 'wrongpass')
+        self.assertEqual(self.login('throttled@example.com', 'testpass123').status_code, status.HTTP_200_OK)
+
+
+class BloomFilterTest(TestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        items = [f'jti-{i}' for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+        
+        self.assertTrue(all(item in bloom for item in items))
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
 class TestUtilities:
     @staticmethod
     def create_test_hr_company(name="Test HR Company", code="THR001"):
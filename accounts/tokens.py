@@ -0,0 +1,23 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+from .scope import get_scope_version
+
+
+class ScopedRefreshToken(RefreshToken):
+    """
+    Refresh token carrying the tenant scope claims of the user.
+
+    The claims are copied into every access token minted from it, which lets
+    ScopedJWTAuthentication build the request user without a database query.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        scope_version = get_scope_version(user.pk)
+        token = super().for_user(user)
+        token['username'] = user.username
+        token['email'] = user.email
+        token['hr_company_id'] = user.hr_company_id
+        token['is_superuser'] = user.is_superuser
+        token['is_staff'] = user.is_staff
+        token['scope_version'] = scope_version
+        return token
@@ -3,32 +3,61 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
-from django.contrib.auth import authenticate, login, logout
+from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.views.decorators.csrf import csrf_protect
 from django.utils.decorators import method_decorator
 from django.views import View
+from django.db.models import Count, Prefetch, Q
+from companies.models import CustomerCompany
 from .models import HRUser
+from .tokens import ScopedRefreshToken
 from .serializers import (
     HRUserSerializer,
     HRUserCreateSerializer,
     LoginSerializer,
-    HRUserProfileSerializer
+    HRUserProfileSerializer,
+    HRUserBulkRowSerializer,
+    AuthorizationChangeSerializer,
+    TokenRefreshSerializer,
+    TokenRevokeSerializer
 )
+from .revocation import revocation_store
+from .login_guard import authenticate_login, get_login_metrics
+from .provisioning import BulkProvisioningError, read_rows, provision_users, apply_authorization_changes
+from rest_framework.exceptions import Throttled
+from rest_framework_simplejwt.settings import api_settings
 from drf_spectacular.utils import extend_schema
+from audit.recorder import record_event, field_values, diff
 
 logger = logging.getLogger('wisehire.accounts')
 
 
+def user_audit_values(user):
+    values = field_values(user)
+    values['authorized_customer_companies'] = sorted(
+        company.id for company in user.authorized_customer_companies.all()
+    )
+    return values
+
+
+def load_full_user(user):
+    # request.user may be the claim-backed instance of ScopedJWTAuthentication
+    return HRUser.objects.select_related('hr_company').get(pk=user.pk)
+
+
 class AuthViewSet(viewsets.GenericViewSet):
     permission_classes = [AllowAny]
     serializer_class = LoginSerializer
 
+    def get_authenticate_header(self, request):
+        # refresh runs without authenticators, token errors must still be 401
+        return super().get_authenticate_header(request) or 'Bearer realm="api"'
+
     @extend_schema(
         operation_id="login",
         summary="User Login",
@@ -38,12 +67,12 @@ class AuthViewSet(viewsets.GenericViewSet):
     )
     @action(detail=False, methods=['post'])
     def login(self, request):
-        serializer = LoginSerializer(data=request.data)
+        serializer = LoginSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             user = serializer.validated_data['user']
-            refresh = RefreshToken.for_user(user)
+            refresh = ScopedRefreshToken.for_user(user)
             
-            logger.info(f"User login successful - User: {user.username} (ID: {user.id}), Email: {user.email}, IP: {request.META.get('REMOTE_ADDR', 'Unknown')}")
+            logger.info("User login successful - User: %s (ID: %s), Email: %s, IP: %s", user.username, user.id, user.email, request.META.get('REMOTE_ADDR', 'Unknown'))
                      
             return Response({
                 'access': str(refresh.access_token),
@@ -53,9 +82,54 @@ class AuthViewSet(viewsets.GenericViewSet):
             })
         
         email = request.data.get('email', 'Unknown')
-        logger.warning(f"Failed login attempt - Email: {email}")
+        logger.warning("Failed login attempt - Email: %s", email)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @extend_schema(
+        operation_id="refresh_token",
+        summary="Refresh Token",
+        description="Exchange a refresh token for a new access token (and a rotated refresh token)",
+        request=TokenRefreshSerializer,
+        responses=TokenRefreshSerializer,
+        tags=['Authentication']
+    )
+    @action(detail=False, methods=['post'], authentication_classes=[])
+    def refresh(self, request):
+        serializer = TokenRefreshSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.validated_data)
+
+    @extend_schema(
+        operation_id="logout",
+        summary="Logout",
+        description="Revoke the given refresh token and the access token of the request",
+        request=TokenRevokeSerializer,
+        tags=['Authentication']
+    )
+    @action(detail=False, methods=['post'])
+    def logout(self, request):
+        serializer = TokenRevokeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        token = serializer.validated_data['token']
+        revocation_store.revoke(token[api_settings.JTI_CLAIM], token['exp'])
+        if request.auth is not None and api_settings.JTI_CLAIM in request.auth:
+            revocation_store.revoke(request.auth[api_settings.JTI_CLAIM], request.auth['exp'])
+        
+        logger.info("Token logout - User ID: %s", token[api_settings.USER_ID_CLAIM])
+        
+        return Response({'message': 'Logout successful!'})
+
+    @extend_schema(
+        operation_id="login_metrics",
+        summary="Login Throttle Metrics",
+        description="Allowed and rejected login attempt counters of the login throttle",
+        tags=['Authentication']
+    )
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAdminUser])
+    def login_metrics(self, request):
+        return Response(get_login_metrics())
+
     @extend_schema(
         operation_id="profile",
         summary="User Profile",
@@ -65,7 +139,7 @@ class AuthViewSet(viewsets.GenericViewSet):
     )
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def profile(self, request):
-        serializer = HRUserProfileSerializer(request.user)
+        serializer = HRUserProfileSerializer(load_full_user(request.user))
         return Response(serializer.data)
 
     @extend_schema(
@@ -88,18 +162,18 @@ class AuthViewSet(viewsets.GenericViewSet):
         username = request.data.get('username')
         password = request.data.get('password')
         
-        user = authenticate(username=username, password=password)
-        if user and user.is_active:
+        user = authenticate_login(request, username, password) if username and password else None
+        if user:
             login(request, user)
 
-            logger.info(f"Session login successful - User: {user.username} (ID: {user.id}), Email: {user.email}")
+            logger.info("Session login successful - User: %s (ID: %s), Email: %s", user.username, user.id, user.email)
 
             return Response({
                 'message': 'Login successful!',
                 'user': HRUserProfileSerializer(user).data
             })
 
-        logger.warning(f"Failed session login attempt - Username: {username}")
+        logger.warning("Failed session login attempt - Username: %s", username)
 
         return Response({
             'error': 'Invalid username or password!'
@@ -136,7 +210,7 @@ class HRUserViewSet(viewsets.ModelViewSet):
         response = super().create(request, *args, **kwargs)
         if response.status_code == status.HTTP_201_CREATED:
             user_data = response.data
-            logger.info(f"New user created - Username: {user_data.get('username')}, Email: {user_data.get('email')}, Created by: {request.user.username} (ID: {request.user.id})")
+            logger.info("New user created - Username: %s, Email: %s, Created by: %s (ID: %s)", user_data.get('username'), user_data.get('email'), request.user.username, request.user.id)
         return response
     
     @extend_schema(
@@ -163,7 +237,7 @@ class HRUserViewSet(viewsets.ModelViewSet):
         }
         response = super().update(request, *args, **kwargs)
         if response.status_code == status.HTTP_200_OK:
-            logger.info(f"User updated - User: {instance.username} (ID: {instance.id}), Updated by: {request.user.username} (ID: {request.user.id}), Changes: {request.data}")
+            logger.info("User updated - User: %s (ID: %s), Updated by: %s (ID: %s), Changes: %s", instance.username, instance.id, request.user.username, request.user.id, request.data)
         return response
     
     @extend_schema(
@@ -183,18 +257,41 @@ class HRUserViewSet(viewsets.ModelViewSet):
     )
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        user_info = f"Username: {instance.username}, Email: {instance.email}, ID: {instance.id}"
+        username, email, user_id = instance.username, instance.email, instance.id
         response = super().destroy(request, *args, **kwargs)
         if response.status_code == status.HTTP_204_NO_CONTENT:
-            logger.warning(f"User deleted - {user_info}, Deleted by: {request.user.username} (ID: {request.user.id})")
+            logger.warning("User deleted - Username: %s, Email: %s, ID: %s, Deleted by: %s (ID: %s)", username, email, user_id, request.user.username, request.user.id)
         return response
     
+    def perform_create(self, serializer):
+        user = serializer.save()
+        record_event(self.request, 'create', user, user_audit_values(user))
+    
+    def perform_update(self, serializer):
+        before = user_audit_values(serializer.instance)
+        user = serializer.save()
+        record_event(self.request, 'update', user, diff(before, user_audit_values(user)))
+    
+    def perform_destroy(self, instance):
+        record_event(self.request, 'delete', instance, user_audit_values(instance))
+        instance.delete()
+    
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().select_related('hr_company').prefetch_related(
+            Prefetch(
+                'authorized_customer_companies',
+                queryset=CustomerCompany.objects.only('id', 'name', 'code')
+            )
+        ).annotate(
+            active_authorized_companies_count=Count(
+                'authorized_customer_companies',
+                filter=Q(authorized_customer_companies__is_active=True)
+            )
+        )
         
         if not self.request.user.is_superuser:
-            if hasattr(self.request.user, 'hr_company'):
-                queryset = queryset.filter(hr_company=self.request.user.hr_company)
+            if hasattr(self.request.user, 'hr_company_id'):
+                queryset = queryset.filter(hr_company_id=self.request.user.hr_company_id)
             else:
                 queryset = queryset.none()
         
@@ -205,6 +302,52 @@ class HRUserViewSet(viewsets.ModelViewSet):
             return HRUserCreateSerializer
         return HRUserSerializer
     
+    @extend_schema(
+        operation_id="bulk_import_hr_users",
+        summary="Bulk Import Users",
+        description="Creates users from a JSON list or an uploaded CSV/JSON file and returns a per-row report",
+        request=HRUserBulkRowSerializer(many=True),
+        tags=['Users']
+    )
+    @action(detail=False, methods=['post'])
+    def bulk_import(self, request):
+        try:
+            report = provision_users(read_rows(request), request.user)
+        except BulkProvisioningError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        logger.info("Bulk user import - Created: %s, Failed: %s, Imported by: %s (ID: %s)",
+                    report['created'], report['failed'], request.user.username, request.user.id)
+        
+        response_status = status.HTTP_201_CREATED if report['created'] else status.HTTP_400_BAD_REQUEST
+        return Response(report, status=response_status)
+    
+    @extend_schema(
+        operation_id="bulk_authorize_hr_users",
+        summary="Bulk Grant/Revoke Customer Companies",
+        description="Grants and revokes customer company authorizations for several users at once",
+        request=AuthorizationChangeSerializer,
+        tags=['Users']
+    )
+    @action(detail=False, methods=['post'])
+    def bulk_authorize(self, request):
+        serializer = AuthorizationChangeSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        changes = serializer.validated_data
+        
+        result = apply_authorization_changes(changes['users'], changes['grant'], changes['revoke'])
+        for user in HRUser.objects.filter(id__in=changes['users']).only('id', 'hr_company_id'):
+            record_event(request, 'update', user, {'authorized_customer_companies': {
+                'granted': sorted(changes['grant']),
+                'revoked': sorted(changes['revoke']),
+            }})
+        
+        logger.info("Bulk authorization change - Users: %s, Granted: %s, Revoked: %s, Changed by: %s (ID: %s)",
+                    sorted(changes['users']), sorted(changes['grant']), sorted(changes['revoke']),
+                    request.user.username, request.user.id)
+        
+        return Response(result)
+    
     @extend_schema(
         operation_id="my_profile",
         summary="My Profile",
@@ -214,7 +357,7 @@ class HRUserViewSet(viewsets.ModelViewSet):
     )
     @action(detail=False, methods=['get'])
     def me(self, request):
-        serializer = HRUserProfileSerializer(request.user)
+        serializer = HRUserProfileSerializer(load_full_user(request.user))
         return Response(serializer.data)
 
 
@@ -231,22 +374,27 @@ class LoginView(View):
         
         if not email or not password:
             messages.error(request, 'Please provide both email and password.')
-            logger.warning(f"Login attempt with missing credentials - IP: {request.META.get('REMOTE_ADDR', 'Unknown')}")
+            logger.warning("Login attempt with missing credentials - IP: %s", request.META.get('REMOTE_ADDR', 'Unknown'))
             return render(request, 'accounts/login.html')
         
-        user = authenticate(request, username=email, password=password)
+        try:
+            user = authenticate_login(request, email, password)
+        except Throttled:
+            messages.error(request, 'Too many login attempts. Please try again later.')
+            logger.warning("Throttled web login attempt - Email: %s, IP: %s", email, request.META.get('REMOTE_ADDR', 'Unknown'))
+            return render(request, 'accounts/login.html', status=429)
         
-        if user and user.is_active:
+        if user:
             login(request, user)
             messages.success(request, f'Welcome back, {user.username}!')
             
-            logger.info(f"Web login successful - User: {user.username} (ID: {user.id}), Email: {user.email}")
+            logger.info("Web login successful - User: %s (ID: %s), Email: %s", user.username, user.id, user.email)
             
             return redirect('dashboard')
         else:
             messages.error(request, 'Invalid email or password.')
 
-            logger.warning(f"Failed web login attempt - Email: {email}")
+            logger.warning("Failed web login attempt - Email: %s", email)
 
             return render(request, 'accounts/login.html')
 
@@ -260,10 +408,13 @@ class DashboardView(View):
 
 
 def logout_view(request):
-    user_info = f"User: {request.user.username} (ID: {request.user.id})" if request.user.is_authenticated else "Anonymous user"
+    if request.user.is_authenticated:
+        username, user_id = request.user.username, request.user.id
+    else:
+        username, user_id = 'Anonymous user', None
     
     logout(request)
     messages.success(request, 'You have been successfully logged out.')
-    logger.info(f"User logout - {user_info}")
+    logger.info("User logout - User: %s (ID: %s)", username, user_id)
     
     return redirect('login')
\ No newline at end of file
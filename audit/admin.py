@@ -0,0 +1,31 @@
+from django.contrib import admin
+from .models import AuditEvent
+
+
+@admin.register(AuditEvent)
+class AuditEventAdmin(admin.ModelAdmin):
+    list_display = [
+        'id',
+        'occurred_at',
+        'action',
+        'entity_type',
+        'entity_id',
+        'actor_username',
+        'hr_company_id'
+    ]
+    list_filter = [
+        'action',
+        'entity_type',
+        'occurred_at'
+    ]
+    search_fields = [
+        'actor_username',
+        'entity_type'
+    ]
+    ordering = ['-occurred_at']
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,77 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('wisehire')
+
+
+class AuditBuffer:
+    """
+    Per-process buffer of unsaved AuditEvents.
+
+    Events are written with one bulk_create once AUDIT_BUFFER_SIZE of them
+    have collected, or AUDIT_BUFFER_FLUSH_INTERVAL seconds after the oldest
+    one was added, whichever comes first. The time-based flush runs on a
+    daemon thread that is started with the first event.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.lock = threading.Lock()
+        self.events = []
+        self.oldest_at = None
+        self.flusher = None
+
+    def add(self, event):
+        with self.lock:
+            self.events.append(event)
+            if self.oldest_at is None:
+                self.oldest_at = time.monotonic()
+            full = len(self.events) >= settings.AUDIT_BUFFER_SIZE
+            if self.flusher is None:
+                self.flusher = threading.Thread(target=self.run, name='audit-flusher', daemon=True)
+                self.flusher.start()
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Writes out everything buffered so far. Returns the number of events written."""
+        from .models import AuditEvent
+
+        with self.lock:
+            events, self.events, self.oldest_at = self.events, [], None
+        if not events:
+            return 0
+
+        try:
+            AuditEvent.objects.bulk_create(events, batch_size=settings.AUDIT_BUFFER_SIZE)
+        except Exception:
+            logger.exception("Could not write %s audit events", len(events))
+            return 0
+        return len(events)
+
+    def run(self):
+        while True:
+            interval = settings.AUDIT_BUFFER_FLUSH_INTERVAL
+            with self.lock:
+                oldest_at = self.oldest_at
+            wait = interval if oldest_at is None else oldest_at + interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+                continue
+            self.flush()
+            # Connections are per thread; do not keep one open while idle
+            connections.close_all()
+
+
+audit_buffer = AuditBuffer()
+
+# A forked child gets a copy of the parent's events but not its thread
+os.register_at_fork(after_in_child=audit_buffer.reset)
+atexit.register(audit_buffer.flush)
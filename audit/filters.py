@@ -0,0 +1,11 @@
+import django_filters
+from .models import AuditEvent
+
+
+class AuditEventFilter(django_filters.FilterSet):
+    occurred_after = django_filters.IsoDateTimeFilter(field_name='occurred_at', lookup_expr='gte')
+    occurred_before = django_filters.IsoDateTimeFilter(field_name='occurred_at', lookup_expr='lt')
+    
+    class Meta:
+        model = AuditEvent
+        fields = ['action', 'entity_type', 'entity_id', 'actor', 'hr_company']
@@ -0,0 +1,87 @@
+# Generated by Django 5.2.4 on 2026-10-17 12:00
+
+import django.core.serializers.json
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_partitions(apps, schema_editor):
+    from audit.partitions import ensure_partitions
+    ensure_partitions(schema_editor=schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('companies', '0002_customercompany_companies_c_code_071934_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    sql="""
+                        CREATE TABLE "audit_auditevent" (
+                            "id" bigserial NOT NULL,
+                            "occurred_at" timestamp with time zone NOT NULL,
+                            "action" varchar(20) NOT NULL,
+                            "entity_type" varchar(100) NOT NULL,
+                            "entity_id" bigint NOT NULL,
+                            "actor_id" bigint NULL,
+                            "actor_username" varchar(150) NOT NULL,
+                            "hr_company_id" bigint NULL,
+                            "changes" jsonb NOT NULL,
+                            "ip_address" inet NULL,
+                            PRIMARY KEY ("id", "occurred_at")
+                        ) PARTITION BY RANGE ("occurred_at");
+                        CREATE TABLE "audit_auditevent_default" PARTITION OF "audit_auditevent" DEFAULT;
+                    """,
+                    reverse_sql='DROP TABLE "audit_auditevent";',
+                ),
+                migrations.RunPython(create_partitions, migrations.RunPython.noop),
+            ],
+            state_operations=[
+                migrations.CreateModel(
+                    name='AuditEvent',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('occurred_at', models.DateTimeField(default=django.utils.timezone.now)),
+                        ('action', models.CharField(choices=[('create', 'Create'), ('update', 'Update'), ('delete', 'Delete')], max_length=20)),
+                        ('entity_type', models.CharField(max_length=100)),
+                        ('entity_id', models.BigIntegerField()),
+                        ('actor_username', models.CharField(blank=True, max_length=150)),
+                        ('changes', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                        ('ip_address', models.GenericIPAddressField(blank=True, null=True)),
+                        ('actor', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                        ('hr_company', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='companies.hrcompany')),
+                    ],
+                    options={
+                        'verbose_name': 'Audit Event',
+                        'verbose_name_plural': 'Audit Events',
+                        'ordering': ['-occurred_at', '-id'],
+                    },
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='auditevent',
+            index=models.Index(fields=['hr_company', '-occurred_at'], name='audit_audit_hr_comp_ddc8bf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditevent',
+            index=models.Index(fields=['entity_type', 'entity_id', '-occurred_at'], name='audit_audit_entity__0b6e19_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditevent',
+            index=models.Index(fields=['actor', '-occurred_at'], name='audit_audit_actor_i_322ce5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditevent',
+            index=models.Index(fields=['action', '-occurred_at'], name='audit_audit_action_20db54_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class AuditEvent(models.Model):
+    """
+    Who changed what, one row per create/update/delete.
+
+    The table is range-partitioned by month on `occurred_at` (see
+    audit.partitions); its primary key is (id, occurred_at) in the database,
+    `id` alone is still unique. Actor and company are not foreign key
+    constrained so events outlive the rows they mention.
+    """
+    ACTION_CHOICES = [
+        ('create', _('Create')),
+        ('update', _('Update')),
+        ('delete', _('Delete')),
+    ]
+    
+    occurred_at = models.DateTimeField(default=timezone.now)
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES)
+    entity_type = models.CharField(max_length=100)
+    entity_id = models.BigIntegerField()
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    actor_username = models.CharField(max_length=150, blank=True)
+    hr_company = models.ForeignKey(
+        'companies.HRCompany',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    changes = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    ip_address = models.GenericIPAddressField(blank=True, null=True)
+    
+    class Meta:
+        ordering = ['-occurred_at', '-id']
+        verbose_name = _('Audit Event')
+        verbose_name_plural = _('Audit Events')
+        indexes = [
+            models.Index(fields=['hr_company', '-occurred_at']),
+            models.Index(fields=['entity_type', 'entity_id', '-occurred_at']),
+            models.Index(fields=['actor', '-occurred_at']),
+            models.Index(fields=['action', '-occurred_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.actor_username or '-'} {self.action} {self.entity_type}#{self.entity_id}"
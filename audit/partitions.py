@@ -0,0 +1,74 @@
+from datetime import date
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+PARENT_TABLE = 'audit_auditevent'
+# Catches events for months without a partition, so inserts never fail
+DEFAULT_PARTITION = f'{PARENT_TABLE}_default'
+
+
+def month_start(day, offset=0):
+    month = day.month - 1 + offset
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(start):
+    return f'{PARENT_TABLE}_y{start.year}m{start.month:02d}'
+
+
+def ensure_partitions(months_ahead=None, schema_editor=None):
+    """
+    Creates the monthly partitions from the current month up to
+    `months_ahead` months ahead. Existing partitions are left alone, so
+    this is safe to run repeatedly.
+    """
+    if months_ahead is None:
+        months_ahead = settings.AUDIT_PARTITION_MONTHS_AHEAD
+    # Bounds are UTC midnights, independent of the session time zone
+    today = timezone.now().date()
+    cursor_owner = schema_editor.connection if schema_editor else connection
+    created = []
+    with transaction.atomic(using=cursor_owner.alias), cursor_owner.cursor() as cursor:
+        for offset in range(months_ahead + 1):
+            start = month_start(today, offset)
+            name = partition_name(start)
+            cursor.execute('SELECT to_regclass(%s)', [name])
+            if cursor.fetchone()[0] is not None:
+                continue
+            create_partition(cursor, name, start, month_start(today, offset + 1))
+            created.append(name)
+    return created
+
+
+def create_partition(cursor, name, start, end):
+    """
+    Adds the partition for [start, end). Postgres refuses a partition whose
+    range matches rows already in the default partition (events recorded
+    before the month's partition existed), so those are moved into the new
+    table before it is attached.
+    """
+    start, end = f'{start.isoformat()} 00:00+00', f'{end.isoformat()} 00:00+00'
+    bounds = f"FOR VALUES FROM ('{start}') TO ('{end}')"
+    # Keeps events for the range from landing in the default partition
+    # until the new partition takes them
+    cursor.execute(f'LOCK TABLE "{DEFAULT_PARTITION}" IN SHARE ROW EXCLUSIVE MODE')
+    cursor.execute(
+        f'SELECT EXISTS (SELECT 1 FROM "{DEFAULT_PARTITION}" WHERE occurred_at >= %s AND occurred_at < %s)',
+        [start, end]
+    )
+    if not cursor.fetchone()[0]:
+        cursor.execute(f'CREATE TABLE "{name}" PARTITION OF "{PARENT_TABLE}" {bounds}')
+        return
+
+    cursor.execute(f'CREATE TABLE "{name}" (LIKE "{PARENT_TABLE}" INCLUDING DEFAULTS)')
+    cursor.execute(
+        f"""
+        WITH moved AS (
+            DELETE FROM "{DEFAULT_PARTITION}" WHERE occurred_at >= %s AND occurred_at < %s RETURNING *
+        )
+        INSERT INTO "{name}" SELECT * FROM moved
+        """,
+        [start, end]
+    )
+    cursor.execute(f'ALTER TABLE "{PARENT_TABLE}" ATTACH PARTITION "{name}" {bounds}')
@@ -0,0 +1,49 @@
+from django.db import transaction
+from .buffer import audit_buffer
+from .models import AuditEvent
+
+# Never copied into an event
+EXCLUDED_FIELDS = {'password'}
+
+
+def field_values(instance):
+    """Concrete field values of `instance` keyed by attname (foreign keys as ids)."""
+    return {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+        if field.attname not in EXCLUDED_FIELDS
+    }
+
+
+def diff(before, after):
+    """Fields whose value changed, as {field: [old, new]}."""
+    return {
+        name: [before.get(name), value]
+        for name, value in after.items()
+        if before.get(name) != value
+    }
+
+
+def record_event(request, action, instance, changes=None, hr_company_id=None):
+    """
+    Buffers an AuditEvent for `instance`. It is only buffered once the current
+    transaction commits, so rolled back changes leave no trace.
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and not user.is_authenticated:
+        user = None
+    if hr_company_id is None:
+        hr_company_id = getattr(instance, 'hr_company_id', None)
+
+    event = AuditEvent(
+        action=action,
+        entity_type=instance._meta.label_lower,
+        entity_id=instance.pk,
+        actor_id=user.pk if user else None,
+        actor_username=user.username if user else '',
+        hr_company_id=hr_company_id,
+        changes=changes or {},
+        ip_address=request.META.get('REMOTE_ADDR') if request is not None else None,
+    )
+    transaction.on_commit(lambda: audit_buffer.add(event))
+    return event
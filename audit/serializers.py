@@ -0,0 +1,23 @@
+from rest_framework import serializers
+from .models import AuditEvent
+
+
+class AuditEventSerializer(serializers.ModelSerializer):
+    action_display = serializers.CharField(source='get_action_display', read_only=True)
+    
+    class Meta:
+        model = AuditEvent
+        fields = [
+            'id',
+            'occurred_at',
+            'action',
+            'action_display',
+            'entity_type',
+            'entity_id',
+            'actor',
+            'actor_username',
+            'hr_company',
+            'changes',
+            'ip_address',
+        ]
+        read_only_fields = fields
@@ -0,0 +1,13 @@
+import logging
+from celery import shared_task
+from .partitions import ensure_partitions
+
+logger = logging.getLogger('wisehire')
+
+
+@shared_task
+def create_audit_partitions():
+    created = ensure_partitions()
+    if created:
+        logger.info("Created audit partitions: %s", ', '.join(created))
+    return created
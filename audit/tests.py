@@ -0,0 +1,150 @@
+from datetime import timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+from accounts.models import HRUser
+from companies.models import HRCompany, CustomerCompany
+from jobs.models import JobPosting
+from .buffer import audit_buffer
+from .models import AuditEvent
+from .partitions import DEFAULT_PARTITION, ensure_partitions, month_start, partition_name
+
+
+class AuditEventPartitionTest(TestCase):
+    def test_event_is_stored_in_its_month_partition(self):
+        event = AuditEvent.objects.create(action='create', entity_type='jobs.jobposting', entity_id=1)
+        
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT tableoid::regclass::text FROM audit_auditevent WHERE id = %s', [event.id]
+            )
+            table = cursor.fetchone()[0]
+        
+        self.assertEqual(table, partition_name(month_start(event.occurred_at.date())))
+
+    def test_partition_takes_over_events_from_the_default_partition(self):
+        # A month past the partitions created so far, as when the beat task ran late
+        months_ahead = settings.AUDIT_PARTITION_MONTHS_AHEAD + 1
+        start = month_start(timezone.now().date(), months_ahead)
+        occurred_at = timezone.datetime(start.year, start.month, 2, tzinfo=dt_timezone.utc)
+        event = AuditEvent.objects.create(
+            action='create', entity_type='jobs.jobposting', entity_id=1, occurred_at=occurred_at
+        )
+        self.assertEqual(self.partition_of(event), DEFAULT_PARTITION)
+        
+        created = ensure_partitions(months_ahead=months_ahead)
+        
+        self.assertIn(partition_name(start), created)
+        self.assertEqual(self.partition_of(event), partition_name(start))
+        self.assertEqual(AuditEvent.objects.get(pk=event.pk).occurred_at, occurred_at)
+
+    def partition_of(self, event):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT tableoid::regclass::text FROM audit_auditevent WHERE id = %s', [event.id])
+            return cursor.fetchone()[0]
+
+    def test_month_start(self):
+        self.assertEqual(month_start(timezone.datetime(2025, 12, 15).date(), 1), timezone.datetime(2026, 1, 1).date())
+
+
+class AuditRecordingTest(APITestCase):
+    def setUp(self):
+        audit_buffer.flush()
+        self.client = APIClient()
+        self.hr_company = HRCompany.objects.create(name="HR Company", code="HR001")
+        self.customer_company = CustomerCompany.objects.create(name="Customer Company", code="CC001")
+        self.user = HRUser.objects.create_user(
+            username="hruser",
+            email="hr@example.com",
+            password="hrpass123",
+            hr_company=self.hr_company
+        )
+        self.user.authorized_customer_companies.add(self.customer_company)
+        self.job_posting = JobPosting.objects.create(
+            title="Python Developer",
+            code="PY001",
+            description="Backend role",
+            hr_company=self.hr_company,
+            customer_company=self.customer_company,
+            created_by=self.user,
+            closing_date=timezone.now() + timedelta(days=30)
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_update_records_changed_fields_after_commit(self):
+        url = reverse('jobposting-detail', args=[self.job_posting.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(url, {'title': 'Senior Python Developer', 'customer_company': self.customer_company.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        self.assertEqual(audit_buffer.flush(), 1)
+        event = AuditEvent.objects.get(entity_type='jobs.jobposting', entity_id=self.job_posting.id)
+        self.assertEqual(event.action, 'update')
+        self.assertEqual(event.actor_id, self.user.id)
+        self.assertEqual(event.hr_company_id, self.hr_company.id)
+        self.assertEqual(event.changes['title'], ['Python Developer', 'Senior Python Developer'])
+        self.assertNotIn('description', event.changes)
+
+    def test_rolled_back_change_is_not_recorded(self):
+        url = reverse('jobposting-detail', args=[self.job_posting.id])
+        self.client.patch(url, {'title': 'Senior Python Developer', 'customer_company': self.customer_company.id}, format='json')
+        
+        self.assertEqual(audit_buffer.flush(), 0)
+
+    @override_settings(AUDIT_BUFFER_SIZE=3)
+    def test_buffer_flushes_on_size(self):
+        for i in range(2):
+            audit_buffer.add(AuditEvent(action='update', entity_type='jobs.jobposting', entity_id=i))
+        self.assertFalse(AuditEvent.objects.exists())
+        
+        audit_buffer.add(AuditEvent(action='update', entity_type='jobs.jobposting', entity_id=2))
+        self.assertEqual(AuditEvent.objects.count(), 3)
+
+
+class AuditEventViewSetTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.hr_company = HRCompany.objects.create(name="HR Company", code="HR001")
+        self.other_company = HRCompany.objects.create(name="Other HR", code="HR002")
+        self.user = HRUser.objects.create_user(
+            username="hruser",
+            email="hr@example.com",
+            password="hrpass123",
+            hr_company=self.hr_company
+        )
+        now = timezone.now()
+        AuditEvent.objects.bulk_create([
+            AuditEvent(
+                action='update',
+                entity_type='jobs.jobposting',
+                entity_id=i,
+                hr_company=self.hr_company,
+                occurred_at=now - timedelta(minutes=i)
+            )
+            for i in range(5)
+        ] + [
+            AuditEvent(action='delete', entity_type='jobs.jobposting', entity_id=99, hr_company=self.other_company)
+        ])
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('auditevent-list')
+
+    def test_cursor_pagination_is_scoped_to_hr_company(self):
+        seen = []
+        url, params = self.url, {'page_size': 2}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(event['entity_id'] for event in response.data['results'])
+            url, params = response.data['next'], {}
+        
+        self.assertEqual(seen, [0, 1, 2, 3, 4])
+
+    def test_filter_by_entity(self):
+        response = self.client.get(self.url, {'entity_type': 'jobs.jobposting', 'entity_id': 3})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([event['entity_id'] for event in response.data['results']], [3])
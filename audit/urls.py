@@ -0,0 +1,10 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import AuditEventViewSet
+
+router = DefaultRouter()
+router.register(r'events', AuditEventViewSet)
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
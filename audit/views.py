@@ -0,0 +1,46 @@
+from rest_framework import viewsets
+from rest_framework.pagination import CursorPagination
+from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.utils import extend_schema, extend_schema_view
+from common.permissions import IsHRUserPermission
+from .filters import AuditEventFilter
+from .models import AuditEvent
+from .serializers import AuditEventSerializer
+
+
+class AuditEventPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-occurred_at', '-id')
+
+
+@extend_schema_view(
+    list=extend_schema(
+        operation_id="list_audit_events",
+        summary="List Audit Events",
+        description="Searches who changed what, newest first. Narrow with occurred_after/occurred_before "
+                    "so only the matching monthly partitions are read",
+        tags=['Audit']
+    ),
+    retrieve=extend_schema(
+        operation_id="retrieve_audit_event",
+        summary="Retrieve Audit Event",
+        description="Get the details of an Audit Event",
+        tags=['Audit']
+    ),
+)
+class AuditEventViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = AuditEvent.objects.all()
+    serializer_class = AuditEventSerializer
+    permission_classes = [IsHRUserPermission]
+    pagination_class = AuditEventPagination
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = AuditEventFilter
+    
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_superuser:
+            return AuditEvent.objects.all()
+        
+        return AuditEvent.objects.filter(hr_company_id=user.hr_company_id)
@@ -0,0 +1,266 @@
+import re
+from difflib import SequenceMatcher
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, Func, Min, TextField, Value, When
+from django.db.models.functions import Cast, Coalesce, Concat, ExtractYear, Length, Right
+from common.search import normalize_search_text, search_text
+from flows.models import Activity, CandidateFlow
+from .matching import refresh_candidate_vectors, remove_candidate_vectors
+from .models import Candidate, CandidateBlockingKey, Education, WorkExperience
+
+# Phone numbers are compared on their last digits so "+90 555 111 22 33",
+# "0555 111 2233" and "5551112233" share a key; shorter numbers get none
+PHONE_KEY_DIGITS = 10
+PHONE_KEY_MIN_DIGITS = 7
+
+# Share of a pair's score each matching signal contributes
+SCORE_WEIGHTS = {
+    'phone': 0.45,
+    'name': 0.35,
+    'year': 0.1,
+    'email': 0.1,
+}
+# Folded names less similar than this do not count as a name match
+NAME_SIMILARITY_THRESHOLD = 0.85
+
+
+def phone_key(phone):
+    digits = re.sub(r'\D', '', phone or '')
+    return digits[-PHONE_KEY_DIGITS:] if len(digits) >= PHONE_KEY_MIN_DIGITS else ''
+
+
+def blocking_key_querysets(candidates):
+    """
+    {kind: queryset of (candidate id, key)} computing every blocking key in
+    Postgres, to be copied into CandidateBlockingKey with INSERT ... SELECT.
+    """
+    digits = Func(F('phone'), Value(r'\D'), Value(''), Value('g'), function='REGEXP_REPLACE', output_field=TextField())
+    # First education start year: a stand-in for age that tells namesakes apart
+    year = Cast(Min(ExtractYear('educations__start_date')), TextField())
+    return {
+        'phone': candidates.annotate(
+            digits=digits,
+            digit_count=Length('digits')
+        ).filter(digit_count__gte=PHONE_KEY_MIN_DIGITS).values_list('id', Right('digits', PHONE_KEY_DIGITS)),
+        'name': candidates.values('id').annotate(
+            key=Concat(
+                search_text('first_name', 'last_name'),
+                Value('|'),
+                Coalesce(year, Value(''), output_field=TextField()),
+                output_field=TextField()
+            )
+        ).values_list('id', 'key'),
+    }
+
+
+def refresh_blocking_keys(candidate_ids=None):
+    """
+    Recomputes the blocking keys of the given candidates (all of them if
+    None) with one INSERT ... SELECT per kind. Returns the number of keys
+    the candidates have.
+
+    A full run computes every key into a temporary table and then only
+    deletes the keys that went away and inserts the new ones, so readers
+    are never locked out and concurrent per-candidate refreshes only wait
+    on the rows that actually change.
+    """
+    table = CandidateBlockingKey._meta.db_table
+    candidates = Candidate.objects.order_by()
+    with transaction.atomic(), connection.cursor() as cursor:
+        if candidate_ids is None:
+            target = 'blocking_keys_fresh'
+            cursor.execute(f'CREATE TEMPORARY TABLE {target} (kind text, candidate_id bigint, key text)')
+        else:
+            target = table
+            candidate_ids = list(candidate_ids)
+            candidates = candidates.filter(id__in=candidate_ids)
+            CandidateBlockingKey.objects.filter(candidate_id__in=candidate_ids).delete()
+
+        written = 0
+        for kind, queryset in blocking_key_querysets(candidates).items():
+            sql, params = queryset.query.sql_with_params()
+            # A concurrent refresh of the same candidate may have inserted
+            # the key already
+            cursor.execute(
+                f'INSERT INTO {target} (kind, candidate_id, key) SELECT %s, keys.* FROM ({sql}) AS keys '
+                f'ON CONFLICT DO NOTHING',
+                [kind, *params]
+            )
+            written += cursor.rowcount
+
+        if candidate_ids is None:
+            cursor.execute(f'ANALYZE {target}')
+            cursor.execute(f"""
+                DELETE FROM {table} AS keys WHERE NOT EXISTS (
+                    SELECT 1 FROM {target} AS fresh
+                    WHERE fresh.kind = keys.kind AND fresh.key = keys.key AND fresh.candidate_id = keys.candidate_id
+                )
+            """)
+            cursor.execute(
+                f'INSERT INTO {table} (kind, candidate_id, key) SELECT kind, candidate_id, key FROM {target} '
+                f'ON CONFLICT DO NOTHING'
+            )
+            cursor.execute(f'DROP TABLE {target}')
+            cursor.execute(f'ANALYZE {table}')
+    return written
+
+
+def candidate_features(candidate_ids):
+    """The normalized values score_pair() compares, per candidate id."""
+    rows = Candidate.objects.filter(id__in=candidate_ids).order_by().values(
+        'id', 'first_name', 'last_name', 'email', 'phone'
+    ).annotate(year=Min(ExtractYear('educations__start_date')))
+    return {
+        row['id']: {
+            'phone': phone_key(row['phone']),
+            'name': normalize_search_text(f"{row['first_name']} {row['last_name']}"),
+            'year': row['year'],
+            'email': normalize_search_text(row['email'].rsplit('@', 1)[0]),
+        }
+        for row in rows
+    }
+
+
+def score_pair(a, b):
+    """Likelihood in [0, 1] that two candidate_features() belong to the same person."""
+    score = 0
+    if a['phone'] and a['phone'] == b['phone']:
+        score += SCORE_WEIGHTS['phone']
+    similarity = SequenceMatcher(None, a['name'], b['name']).ratio()
+    if similarity >= NAME_SIMILARITY_THRESHOLD:
+        score += SCORE_WEIGHTS['name'] * similarity
+    if a['year'] is not None and a['year'] == b['year']:
+        score += SCORE_WEIGHTS['year']
+    if a['email'] == b['email']:
+        score += SCORE_WEIGHTS['email']
+    return round(score, 3)
+
+
+def find_duplicates(min_score=None, max_block_size=None, batch_size=5000):
+    """
+    Yields (candidate_id, duplicate_id, score) for every pair sharing a
+    blocking key and scoring at least `min_score`, lower id first.
+
+    The pairs come from a self-join of the blocking keys, streamed through a
+    server-side cursor; blocks above `max_block_size` candidates are too
+    unspecific to compare pairwise and are left out.
+    """
+    min_score = settings.CANDIDATE_DEDUP_MIN_SCORE if min_score is None else min_score
+    max_block_size = max_block_size or settings.CANDIDATE_DEDUP_MAX_BLOCK_SIZE
+    table = CandidateBlockingKey._meta.db_table
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH blocks AS (
+                SELECT kind, key FROM {table}
+                GROUP BY kind, key
+                HAVING count(*) BETWEEN 2 AND %s
+            )
+            SELECT a.candidate_id, b.candidate_id
+            FROM blocks
+            JOIN {table} a ON a.kind = blocks.kind AND a.key = blocks.key
+            JOIN {table} b ON b.kind = blocks.kind AND b.key = blocks.key AND b.candidate_id > a.candidate_id
+            GROUP BY a.candidate_id, b.candidate_id
+            """,
+            [max_block_size]
+        )
+        while pairs := cursor.fetchmany(batch_size):
+            features = candidate_features({pk for pair in pairs for pk in pair})
+            for a, b in pairs:
+                if a in features and b in features:
+                    score = score_pair(features[a], features[b])
+                    if score >= min_score:
+                        yield a, b, score
+
+
+def duplicates_of(candidate, min_score=None, max_block_size=None):
+    """{candidate id: score} of the likely duplicates of one candidate."""
+    min_score = settings.CANDIDATE_DEDUP_MIN_SCORE if min_score is None else min_score
+    max_block_size = max_block_size or settings.CANDIDATE_DEDUP_MAX_BLOCK_SIZE
+
+    others = set()
+    for kind, key in candidate.blocking_keys.values_list('kind', 'key'):
+        block = list(CandidateBlockingKey.objects.filter(
+            kind=kind, key=key
+        ).values_list('candidate_id', flat=True)[:max_block_size + 1])
+        if len(block) <= max_block_size:
+            others.update(block)
+    others.discard(candidate.pk)
+    if not others:
+        return {}
+
+    features = candidate_features(others | {candidate.pk})
+    scores = {pk: score_pair(features[candidate.pk], features[pk]) for pk in others if pk in features}
+    return {pk: score for pk, score in scores.items() if score >= min_score}
+
+
+def group_duplicates(pairs):
+    """Merges (a, b, score) pairs into sets of candidate ids that are all one person."""
+    parent = {}
+
+    def root(pk):
+        parent.setdefault(pk, pk)
+        while parent[pk] != pk:
+            parent[pk] = parent[parent[pk]]
+            pk = parent[pk]
+        return pk
+
+    for a, b, score in pairs:
+        parent[root(a)] = root(b)
+    groups = {}
+    for pk in parent:
+        groups.setdefault(root(pk), set()).add(pk)
+    return list(groups.values())
+
+
+def merge_candidates(target, duplicate_ids):
+    """
+    Folds the duplicates into `target` and deletes them. Their educations,
+    work experiences and flows are re-pointed with one UPDATE per table;
+    where target already has a flow for the same job posting, the
+    duplicate's activities move onto that flow instead. Returns the number
+    of rows moved per model.
+    """
+    duplicate_ids = set(duplicate_ids) - {target.pk}
+    with transaction.atomic():
+        # One flow per job posting survives, the target's own if it has one
+        flows = sorted(
+            CandidateFlow.objects.filter(
+                candidate_id__in=duplicate_ids | {target.pk}
+            ).values_list('id', 'job_posting_id', 'candidate_id', 'created_at'),
+            key=lambda flow: (flow[2] != target.pk, flow[3])
+        )
+        kept = {}
+        replaced = {}
+        for flow_id, job_posting_id, candidate_id, created_at in flows:
+            if job_posting_id in kept:
+                replaced[flow_id] = kept[job_posting_id]
+            else:
+                kept[job_posting_id] = flow_id
+        moved_flows = [
+            flow_id for flow_id, job_posting_id, candidate_id, created_at in flows
+            if candidate_id != target.pk and flow_id not in replaced
+        ]
+
+        moved = {'activities': 0}
+        if replaced:
+            moved['activities'] = Activity.objects.filter(candidate_flow_id__in=replaced).update(
+                candidate_flow_id=Case(*[
+                    When(candidate_flow_id=flow_id, then=Value(kept_id))
+                    for flow_id, kept_id in replaced.items()
+                ])
+            )
+            # Through the ORM, so flows.signals adjusts the pipeline counters
+            CandidateFlow.objects.filter(id__in=replaced).delete()
+        moved['candidate_flows'] = CandidateFlow.objects.filter(id__in=moved_flows).update(candidate=target)
+        moved['educations'] = Education.objects.filter(candidate_id__in=duplicate_ids).update(candidate=target)
+        moved['work_experiences'] = WorkExperience.objects.filter(
+            candidate_id__in=duplicate_ids
+        ).update(candidate=target)
+        remove_candidate_vectors(duplicate_ids)
+
+        moved['candidates'] = Candidate.objects.filter(id__in=duplicate_ids).delete()[1].get(Candidate._meta.label, 0)
+        refresh_blocking_keys([target.pk])
+        refresh_candidate_vectors([target.pk])
+    return moved
@@ -0,0 +1,218 @@
+import csv
+import io
+import json
+from itertools import islice
+from django.conf import settings
+from django.contrib.auth.base_user import BaseUserManager
+from django.db import IntegrityError, transaction
+from common.phone import to_e164
+from flows.models import CandidateFlow
+from jobs.counters import apply_pipeline_count_changes
+from .dedup import refresh_blocking_keys
+from .matching import refresh_candidate_vectors
+from .models import Candidate, Education, WorkExperience
+from .serializers import CandidateImportRowSerializer
+
+# CSV columns holding a JSON list of nested rows
+NESTED_COLUMNS = ('educations', 'work_experiences')
+
+
+class CandidateImportError(Exception):
+    pass
+
+
+def detect_format(name, content_type=''):
+    name = (name or '').lower()
+    if name.endswith(('.ndjson', '.jsonl')) or content_type in ('application/x-ndjson', 'application/jsonl'):
+        return 'ndjson'
+    if name.endswith('.csv') or content_type == 'text/csv':
+        return 'csv'
+    raise CandidateImportError('Upload a .csv or .ndjson file.')
+
+
+def iter_rows(stream, file_format):
+    """
+    Yields (row, data, error) for every record of a binary `stream`, reading
+    one line at a time. `row` is the 1-based record number; when a record
+    cannot be parsed `data` is None and `error` says why.
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+        for row, record in enumerate(reader, start=1):
+            data = {
+                key.strip(): value.strip()
+                for key, value in record.items() if key and isinstance(value, str) and value.strip()
+            }
+            try:
+                for column in NESTED_COLUMNS:
+                    if column in data:
+                        data[column] = json.loads(data[column])
+            except ValueError as e:
+                yield row, None, f'Invalid JSON in {column}: {e}'
+                continue
+            yield row, data, None
+        return
+
+    row = 0
+    for line in io.TextIOWrapper(stream, encoding='utf-8-sig'):
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield row, None, f'Invalid JSON: {e}'
+            continue
+        if not isinstance(data, dict):
+            yield row, None, 'Each line must be a JSON object.'
+            continue
+        yield row, data, None
+
+
+def validate_chunk(records):
+    """
+    Validates one chunk of records. Returns (valid, errors, duplicates):
+    valid is a list of (row, data); rows repeating an email seen earlier in
+    the chunk are reported as duplicates instead. Repeats across chunks are
+    caught by write_chunk(), as the earlier chunk is committed by then.
+    """
+    valid = []
+    errors = []
+    duplicates = []
+    seen_emails = set()
+    for row, data, error in records:
+        if error:
+            errors.append({'row': row, 'errors': {'non_field_errors': [error]}})
+            continue
+        serializer = CandidateImportRowSerializer(data=data)
+        if not serializer.is_valid():
+            errors.append({'row': row, 'errors': serializer.errors})
+            continue
+        data = dict(serializer.validated_data)
+        data['email'] = BaseUserManager.normalize_email(data['email'])
+        if data['email'] in seen_emails:
+            duplicates.append({'row': row, 'email': data['email']})
+            continue
+        seen_emails.add(data['email'])
+        valid.append((row, data))
+    return valid, errors, duplicates
+
+
+def write_chunk(valid, job_posting=None, created_by=None):
+    """
+    Creates the candidates of one chunk with a bulk insert per table, in a
+    single transaction. Returns (created, duplicates): the number of
+    candidates created and the rows whose email was already taken.
+    """
+    taken = set(Candidate.objects.filter(
+        email__in=[data['email'] for row, data in valid]
+    ).values_list('email', flat=True))
+
+    candidates = []
+    educations = []
+    work_experiences = []
+    duplicates = []
+    for row, data in valid:
+        if data['email'] in taken:
+            duplicates.append({'row': row, 'email': data['email']})
+            continue
+        candidate = Candidate(**{
+            field: value for field, value in data.items() if field not in NESTED_COLUMNS
+        })
+        # bulk_create skips Candidate.save()
+        candidate.phone_e164 = to_e164(candidate.phone)
+        candidates.append(candidate)
+        educations += [Education(candidate=candidate, **education) for education in data.get('educations', [])]
+        work_experiences += [
+            WorkExperience(candidate=candidate, **work_experience)
+            for work_experience in data.get('work_experiences', [])
+        ]
+
+    with transaction.atomic():
+        Candidate.objects.bulk_create(candidates)
+        Education.objects.bulk_create(educations)
+        WorkExperience.objects.bulk_create(work_experiences)
+        if candidates:
+            refresh_blocking_keys(candidate.id for candidate in candidates)
+            refresh_candidate_vectors(candidate.id for candidate in candidates)
+        if job_posting is not None:
+            CandidateFlow.objects.bulk_create([
+                CandidateFlow(
+                    job_posting=job_posting,
+                    candidate=candidate,
+                    hr_company_id=job_posting.hr_company_id,
+                    created_by=created_by
+                )
+                for candidate in candidates
+            ])
+            # bulk_create sends no signals, so the pipeline counter is adjusted here
+            apply_pipeline_count_changes({(job_posting.id, 'active'): len(candidates)})
+
+    return len(candidates), duplicates
+
+
+def write_rows(valid, job_posting=None, created_by=None):
+    """
+    write_chunk() one row at a time, for a chunk that clashed with a
+    concurrent import: each row's email lookup then sees what the other
+    import committed, and only rows that still clash fail. Returns
+    (created, duplicates, errors).
+    """
+    created = 0
+    duplicates = []
+    errors = []
+    for row, data in valid:
+        try:
+            row_created, row_duplicates = write_chunk([(row, data)], job_posting, created_by)
+        except IntegrityError:
+            errors.append({
+                'row': row,
+                'errors': {'email': ['Could not be imported due to a concurrent import, retry the row.']}
+            })
+            continue
+        created += row_created
+        duplicates += row_duplicates
+    return created, duplicates, errors
+
+
+def import_candidates(records, job_posting=None, created_by=None, chunk_size=None, progress=None):
+    """
+    Imports the (row, data, error) records of iter_rows() chunk by chunk:
+    each chunk is validated, checked against existing emails with one query
+    and written in its own transaction, so memory stays flat however large
+    the file and a failure only loses the chunk at hand.
+
+    Rows whose email already exists, or appeared earlier in the file, are
+    skipped. With `job_posting`, every created candidate gets a flow on it.
+    The report counts every failed and skipped row but only lists the first
+    CANDIDATE_IMPORT_REPORT_LIMIT of each. `progress` is called with the
+    running report after each chunk.
+    """
+    chunk_size = chunk_size or settings.CANDIDATE_IMPORT_CHUNK_SIZE
+    limit = settings.CANDIDATE_IMPORT_REPORT_LIMIT
+    report = {'processed': 0, 'created': 0, 'skipped': 0, 'failed': 0, 'errors': [], 'duplicates': []}
+    records = iter(records)
+    while chunk := list(islice(records, chunk_size)):
+        valid, errors, duplicates = validate_chunk(chunk)
+        try:
+            created, taken = write_chunk(valid, job_posting, created_by)
+        except IntegrityError:
+            # Another import created one of the emails since the lookup and
+            # the chunk was rolled back
+            created, taken, write_errors = write_rows(valid, job_posting, created_by)
+            errors += write_errors
+        duplicates += taken
+
+        report['processed'] += len(chunk)
+        report['created'] += created
+        report['skipped'] += len(duplicates)
+        report['failed'] += len(errors)
+        # Chunks arrive in row order, so these are the first rows of the file
+        report['errors'] += sorted(errors, key=lambda error: error['row'])[:limit - len(report['errors'])]
+        report['duplicates'] += sorted(
+            duplicates, key=lambda duplicate: duplicate['row']
+        )[:limit - len(report['duplicates'])]
+        if progress:
+            progress(report)
+
+    return report
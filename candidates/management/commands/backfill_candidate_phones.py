@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from candidates.models import Candidate
+from common.phone import to_e164
+
+
+class Command(BaseCommand):
+    help = 'Fill Candidate.phone_e164 from the free-text phone numbers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=5000,
+            help='Candidates read and updated per transaction'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        last_id = 0
+        processed = updated = unparsed = 0
+        while True:
+            # Walks the primary key, so every chunk is an index range scan
+            rows = list(
+                Candidate.objects.filter(id__gt=last_id).order_by('id').values_list('id', 'phone', 'phone_e164')[:chunk_size]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            changed = []
+            for pk, phone, phone_e164 in rows:
+                normalized = to_e164(phone)
+                if normalized is None:
+                    unparsed += 1
+                if normalized != phone_e164:
+                    changed.append(Candidate(id=pk, phone_e164=normalized))
+            with transaction.atomic():
+                # Leaves updated_at alone: the candidate itself did not change
+                Candidate.objects.bulk_update(changed, ['phone_e164'])
+
+            processed += len(rows)
+            updated += len(changed)
+            self.stdout.write(f'Processed {processed} candidates, updated {updated}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Backfilled {updated} phone numbers; {unparsed} could not be read as E.164'
+        ))
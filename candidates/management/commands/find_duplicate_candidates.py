@@ -0,0 +1,52 @@
+import time
+from django.core.management.base import BaseCommand
+from candidates.dedup import find_duplicates, group_duplicates, merge_candidates, refresh_blocking_keys
+from candidates.models import Candidate
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the candidate blocking keys and report (or merge) likely duplicate candidates'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-score', type=float,
+            help='Lowest pair score reported (default: CANDIDATE_DEDUP_MIN_SCORE)'
+        )
+        parser.add_argument(
+            '--max-block-size', type=int,
+            help='Skip blocks with more candidates (default: CANDIDATE_DEDUP_MAX_BLOCK_SIZE)'
+        )
+        parser.add_argument(
+            '--skip-refresh', action='store_true',
+            help='Score against the existing blocking keys instead of rebuilding them'
+        )
+        parser.add_argument(
+            '--merge', action='store_true',
+            help='Merge every group of duplicates into its oldest candidate'
+        )
+
+    def handle(self, *args, **options):
+        if not options['skip_refresh']:
+            started = time.perf_counter()
+            written = refresh_blocking_keys()
+            self.stdout.write(f'Rebuilt {written} blocking keys in {time.perf_counter() - started:.1f}s')
+
+        started = time.perf_counter()
+        pairs = list(find_duplicates(options['min_score'], options['max_block_size']))
+        self.stdout.write(f'Found {len(pairs)} likely duplicate pairs in {time.perf_counter() - started:.1f}s')
+        if options['verbosity'] > 1:
+            for a, b, score in pairs:
+                self.stdout.write(f'  {a} ~ {b}: {score}')
+
+        if not options['merge']:
+            return
+
+        started = time.perf_counter()
+        merged = 0
+        for group in group_duplicates(pairs):
+            target = Candidate.objects.filter(id__in=group).order_by('created_at', 'id').first()
+            moved = merge_candidates(target, group)
+            merged += moved['candidates']
+        self.stdout.write(self.style.SUCCESS(
+            f'Merged {merged} duplicates into the oldest candidate of their group in {time.perf_counter() - started:.1f}s'
+        ))
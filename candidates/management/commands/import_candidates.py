@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+from accounts.models import HRUser
+from candidates.importing import CandidateImportError, detect_format, import_candidates, iter_rows
+from jobs.models import JobPosting
+
+
+class Command(BaseCommand):
+    help = 'Import candidates from a CSV or NDJSON file, skipping emails that already exist'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or NDJSON file to import')
+        parser.add_argument(
+            '--format', choices=['csv', 'ndjson'],
+            help='File format (default: from the file extension)'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int,
+            help='Rows written per transaction (default: CANDIDATE_IMPORT_CHUNK_SIZE)'
+        )
+        parser.add_argument('--job-posting', type=int, help='Add every imported candidate to this job posting')
+        parser.add_argument('--user', help='Username recorded as the creator of the job posting flows')
+
+    def handle(self, *args, **options):
+        try:
+            file_format = options['format'] or detect_format(options['path'])
+        except CandidateImportError as e:
+            raise CommandError(str(e))
+
+        job_posting = created_by = None
+        if options['job_posting'] is not None:
+            if not options['user']:
+                raise CommandError('--job-posting requires --user.')
+            try:
+                job_posting = JobPosting.objects.only('id', 'hr_company_id').get(pk=options['job_posting'])
+                created_by = HRUser.objects.get(username=options['user'])
+            except (JobPosting.DoesNotExist, HRUser.DoesNotExist) as e:
+                raise CommandError(str(e))
+
+        def progress(report):
+            self.stdout.write(
+                f"Processed {report['processed']} rows: {report['created']} created, "
+                f"{report['skipped']} skipped, {report['failed']} failed"
+            )
+
+        try:
+            stream = open(options['path'], 'rb')
+        except OSError as e:
+            raise CommandError(str(e))
+        with stream:
+            report = import_candidates(
+                iter_rows(stream, file_format),
+                job_posting=job_posting,
+                created_by=created_by,
+                chunk_size=options['chunk_size'],
+                progress=progress
+            )
+
+        for error in report['errors']:
+            self.stderr.write(f"Row {error['row']}: {dict(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['created']} candidates, skipped {report['skipped']} existing emails, "
+            f"{report['failed']} rows failed"
+        ))
@@ -0,0 +1,40 @@
+import time
+from django.core.management.base import BaseCommand
+from candidates.matching import (
+    invalidate_candidate_matrix, recount_document_counts, refresh_candidate_vectors, refresh_job_posting_vector
+)
+from candidates.models import Candidate
+from jobs.models import JobPosting
+
+
+class Command(BaseCommand):
+    help = 'Recompute every candidate and job posting match vector and the term document counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Candidates recomputed per transaction')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written = 0
+        last_id = 0
+        # Keyset over the primary key, so each chunk is an index range scan
+        while chunk := list(Candidate.objects.filter(id__gt=last_id).order_by('id').values_list(
+            'id', flat=True
+        )[:options['chunk_size']]):
+            written += refresh_candidate_vectors(chunk)
+            last_id = chunk[-1]
+            self.stdout.write(f'Recomputed {written} candidate vectors')
+
+        # Heals counts left behind by deleted candidates
+        recounted = recount_document_counts()
+
+        job_postings = 0
+        for job_posting in JobPosting.objects.only('id', 'title', 'description').iterator():
+            refresh_job_posting_vector(job_posting)
+            job_postings += 1
+
+        invalidate_candidate_matrix()
+        self.stdout.write(self.style.SUCCESS(
+            f'Recomputed {written} candidate and {job_postings} job posting vectors, '
+            f'corrected {recounted} term counts in {time.perf_counter() - started:.1f}s'
+        ))
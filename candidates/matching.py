@@ -0,0 +1,414 @@
+import re
+import threading
+import time
+from array import array
+from collections import Counter, defaultdict
+from datetime import timedelta
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from common.search import normalize_search_text
+from jobs.models import JobPostingMatchVector
+from .models import Candidate, CandidateMatchVector, Education, MatchTerm, WorkExperience
+
+# Letters only, at least two of them, after common.search folding
+TOKEN = re.compile(r'[^\W\d_]{2,}')
+MAX_TERM_LENGTH = MatchTerm._meta.get_field('term').max_length
+
+# Turkish and English words too common to tell profiles apart, folded
+STOP_WORDS = frozenset('''
+    acaba ama ancak artik bazi bile bir biri birkac bu bunu da daha de defa diye en gibi hem
+    hep her hic icin ile ise kadar ki mi mu ne neden nasil olan olarak ve veya ya yani
+    about an and are as at be by for from has have in into is it of on or our that the their
+    this to was we were will with you your
+'''.split())
+
+# How often a job title / position word counts, relative to body text
+TITLE_WEIGHT = 2
+
+
+def terms(text, weight=1):
+    """Counter of the vocabulary words in `text`."""
+    counts = Counter()
+    for token in TOKEN.findall(normalize_search_text(text or '')):
+        if token not in STOP_WORDS and len(token) <= MAX_TERM_LENGTH:
+            counts[token] += weight
+    return counts
+
+
+def term_ids_for(words):
+    """{word: MatchTerm id}, adding the words not in the vocabulary yet."""
+    words = set(words)
+    if not words:
+        return {}
+    MatchTerm.objects.bulk_create([MatchTerm(term=word) for word in words], ignore_conflicts=True)
+    return dict(MatchTerm.objects.filter(term__in=words).values_list('term', 'id'))
+
+
+def candidate_documents(candidate_ids):
+    """{candidate id: term Counter} of their work experiences and educations."""
+    documents = defaultdict(Counter)
+    for candidate_id, position, description in WorkExperience.objects.filter(
+        candidate_id__in=candidate_ids
+    ).values_list('candidate_id', 'position', 'description'):
+        documents[candidate_id].update(terms(position, TITLE_WEIGHT))
+        documents[candidate_id].update(terms(description))
+    for candidate_id, department, degree in Education.objects.filter(
+        candidate_id__in=candidate_ids
+    ).values_list('candidate_id', 'department', 'degree'):
+        documents[candidate_id].update(terms(department))
+        documents[candidate_id].update(terms(degree))
+    return documents
+
+
+def refresh_candidate_vectors(candidate_ids):
+    """
+    Recomputes the vectors of the given candidates and moves the document
+    counts of the terms they gained or lost. Returns the number of vectors
+    written.
+    """
+    candidate_ids = set(Candidate.objects.filter(id__in=list(candidate_ids)).values_list('id', flat=True))
+    if not candidate_ids:
+        return 0
+    documents = candidate_documents(candidate_ids)
+
+    with transaction.atomic():
+        ids = term_ids_for(word for document in documents.values() for word in document)
+        previous = dict(CandidateMatchVector.objects.filter(
+            candidate_id__in=candidate_ids
+        ).values_list('candidate_id', 'term_ids'))
+
+        vectors = {}
+        document_count_changes = Counter()
+        for candidate_id in candidate_ids:
+            document = {ids[word]: count for word, count in documents.get(candidate_id, {}).items()}
+            old = set(previous.get(candidate_id, []))
+            document_count_changes.update({term_id: 1 for term_id in document.keys() - old})
+            document_count_changes.update({term_id: -1 for term_id in old - document.keys()})
+            vectors[candidate_id] = document
+
+        apply_document_count_changes(document_count_changes)
+        upsert_candidate_vectors(vectors)
+    return len(vectors)
+
+
+def remove_candidate_vectors(candidate_ids):
+    """Deletes the vectors of candidates about to be deleted, and their document counts."""
+    with transaction.atomic():
+        vectors = CandidateMatchVector.objects.filter(candidate_id__in=list(candidate_ids))
+        document_count_changes = Counter()
+        for term_ids in vectors.values_list('term_ids', flat=True):
+            document_count_changes.subtract(term_ids)
+        apply_document_count_changes(document_count_changes)
+        vectors.delete()
+
+
+def upsert_candidate_vectors(vectors):
+    """
+    Writes {candidate id: {term id: count}} with one INSERT ... ON CONFLICT.
+    The arrays travel as text literals unnested server-side; bulk_create()
+    would prepare every array element one by one in Python.
+    """
+    table = CandidateMatchVector._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} (candidate_id, term_ids, term_counts, updated_at)
+            SELECT vectors.candidate_id, vectors.term_ids::integer[], vectors.term_counts::integer[], %s
+            FROM unnest(%s::integer[], %s::text[], %s::text[]) AS vectors(candidate_id, term_ids, term_counts)
+            ON CONFLICT (candidate_id) DO UPDATE SET
+                term_ids = EXCLUDED.term_ids, term_counts = EXCLUDED.term_counts, updated_at = EXCLUDED.updated_at
+            """,
+            [
+                timezone.now(),
+                list(vectors),
+                ['{%s}' % ','.join(map(str, document)) for document in vectors.values()],
+                ['{%s}' % ','.join(map(str, document.values())) for document in vectors.values()],
+            ]
+        )
+
+
+def apply_document_count_changes(changes):
+    """Applies {term id: delta}, one UPDATE per distinct delta."""
+    by_delta = defaultdict(list)
+    for term_id, delta in changes.items():
+        if delta:
+            by_delta[delta].append(term_id)
+    for delta, term_ids in by_delta.items():
+        # Never below zero; whatever drift remains is fixed by a rebuild
+        MatchTerm.objects.filter(id__in=term_ids).update(document_count=Greatest(F('document_count') + delta, 0))
+
+
+def recount_document_counts():
+    """Recounts every term's document count from the candidate vectors."""
+    terms_table = MatchTerm._meta.db_table
+    vectors_table = CandidateMatchVector._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            UPDATE {terms_table} AS terms SET document_count = COALESCE(counts.n, 0)
+            FROM {terms_table} AS all_terms
+            LEFT JOIN (
+                SELECT term_id, count(*) AS n FROM {vectors_table}, unnest(term_ids) AS term_id GROUP BY term_id
+            ) AS counts ON counts.term_id = all_terms.id
+            WHERE terms.id = all_terms.id AND terms.document_count IS DISTINCT FROM COALESCE(counts.n, 0)
+        """)
+        return cursor.rowcount
+
+
+def refresh_job_posting_vector(job_posting):
+    """Recomputes the vector of one job posting from its title and description."""
+    document = terms(job_posting.title, TITLE_WEIGHT) + terms(job_posting.description)
+    ids = term_ids_for(document)
+    vector, created = JobPostingMatchVector.objects.update_or_create(
+        job_posting=job_posting,
+        defaults={
+            'term_ids': [ids[word] for word in document],
+            'term_counts': list(document.values()),
+        }
+    )
+    return vector
+
+
+def inverse_document_frequencies():
+    """Smoothed IDF per term id, as a dense array indexed by id."""
+    total = CandidateMatchVector.objects.count()
+    rows = list(MatchTerm.objects.values_list('id', 'document_count'))
+    idf = np.ones(max((term_id for term_id, count in rows), default=0) + 1, dtype=np.float32)
+    if rows:
+        term_ids, counts = np.array(rows, dtype=np.int64).T
+        idf[term_ids] = np.log((1 + total) / (1 + counts)) + 1
+    return idf
+
+
+def tfidf(term_ids, counts, idf):
+    """Sublinear tf x idf weights; terms newer than `idf` weigh as if unseen."""
+    term_ids = np.asarray(term_ids, dtype=np.int32)
+    known = term_ids < len(idf)
+    weights = 1 + np.log(np.asarray(counts, dtype=np.float32))
+    weights *= np.where(known, idf[np.where(known, term_ids, 0)], idf.max(initial=1))
+    return term_ids, weights
+
+
+class CandidateMatrix:
+    """
+    Every candidate vector as one CSR-like matrix of L2-normalized TF-IDF
+    weights: entry k belongs to row rows[k] and term indices[k], and row r
+    is candidate candidate_ids[r]. Scoring a posting is a single batch of
+    dot products over the entries.
+
+    Changed vectors are appended as new rows and the rows they replace are
+    marked dead in `live`, so keeping up with edits never re-reads the whole
+    table. The entries live in buffers with room to spare that each synced()
+    matrix extends in place; older matrices only see the part that was
+    filled when they were made. compacted() drops the dead rows.
+
+    A vector's updated_at is taken before its transaction commits, so syncs
+    re-read the last CANDIDATE_MATCHING_SYNC_OVERLAP_SECONDS before synced_at
+    too. `applied` holds the updated_at of the vectors already read from that
+    window, so re-reading them does not replace their rows again.
+    """
+
+    def __init__(self, buffers, size, live, idf, synced_at, applied, built=None, width=0):
+        self.buffers = buffers
+        self.size = size
+        self.live = live
+        candidate_ids, rows, indices, weights = buffers
+        self.candidate_ids = candidate_ids[:len(live)]
+        self.rows = rows[:size]
+        self.indices = indices[:size]
+        self.weights = weights[:size]
+        self.idf = idf
+        self.synced_at = synced_at
+        self.applied = applied
+        self.dead_rows = len(live) - int(np.count_nonzero(live))
+        self.built = time.monotonic() if built is None else built
+        # Vectors written while the matrix was read may use terms newer than idf
+        self.width = max(width, len(idf), int(self.indices.max(initial=-1)) + 1)
+
+    @staticmethod
+    def entries(vectors, idf, first_row=0):
+        """(candidate_ids, rows, indices, weights) arrays for (candidate id, term ids, counts) rows."""
+        # Typed arrays hold 4 or 8 bytes per number where lists hold objects
+        candidate_ids, lengths, term_ids, counts = array('q'), array('i'), array('i'), array('i')
+        for candidate_id, row_term_ids, row_counts in vectors:
+            candidate_ids.append(candidate_id)
+            lengths.append(len(row_term_ids))
+            term_ids.extend(row_term_ids)
+            counts.extend(row_counts)
+        rows = np.repeat(np.arange(len(candidate_ids), dtype=np.int32), np.frombuffer(lengths, dtype=np.int32))
+        indices, weights = tfidf(np.frombuffer(term_ids, dtype=np.int32), np.frombuffer(counts, dtype=np.int32), idf)
+        norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=len(candidate_ids)))
+        weights /= norms.astype(np.float32)[rows]
+        rows += first_row
+        return np.frombuffer(candidate_ids, dtype=np.int64), rows, indices, weights
+
+    @staticmethod
+    def appended(buffer, used, values):
+        """`buffer` with `values` written after its first `used` items, moved to one twice as large when full."""
+        end = used + len(values)
+        if end > len(buffer):
+            grown = np.empty(max(end, 2 * len(buffer)), dtype=buffer.dtype)
+            grown[:used] = buffer[:used]
+            buffer = grown
+        buffer[used:end] = values
+        return buffer
+
+    @staticmethod
+    def overlap_start(synced_at):
+        return synced_at - timedelta(seconds=settings.CANDIDATE_MATCHING_SYNC_OVERLAP_SECONDS)
+
+    @classmethod
+    def build(cls):
+        synced_at = timezone.now()
+        overlap_start = cls.overlap_start(synced_at)
+        idf = inverse_document_frequencies()
+        applied = {}
+
+        def vectors():
+            for candidate_id, term_ids, counts, updated_at in CandidateMatchVector.objects.order_by().values_list(
+                'candidate_id', 'term_ids', 'term_counts', 'updated_at'
+            ).iterator(chunk_size=10000):
+                if updated_at > overlap_start:
+                    applied[candidate_id] = updated_at
+                yield candidate_id, term_ids, counts
+
+        buffers = cls.entries(vectors(), idf)
+        return cls(
+            buffers, len(buffers[1]), np.ones(len(buffers[0]), dtype=bool), idf=idf, synced_at=synced_at,
+            applied=applied
+        )
+
+    def synced(self):
+        """
+        This matrix with the vectors changed since it was built, or self if
+        there are none. Writes to the shared buffers, so only call it on the
+        latest matrix.
+        """
+        synced_at = timezone.now()
+        overlap_start = self.overlap_start(synced_at)
+        read = list(CandidateMatchVector.objects.filter(updated_at__gt=self.overlap_start(self.synced_at)).values_list(
+            'candidate_id', 'term_ids', 'term_counts', 'updated_at'
+        ))
+        changed = [
+            (candidate_id, term_ids, counts) for candidate_id, term_ids, counts, updated_at in read
+            if self.applied.get(candidate_id) != updated_at
+        ]
+        applied = {
+            candidate_id: updated_at for candidate_id, term_ids, counts, updated_at in read
+            if updated_at > overlap_start
+        }
+        if not changed:
+            return self
+
+        idf = inverse_document_frequencies()
+        replaced = np.isin(self.candidate_ids, [candidate_id for candidate_id, term_ids, counts in changed])
+        entries = self.entries(changed, idf, first_row=len(self.candidate_ids))
+        used = (len(self.candidate_ids), self.size, self.size, self.size)
+        return CandidateMatrix(
+            tuple(self.appended(*buffer) for buffer in zip(self.buffers, used, entries)),
+            self.size + len(entries[1]),
+            np.concatenate([self.live & ~replaced, np.ones(len(entries[0]), dtype=bool)]),
+            idf=idf,
+            synced_at=synced_at,
+            applied=applied,
+            built=self.built,
+            width=self.width
+        )
+
+    def compacted(self):
+        """This matrix without its dead rows."""
+        kept = self.live[self.rows]
+        # New number of every live row
+        renumbered = (np.cumsum(self.live) - 1).astype(np.int32)
+        buffers = (
+            self.candidate_ids[self.live],
+            renumbered[self.rows[kept]],
+            self.indices[kept],
+            self.weights[kept],
+        )
+        return CandidateMatrix(
+            buffers, len(buffers[1]), np.ones(len(buffers[0]), dtype=bool), idf=self.idf,
+            synced_at=self.synced_at, applied=self.applied, built=self.built, width=self.width
+        )
+
+    def scores(self, term_ids, counts):
+        """Cosine similarity of every row to the (term ids, counts) query; 0 for dead rows."""
+        query = np.zeros(max(self.width, max(term_ids, default=0) + 1), dtype=np.float32)
+        if term_ids:
+            term_ids, weights = tfidf(term_ids, counts, self.idf)
+            query[term_ids] = weights / np.linalg.norm(weights)
+        scores = np.bincount(
+            self.rows, weights=self.weights * query[self.indices], minlength=len(self.candidate_ids)
+        )
+        scores[~self.live] = 0
+        return scores
+
+
+_matrix = None
+_matrix_lock = threading.Lock()
+
+
+def candidate_matrix():
+    """
+    The process-wide CandidateMatrix, brought up to date with the vectors
+    changed since the last call and compacted once more than
+    CANDIDATE_MATCHING_MAX_STALE_ROWS of its rows are dead. Rebuilt from
+    scratch every CANDIDATE_MATCHING_REBUILD_SECONDS, which also drops
+    deleted candidates and refreshes the IDF of old rows.
+    """
+    global _matrix
+    with _matrix_lock:
+        matrix = _matrix
+        if matrix is None or time.monotonic() - matrix.built > settings.CANDIDATE_MATCHING_REBUILD_SECONDS:
+            matrix = CandidateMatrix.build()
+        else:
+            matrix = matrix.synced()
+            if matrix.dead_rows > settings.CANDIDATE_MATCHING_MAX_STALE_ROWS:
+                matrix = matrix.compacted()
+        _matrix = matrix
+    return matrix
+
+
+def invalidate_candidate_matrix():
+    global _matrix
+    with _matrix_lock:
+        _matrix = None
+
+
+def match_candidates(job_posting, limit, candidate_ids=None):
+    """
+    [(candidate id, score)] of the `limit` candidates closest to the posting,
+    best first, leaving out candidates with nothing in common. With
+    `candidate_ids`, only those candidates are ranked.
+
+    Deleted candidates keep their rows until the matrix is rebuilt, so each
+    round of top rows is checked against the candidates table and the rows
+    of deleted ones are passed over for the next best.
+    """
+    try:
+        vector = job_posting.match_vector
+    except JobPostingMatchVector.DoesNotExist:
+        vector = refresh_job_posting_vector(job_posting)
+
+    matrix = candidate_matrix()
+    scores = matrix.scores(vector.term_ids, vector.term_counts)
+    if candidate_ids is not None:
+        scores[~np.isin(matrix.candidate_ids, np.fromiter(candidate_ids, dtype=np.int64))] = 0
+
+    matches = []
+    while wanted := min(limit - len(matches), np.count_nonzero(scores)):
+        top = np.argpartition(-scores, wanted - 1)[:wanted]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        existing = set(Candidate.objects.filter(
+            id__in=matrix.candidate_ids[top].tolist()
+        ).values_list('id', flat=True))
+        matches += [
+            (candidate_id, round(float(scores[row]), 4))
+            for row, candidate_id in zip(top, matrix.candidate_ids[top].tolist()) if candidate_id in existing
+        ]
+        # Every later round scores lower, so matches stays best first
+        scores[top] = 0
+    return matches
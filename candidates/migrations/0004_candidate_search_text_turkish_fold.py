@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:15
+
+import common.search
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0003_candidate_search_text'),
+    ]
+
+    operations = [
+        # Generated columns cannot be altered in place
+        migrations.RemoveIndex(
+            model_name='candidate',
+            name='candidates_search_trgm',
+        ),
+        migrations.RemoveField(
+            model_name='candidate',
+            name='search_text',
+        ),
+        migrations.AddField(
+            model_name='candidate',
+            name='search_text',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Lower(models.Func(common.search.NormalizeNFC(django.db.models.functions.text.Concat(models.F('first_name'), models.Value(' '), models.F('last_name'), models.Value(' '), models.F('email'), models.Value(' '), models.F('phone'), output_field=models.TextField())), models.Value('İIıŞşĞğÇçÖöÜüÂâÎîÛû'), models.Value('iiissggccoouuaaiiuu'), function='TRANSLATE', output_field=models.TextField())), output_field=models.TextField()),
+        ),
+        migrations.AddIndex(
+            model_name='candidate',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_text'], name='candidates_search_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
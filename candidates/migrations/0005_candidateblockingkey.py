@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0004_candidate_search_text_turkish_fold'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CandidateBlockingKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('phone', 'Phone'), ('name', 'Name and year')], max_length=10)),
+                ('key', models.CharField(max_length=255)),
+                ('candidate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='blocking_keys', to='candidates.candidate')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'key', 'candidate'], name='candidates__kind_68804f_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:49
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0005_candidateblockingkey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='candidate',
+            name='phone_e164',
+            field=models.CharField(blank=True, editable=False, max_length=16, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='candidate',
+            index=models.Index(fields=['phone_e164'], name='candidates__phone_e_7a9094_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='candidate',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Reverse('phone_e164'), name='text_pattern_ops'), name='candidates_phone_e164_suffix'),
+        ),
+    ]
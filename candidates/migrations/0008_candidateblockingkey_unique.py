@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0007_matchterm_candidatematchvector'),
+    ]
+
+    operations = [
+        # Keys duplicated by concurrent refreshes; derived data, so one copy is enough
+        migrations.RunSQL(
+            sql="""
+                DELETE FROM candidates_candidateblockingkey AS duplicate
+                USING candidates_candidateblockingkey AS kept
+                WHERE duplicate.kind = kept.kind AND duplicate.key = kept.key
+                    AND duplicate.candidate_id = kept.candidate_id AND duplicate.id > kept.id
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RemoveIndex(
+            model_name='candidateblockingkey',
+            name='candidates__kind_68804f_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='candidateblockingkey',
+            constraint=models.UniqueConstraint(fields=('kind', 'key', 'candidate'), name='candidates_blocking_key_unique'),
+        ),
+    ]
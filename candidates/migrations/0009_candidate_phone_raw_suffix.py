@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:29
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('candidates', '0008_candidateblockingkey_unique'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='candidate',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Reverse(models.Func(models.F('phone'), models.Value('\\D'), models.Value(''), models.Value('g'), function='REGEXP_REPLACE', output_field=models.CharField())), name='text_pattern_ops'), condition=models.Q(('phone_e164__isnull', True)), name='candidates_phone_raw_suffix'),
+        ),
+    ]
@@ -1,14 +1,28 @@
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Reverse
+from common.phone import phone_digits, to_e164
+from common.search import search_text
 
 class Candidate(models.Model):
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
     email = models.EmailField(unique=True)
     phone = models.CharField(max_length=20)
+    # `phone` as E.164 ("+905551112233"), None if it is not a full number.
+    # Kept in sync by save(); filter through common.phone.phone_lookup('phone', ...)
+    phone_e164 = models.CharField(max_length=16, blank=True, null=True, editable=False)
     address = models.TextField(blank=True, null=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Lower-cased "first last email phone", queried through common.search.contains_search_text
+    search_text = models.GeneratedField(
+        expression=search_text('first_name', 'last_name', 'email', 'phone'),
+        output_field=models.TextField(),
+        db_persist=True
+    )
     
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
@@ -17,6 +31,13 @@ class Candidate(models.Model):
     def full_name(self):
         return f"{self.first_name} {self.last_name}"
     
+    def save(self, *args, **kwargs):
+        self.phone_e164 = to_e164(self.phone)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'phone' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'phone_e164'}
+        super().save(*args, **kwargs)
+    
     class Meta:
         ordering = ['-created_at']
         indexes = [
@@ -26,8 +47,21 @@ class Candidate(models.Model):
             models.Index(fields=['first_name']),
             models.Index(fields=['last_name']),
             models.Index(fields=['phone']),
+            models.Index(fields=['phone_e164']),
+            # Suffix lookups: LIKE 'reversed digits%' on the reversed number
+            models.Index(
+                OpClass(Reverse('phone_e164'), name='text_pattern_ops'),
+                name='candidates_phone_e164_suffix'
+            ),
+            # The same for the phones that are not a full number
+            models.Index(
+                OpClass(Reverse(phone_digits('phone')), name='text_pattern_ops'),
+                condition=models.Q(phone_e164__isnull=True),
+                name='candidates_phone_raw_suffix'
+            ),
             models.Index(fields=['first_name', 'last_name']), 
             models.Index(fields=['-created_at']), 
+            GinIndex(fields=['search_text'], name='candidates_search_trgm', opclasses=['gin_trgm_ops']),
         ]
 
 class Education(models.Model):
@@ -90,3 +124,65 @@ class WorkExperience(models.Model):
             models.Index(fields=['candidate', 'start_date']), 
             models.Index(fields=['-start_date']), 
         ]
+
+
+class CandidateBlockingKey(models.Model):
+    """
+    Duplicate detection only compares candidates sharing a (kind, key) pair.
+    Maintained by candidates.dedup.refresh_blocking_keys().
+    """
+    KIND_CHOICES = [
+        ('phone', 'Phone'),
+        ('name', 'Name and year'),
+    ]
+    
+    candidate = models.ForeignKey(
+        Candidate,
+        on_delete=models.CASCADE,
+        related_name='blocking_keys'
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    key = models.CharField(max_length=255)
+    
+    def __str__(self):
+        return f"{self.kind}: {self.key}"
+    
+    class Meta:
+        constraints = [
+            # Also the index the blocks are looked up with
+            models.UniqueConstraint(fields=['kind', 'key', 'candidate'], name='candidates_blocking_key_unique'),
+        ]
+
+
+class MatchTerm(models.Model):
+    """
+    A word of the candidate matching vocabulary and the number of candidate
+    profiles containing it, for its inverse document frequency.
+    """
+    term = models.CharField(max_length=100, unique=True)
+    document_count = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return self.term
+
+
+class CandidateMatchVector(models.Model):
+    """
+    Sparse term counts of a candidate's work experience and education text:
+    term_counts[i] occurrences of MatchTerm term_ids[i]. Maintained by
+    candidates.matching.refresh_candidate_vectors().
+    """
+    candidate = models.OneToOneField(
+        Candidate,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='match_vector'
+    )
+    term_ids = ArrayField(models.IntegerField(), default=list)
+    term_counts = ArrayField(models.PositiveIntegerField(), default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at']),
+        ]
@@ -0,0 +1,24 @@
+from django.db.models import Exists, OuterRef
+from flows.models import CandidateFlow
+from .models import Education, WorkExperience
+
+
+def in_scope(scope, candidate_ref=OuterRef('pk')):
+    """
+    Exists() over the candidate's flows inside the user's scope. A correlated
+    subquery instead of a join, so a candidate with many flows still yields
+    one row and no DISTINCT is needed.
+    """
+    return Exists(CandidateFlow.objects.filter(
+        candidate_id=candidate_ref,
+        hr_company_id=scope.hr_company_id,
+        job_posting__customer_company_id__in=scope.customer_company_ids
+    ))
+
+
+def worked_at(company, candidate_ref=OuterRef('pk')):
+    return Exists(WorkExperience.objects.filter(candidate_id=candidate_ref, company_name__icontains=company))
+
+
+def studied_at(school, candidate_ref=OuterRef('pk')):
+    return Exists(Education.objects.filter(candidate_id=candidate_ref, school_name__icontains=school))
@@ -1,5 +1,10 @@
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
 from rest_framework import serializers
+from jobs.models import JobPosting
 from .models import Candidate, Education, WorkExperience
+from .scoping import in_scope
 
 class EducationSerializer(serializers.ModelSerializer):
     class Meta:
@@ -27,28 +32,174 @@ class CandidateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Candidate
         fields = [
-            'id', 'first_name', 'last_name', 'email', 'phone', 'address',
+            'id', 'first_name', 'last_name', 'email', 'phone', 'phone_e164', 'address',
             'is_active', 'created_at', 'updated_at', 'full_name',
             'educations', 'work_experiences'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at', 'full_name']
+        read_only_fields = ['id', 'phone_e164', 'created_at', 'updated_at', 'full_name']
+    
+    @staticmethod
+    def eager_loading(queryset, prefix=''):
+        """Loads what this serializer reads for the candidates at `prefix` of `queryset`."""
+        return queryset.prefetch_related(
+            Prefetch(f'{prefix}educations', queryset=Education.objects.all()),
+            Prefetch(f'{prefix}work_experiences', queryset=WorkExperience.objects.all())
+        )
+
+class EducationImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Education
+        fields = ['school_name', 'department', 'degree', 'start_date', 'end_date', 'is_current', 'gpa']
+
+class WorkExperienceImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WorkExperience
+        fields = ['company_name', 'position', 'description', 'start_date', 'end_date', 'is_current']
+
+class CandidateImportRowSerializer(serializers.ModelSerializer):
+    """
+    One row of a bulk candidate import.
+
+    Email uniqueness is checked for a whole chunk of rows at once by
+    candidates.importing, so the per-row query validator is left out.
+    """
+    email = serializers.EmailField(max_length=254)
+    educations = EducationImportSerializer(many=True, required=False)
+    work_experiences = WorkExperienceImportSerializer(many=True, required=False)
+    
+    class Meta:
+        model = Candidate
+        fields = [
+            'first_name', 'last_name', 'email', 'phone', 'address', 'is_active',
+            'educations', 'work_experiences'
+        ]
+
+class CandidateImportSerializer(serializers.Serializer):
+    """A CSV or NDJSON upload of CandidateImportRowSerializer rows."""
+    file = serializers.FileField()
+    job_posting = serializers.IntegerField(required=False)
+    
+    def validate(self, attrs):
+        requester = self.context['request'].user
+        job_posting_id = attrs.get('job_posting')
+        if job_posting_id is None:
+            # Candidates are only visible through their flows
+            if not requester.is_superuser:
+                raise serializers.ValidationError({'job_posting': ['Imported candidates must be added to a job posting.']})
+            return attrs
+        
+        queryset = JobPosting.objects.filter(pk=job_posting_id)
+        if not requester.is_superuser:
+            scope = requester.authorization_scope
+            queryset = queryset.filter(
+                hr_company_id=scope.hr_company_id,
+                customer_company_id__in=scope.customer_company_ids
+            )
+        attrs['job_posting'] = queryset.only('id', 'hr_company_id').first()
+        if attrs['job_posting'] is None:
+            raise serializers.ValidationError({'job_posting': [f'Invalid pk "{job_posting_id}" - object does not exist.']})
+        return attrs
+
+class CandidateMergeSerializer(serializers.Serializer):
+    """Candidates folded into the one in the URL."""
+    duplicates = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+    
+    def validate_duplicates(self, value):
+        candidate = self.context['candidate']
+        ids = set(value) - {candidate.pk}
+        if not ids:
+            raise serializers.ValidationError('A candidate cannot be merged into itself.')
+        
+        queryset = Candidate.objects.filter(id__in=ids)
+        requester = self.context['request'].user
+        if not requester.is_superuser:
+            queryset = queryset.filter(in_scope(requester.authorization_scope))
+        unknown = ids - set(queryset.values_list('id', flat=True))
+        if unknown:
+            raise serializers.ValidationError([f'Invalid pk "{pk}" - object does not exist.' for pk in sorted(unknown)])
+        return sorted(ids)
+
+class EducationNestedSerializer(serializers.ModelSerializer):
+    """An education inside CandidateCreateSerializer; `id` picks the row an item updates."""
+    id = serializers.IntegerField(required=False)
+    
+    class Meta:
+        model = Education
+        fields = ['id'] + EducationImportSerializer.Meta.fields + ['created_at', 'updated_at']
+        read_only_fields = ['created_at', 'updated_at']
+
+class WorkExperienceNestedSerializer(serializers.ModelSerializer):
+    """A work experience inside CandidateCreateSerializer; `id` picks the row an item updates."""
+    id = serializers.IntegerField(required=False)
+    
+    class Meta:
+        model = WorkExperience
+        fields = ['id'] + WorkExperienceImportSerializer.Meta.fields + ['created_at', 'updated_at']
+        read_only_fields = ['created_at', 'updated_at']
 
 class CandidateCreateSerializer(serializers.ModelSerializer):
-    educations = EducationSerializer(many=True, required=False)
-    work_experiences = WorkExperienceSerializer(many=True, required=False)
+    """
+    A non-empty educations/work_experiences list is the candidate's complete
+    list: items with an id update that row, items without one are created
+    and rows left out are deleted. Omitted and empty lists are left
+    untouched, as before lists were diffed; naming a list in `clear` deletes
+    its rows. The response reports the rows created, updated and deleted
+    per list in `nested_changes`.
+    """
+    educations = EducationNestedSerializer(many=True, required=False)
+    work_experiences = WorkExperienceNestedSerializer(many=True, required=False)
+    clear = serializers.MultipleChoiceField(
+        choices=['educations', 'work_experiences'], required=False, write_only=True
+    )
+    nested_changes = serializers.SerializerMethodField()
     
     class Meta:
         model = Candidate
         fields = [
             'first_name', 'last_name', 'email', 'phone', 'address',
-            'educations', 'work_experiences'
+            'educations', 'work_experiences', 'clear', 'nested_changes'
         ]
     
+    def get_nested_changes(self, obj):
+        return getattr(self, 'nested_changes', {})
+    
+    def validate(self, attrs):
+        both = [related_name for related_name in attrs.get('clear', ()) if attrs.get(related_name)]
+        if both:
+            raise serializers.ValidationError({
+                related_name: ['Send either the list or clear it, not both.'] for related_name in both
+            })
+        return attrs
+    
+    def validate_nested_ids(self, related_name, items):
+        ids = [item['id'] for item in items if 'id' in item]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError('Each id can only be listed once.')
+        known = set()
+        if ids and self.instance is not None:
+            known = set(getattr(self.instance, related_name).filter(id__in=ids).values_list('id', flat=True))
+        unknown = [pk for pk in ids if pk not in known]
+        if unknown:
+            raise serializers.ValidationError([f'Invalid pk "{pk}" - object does not exist.' for pk in unknown])
+        return items
+    
+    def validate_educations(self, value):
+        return self.validate_nested_ids('educations', value)
+    
+    def validate_work_experiences(self, value):
+        return self.validate_nested_ids('work_experiences', value)
+    
     def create(self, validated_data):
+        validated_data.pop('clear', None)
         educations_data = validated_data.pop('educations', [])
         work_experiences_data = validated_data.pop('work_experiences', [])
         
         candidate = Candidate.objects.create(**validated_data)
+        self.nested_changes = {
+            related_name: {'created': len(items), 'updated': 0, 'deleted': 0}
+            for related_name, items in [('educations', educations_data), ('work_experiences', work_experiences_data)]
+            if items
+        }
         
         for education_data in educations_data:
             Education.objects.create(candidate=candidate, **education_data)
@@ -59,21 +210,61 @@ class CandidateCreateSerializer(serializers.ModelSerializer):
         return candidate
     
     def update(self, instance, validated_data):
-        educations_data = validated_data.pop('educations', [])
-        work_experiences_data = validated_data.pop('work_experiences', [])
+        clear = validated_data.pop('clear', set())
+        nested = {
+            related_name: [] if related_name in clear else validated_data.pop(related_name, None)
+            for related_name in ('educations', 'work_experiences')
+        }
         
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
+        # Rows created/updated/deleted per nested list, returned in the response
+        self.nested_changes = {}
+        with transaction.atomic():
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save()
+            
+            for related_name, items in nested.items():
+                if items or related_name in clear:
+                    self.nested_changes[related_name] = self.sync_nested(instance, related_name, items)
+        
+        return instance
+    
+    def sync_nested(self, instance, related_name, items):
+        """
+        Brings the rows of `instance.<related_name>` in line with `items`,
+        writing only the difference: one bulk_update for the rows whose
+        values changed, one bulk_create and one DELETE.
+        """
+        manager = getattr(instance, related_name)
+        model = manager.model
+        existing = {row.id: row for row in manager.all()}
         
-        if educations_data:
-            instance.educations.all().delete()
-            for education_data in educations_data:
-                Education.objects.create(candidate=instance, **education_data)
+        created = []
+        updated = []
+        changed_fields = set()
+        for item in items:
+            item = dict(item)
+            pk = item.pop('id', None)
+            if pk is None:
+                created.append(model(candidate=instance, **item))
+                continue
+            row = existing.pop(pk)
+            fields = [field for field, value in item.items() if getattr(row, field) != value]
+            if fields:
+                for field in fields:
+                    setattr(row, field, item[field])
+                updated.append(row)
+                changed_fields.update(fields)
         
-        if work_experiences_data:
-            instance.work_experiences.all().delete()
-            for work_experience_data in work_experiences_data:
-                WorkExperience.objects.create(candidate=instance, **work_experience_data)
+        if updated:
+            # bulk_update bypasses auto_now
+            now = timezone.now()
+            for row in updated:
+                row.updated_at = now
+            model.objects.bulk_update(updated, sorted(changed_fields) + ['updated_at'])
+        if created:
+            model.objects.bulk_create(created)
+        if existing:
+            model.objects.filter(id__in=existing).delete()
         
-        return instance
\ No newline at end of file
+        return {'created': len(created), 'updated': len(updated), 'deleted': len(existing)}
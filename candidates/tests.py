@@ -1,3 +1,1013 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import re
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from accounts.models import HRUser
+from common.phone import is_complete, phone_lookup, to_e164
+from common.search import contains_search_text
+from companies.models import HRCompany, CustomerCompany
+from flows.models import ActivityType, Activity, CandidateFlow, Status
+from jobs.models import JobPosting
+from .dedup import find_duplicates, refresh_blocking_keys
+from . import importing
+from .importing import import_candidates, iter_rows
+from .matching import candidate_matrix, invalidate_candidate_matrix, refresh_candidate_vectors, refresh_job_posting_vector
+from .models import Candidate, CandidateBlockingKey, CandidateMatchVector, Education, MatchTerm, WorkExperience
+from .serializers import CandidateCreateSerializer
 
-# Create your tests here.
+
+class CandidateTestMixin:
+    def setUp(self):
+        self.client = APIClient()
+        self.hr_company = HRCompany.objects.create(name="HR Company", code="HR001")
+        self.customer_company = CustomerCompany.objects.create(name="Customer Company", code="CC001")
+        self.user = HRUser.objects.create_user(
+            username="hruser",
+            email="hr@example.com",
+            password="hrpass123",
+            hr_company=self.hr_company
+        )
+        self.user.authorized_customer_companies.add(self.customer_company)
+        self.client.force_authenticate(user=self.user)
+        self.job_posting = JobPosting.objects.create(
+            title="Developer",
+            code="DEV001",
+            description="Description",
+            hr_company=self.hr_company,
+            customer_company=self.customer_company,
+            created_by=self.user,
+            closing_date=timezone.now() + timedelta(days=30)
+        )
+
+    def create_candidate(self, first_name, last_name, email, phone, job_posting=None):
+        candidate = Candidate.objects.create(
+            first_name=first_name,
+            last_name=last_name,
+            email=email,
+            phone=phone
+        )
+        CandidateFlow.objects.create(
+            job_posting=job_posting or self.job_posting,
+            candidate=candidate,
+            hr_company=self.hr_company,
+            created_by=self.user
+        )
+        return candidate
+
+
+class CandidateSearchTest(CandidateTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.john = self.create_candidate("John", "Smith", "john.smith@example.com", "5551112233")
+        self.jane = self.create_candidate("Jane", "Doe", "jane@mail.com", "5559998877")
+
+    def search(self, params, url_name='candidate-list'):
+        response = self.client.get(reverse(url_name), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['results']
+
+    def test_search_text_is_generated(self):
+        self.john.refresh_from_db()
+
+        self.assertEqual(self.john.search_text, "john smith john.smith@example.com 5551112233")
+
+    def test_search_matches_any_field_case_insensitively(self):
+        for term, expected in [("SMITH", "John"), ("mail.com", "Jane"), ("99887", "Jane"), ("john smith", "John")]:
+            with self.subTest(term=term):
+                results = self.search({'search': term})
+                self.assertEqual([candidate['first_name'] for candidate in results], [expected])
+
+    def test_turkish_letters_are_folded(self):
+        isik = self.create_candidate("Işık", "Çağlar", "isik@example.com", "5551234567")
+        irem = self.create_candidate("İrem", "Öztürk", "irem@example.com", "5557654321")
+        isik.refresh_from_db()
+        
+        self.assertEqual(isik.search_text, "isik caglar isik@example.com 5551234567")
+        for term, expected in [
+            ("ISIK", isik), ("ışık", isik), ("CAĞLAR", isik),
+            ("irem", irem), ("İREM", irem), ("ozturk", irem), ("ÖZTÜRK", irem),
+        ]:
+            with self.subTest(term=term):
+                results = self.search({'search': term})
+                self.assertEqual([candidate['id'] for candidate in results], [expected.id])
+
+    def test_decomposed_input_is_normalized(self):
+        self.create_candidate("Gül", "Şen", "gul@example.com", "5550001111")
+        
+        results = self.search({'search': "Gu\u0308l"})
+        
+        self.assertEqual([candidate['first_name'] for candidate in results], ["Gül"])
+
+    def test_like_wildcards_are_literal(self):
+        self.assertEqual(self.search({'search': 'j%n'}), [])
+
+    def test_candidate_flow_search(self):
+        results = self.search({'candidate_search': 'doe'}, url_name='candidateflow-list')
+
+        self.assertEqual([flow['candidate_email'] for flow in results], ['jane@mail.com'])
+
+    def test_search_uses_trigram_index(self):
+        with connection.cursor() as cursor:
+            # Too few rows for the planner to prefer an index on its own
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        # Unordered, so walking the created_at index is not an alternative
+        plan = Candidate.objects.filter(contains_search_text('search_text', 'Smith')).order_by().explain()
+        
+        self.assertIn('candidates_search_trgm', plan)
+
+
+class CandidateScopingPlanTest(CandidateTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        # Several flows per candidate: the fan-out a join would have to DISTINCT away
+        self.other_postings = [
+            JobPosting.objects.create(
+                title="Developer",
+                code=f"DEV{i:03d}",
+                description="Description",
+                hr_company=self.hr_company,
+                customer_company=self.customer_company,
+                created_by=self.user,
+                closing_date=timezone.now() + timedelta(days=30)
+            )
+            for i in range(2, 5)
+        ]
+        self.candidate = self.create_candidate("Ali", "Veli", "ali@example.com", "5550001122")
+        for job_posting in self.other_postings:
+            CandidateFlow.objects.create(
+                job_posting=job_posting,
+                candidate=self.candidate,
+                hr_company=self.hr_company,
+                created_by=self.user
+            )
+        WorkExperience.objects.create(
+            candidate=self.candidate,
+            company_name="Acme",
+            position="Engineer",
+            start_date=timezone.now().date()
+        )
+        Education.objects.create(
+            candidate=self.candidate,
+            school_name="ODTÜ",
+            department="CENG",
+            degree="BSc",
+            start_date=timezone.now().date()
+        )
+        self.outsider = Candidate.objects.create(
+            first_name="Out", last_name="Sider", email="out@example.com", phone="5550000000"
+        )
+
+    def plans(self, url, params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        plans = []
+        with connection.cursor() as cursor:
+            for query in context.captured_queries:
+                if query['sql'].startswith('SELECT') and 'candidates_' in query['sql']:
+                    self.assertNotIn('DISTINCT', query['sql'])
+                    cursor.execute(f"EXPLAIN {query['sql']}")
+                    plans.append('\n'.join(row[0] for row in cursor.fetchall()))
+        self.assertTrue(plans)
+        return response, plans
+
+    def assertNoDeduplication(self, plans, table):
+        """
+        No Unique/HashAggregate/GroupAggregate keyed on the listed table's
+        rows. Postgres may still de-duplicate the subquery's candidate ids to
+        drive a semi join; that is keyed on one integer column, not the rows.
+        """
+        for plan in plans:
+            lines = plan.splitlines()
+            for i, line in enumerate(lines):
+                if not any(node in line for node in ('Unique', 'HashAggregate', 'GroupAggregate')):
+                    continue
+                key = next((later for later in lines[i + 1:] if 'Key:' in later), '')
+                self.assertNotIn(f'{table}.', key, plan)
+
+    def test_candidate_list_has_one_row_per_candidate(self):
+        response, plans = self.plans(reverse('candidate-list'), {'company': 'acme', 'school': 'odtü'})
+        
+        self.assertEqual([candidate['id'] for candidate in response.data['results']], [self.candidate.id])
+        self.assertNoDeduplication(plans, 'candidates_candidate')
+
+    def test_search_actions_stay_in_scope(self):
+        WorkExperience.objects.create(
+            candidate=self.outsider,
+            company_name="Acme",
+            position="Engineer",
+            start_date=timezone.now().date()
+        )
+        
+        response, plans = self.plans(reverse('candidate-search-by-experience'), {'company': 'acme'})
+        
+        self.assertEqual([candidate['id'] for candidate in response.data['results']], [self.candidate.id])
+        self.assertNoDeduplication(plans, 'candidates_candidate')
+
+    def test_education_and_work_experience_lists(self):
+        for url_name, table in [
+            ('education-list', 'candidates_education'),
+            ('workexperience-list', 'candidates_workexperience'),
+        ]:
+            with self.subTest(url_name=url_name):
+                response, plans = self.plans(reverse(url_name), {})
+                self.assertEqual(response.data['count'], 1)
+                self.assertNoDeduplication(plans, table)
+
+    def test_candidate_flow_experience_filter(self):
+        response, plans = self.plans(reverse('candidateflow-list'), {'experience_company': 'acme'})
+        
+        self.assertEqual(len(response.data['results']), 4)
+        self.assertNoDeduplication(plans, 'flows_candidateflow')
+
+
+class ListQueryBudgetTest(CandidateTestMixin, APITestCase):
+    """
+    Read endpoints must not issue queries per row: each stays within its
+    budget, whether the page holds one candidate or several.
+    """
+    # url name -> queries allowed for one page, authentication included
+    QUERY_BUDGETS = {
+        'candidate-list': 3,
+        'candidate-detail': 5,
+        'education-list': 2,
+        'workexperience-list': 2,
+        'candidateflow-list': 1,
+        'candidateflow-my-flows': 7,
+        'candidateflow-detail': 8,
+        'activity-list': 2,
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.activity_type = ActivityType.objects.create(name="Phone Call")
+        self.status = Status.objects.create(name="Positive", activity_type=self.activity_type)
+        self.add_candidates(1)
+
+    def add_candidates(self, count):
+        start = Candidate.objects.count()
+        for i in range(start, start + count):
+            candidate = self.create_candidate(f"Test{i}", "Candidate", f"candidate{i}@example.com", "5550000000")
+            for n in range(2):
+                Education.objects.create(
+                    candidate=candidate,
+                    school_name=f"School {n}",
+                    department="CENG",
+                    degree="BSc",
+                    start_date=timezone.now().date()
+                )
+                WorkExperience.objects.create(
+                    candidate=candidate,
+                    company_name=f"Company {n}",
+                    position="Engineer",
+                    start_date=timezone.now().date()
+                )
+            flow = candidate.candidate_flows.get()
+            for n in range(2):
+                Activity.objects.create(
+                    candidate_flow=flow,
+                    activity_type=self.activity_type,
+                    status=self.status,
+                    created_by=self.user,
+                    hr_company=self.hr_company
+                )
+
+    def url(self, url_name):
+        if url_name == 'candidate-detail':
+            return reverse(url_name, args=[Candidate.objects.earliest('created_at').pk])
+        if url_name == 'candidateflow-detail':
+            return reverse(url_name, args=[CandidateFlow.objects.earliest('created_at').pk])
+        return reverse(url_name)
+
+    def query_count(self, url_name):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url(url_name))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+    def test_read_endpoints_stay_within_budget(self):
+        # Warm the cached authorization scope
+        self.client.get(reverse('candidate-list'))
+        for rows in (1, 5):
+            if rows > 1:
+                self.add_candidates(rows - Candidate.objects.count())
+            for url_name, budget in self.QUERY_BUDGETS.items():
+                with self.subTest(url_name=url_name, rows=rows):
+                    self.assertLessEqual(self.query_count(url_name), budget)
+
+
+class CandidateImportTest(CandidateTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('candidate-bulk-import')
+
+    def candidate_row(self, i, **extra):
+        row = {
+            'first_name': f'Import{i}',
+            'last_name': 'Candidate',
+            'email': f'import{i}@example.com',
+            'phone': '5550000000',
+        }
+        row.update(extra)
+        return row
+
+    def ndjson(self, rows):
+        lines = [row if isinstance(row, str) else json.dumps(row) for row in rows]
+        return SimpleUploadedFile('candidates.ndjson', '\n'.join(lines).encode(), content_type='application/x-ndjson')
+
+    def test_csv_import_with_nested_rows(self):
+        content = StringIO()
+        writer = csv.writer(content)
+        writer.writerow(['first_name', 'last_name', 'email', 'phone', 'educations'])
+        writer.writerow(['Ayşe', 'Yılmaz', 'ayse@example.com', '5551112233', json.dumps([
+            {'school_name': 'ODTÜ', 'department': 'CENG', 'degree': 'BSc', 'start_date': '2015-09-01'}
+        ])])
+        writer.writerow(['Can', 'Demir', 'can@example.com', '5554445566', ''])
+        upload = SimpleUploadedFile('candidates.csv', content.getvalue().encode(), content_type='text/csv')
+        
+        response = self.client.post(self.url, {'file': upload, 'job_posting': self.job_posting.id}, format='multipart')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 2)
+        ayse = Candidate.objects.get(email='ayse@example.com')
+        self.assertEqual(list(ayse.educations.values_list('school_name', flat=True)), ['ODTÜ'])
+        self.assertEqual(ayse.candidate_flows.get().job_posting, self.job_posting)
+        self.job_posting.refresh_from_db()
+        self.assertEqual(self.job_posting.active_flows_count, 2)
+        # Visible to the importer through the new flows
+        results = self.client.get(reverse('candidate-list'), {'search': 'yılmaz'}).data['results']
+        self.assertEqual([candidate['id'] for candidate in results], [ayse.id])
+
+    @override_settings(CANDIDATE_IMPORT_CHUNK_SIZE=2)
+    def test_ndjson_duplicates_and_errors_are_reported_per_row(self):
+        self.create_candidate("Existing", "Candidate", "existing@example.com", "5550000000")
+        upload = self.ndjson([
+            self.candidate_row(1),
+            self.candidate_row(2, email='existing@EXAMPLE.com'),
+            '{not json',
+            self.candidate_row(3, email='not-an-email'),
+            self.candidate_row(4, email='import1@example.com'),
+            self.candidate_row(5, work_experiences=[{'company_name': 'Acme', 'position': 'Engineer', 'start_date': '2020-01-01'}]),
+        ])
+        
+        response = self.client.post(self.url, {'file': upload, 'job_posting': self.job_posting.id}, format='multipart')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            {key: response.data[key] for key in ('processed', 'created', 'skipped', 'failed')},
+            {'processed': 6, 'created': 2, 'skipped': 2, 'failed': 2}
+        )
+        self.assertEqual([error['row'] for error in response.data['errors']], [3, 4])
+        self.assertIn('email', response.data['errors'][1]['errors'])
+        self.assertEqual(
+            response.data['duplicates'],
+            [{'row': 2, 'email': 'existing@example.com'}, {'row': 5, 'email': 'import1@example.com'}]
+        )
+        self.assertEqual(WorkExperience.objects.get(candidate__email='import5@example.com').company_name, 'Acme')
+
+    @override_settings(CANDIDATE_IMPORT_REPORT_LIMIT=2)
+    def test_report_lists_only_the_first_errors(self):
+        upload = self.ndjson([self.candidate_row(i, email='not-an-email') for i in range(5)])
+        
+        response = self.client.post(self.url, {'file': upload, 'job_posting': self.job_posting.id}, format='multipart')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['failed'], 5)
+        self.assertEqual([error['row'] for error in response.data['errors']], [1, 2])
+
+    def test_concurrent_import_only_fails_the_clashing_rows(self):
+        write_chunk = importing.write_chunk
+        
+        def racing_write_chunk(valid, *args):
+            if len(valid) > 1:
+                # Another import commits one of the emails after the lookup
+                self.create_candidate("Other", "Import", "import2@example.com", "5550000000")
+                raise IntegrityError
+            return write_chunk(valid, *args)
+        
+        records = [(i, self.candidate_row(i), None) for i in range(1, 4)]
+        with mock.patch.object(importing, 'write_chunk', side_effect=racing_write_chunk):
+            report = import_candidates(records, job_posting=self.job_posting, created_by=self.user)
+        
+        self.assertEqual((report['created'], report['skipped'], report['failed']), (2, 1, 0))
+        self.assertEqual(report['duplicates'], [{'row': 2, 'email': 'import2@example.com'}])
+
+    def test_job_posting_must_be_in_scope(self):
+        other_customer = CustomerCompany.objects.create(name="Other Customer", code="CC002")
+        other_posting = JobPosting.objects.create(
+            title="Other",
+            code="OTH001",
+            description="Description",
+            hr_company=self.hr_company,
+            customer_company=other_customer,
+            created_by=self.user,
+            closing_date=timezone.now() + timedelta(days=30)
+        )
+        for data in [{}, {'job_posting': other_posting.id}]:
+            with self.subTest(data=data):
+                response = self.client.post(self.url, {'file': self.ndjson([self.candidate_row(1)]), **data}, format='multipart')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn('job_posting', response.data)
+        self.assertFalse(Candidate.objects.filter(email='import1@example.com').exists())
+
+    def test_queries_per_chunk_do_not_grow_with_rows(self):
+        def query_count(start, count):
+            records = [
+                (i, self.candidate_row(i, educations=[
+                    {'school_name': 'ODTÜ', 'department': 'CENG', 'degree': 'BSc', 'start_date': '2015-09-01'}
+                ]), None)
+                for i in range(start, start + count)
+            ]
+            with CaptureQueriesContext(connection) as context:
+                report = import_candidates(records, job_posting=self.job_posting, created_by=self.user, chunk_size=50)
+            self.assertEqual(report['created'], count)
+            return len(context.captured_queries)
+        
+        self.assertEqual(query_count(0, 2), query_count(100, 40))
+
+    def test_management_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False) as f:
+            for i in range(5):
+                f.write(json.dumps(self.candidate_row(i)) + '\n')
+        self.addCleanup(os.remove, f.name)
+        stdout = StringIO()
+        
+        call_command(
+            'import_candidates', f.name, '--chunk-size', '2',
+            '--job-posting', str(self.job_posting.id), '--user', self.user.username,
+            stdout=stdout
+        )
+        
+        self.assertIn('Processed 4 rows', stdout.getvalue())
+        self.assertIn('Imported 5 candidates', stdout.getvalue())
+        self.assertEqual(self.job_posting.candidate_flows.count(), 5)
+
+    def test_iter_rows_streams_lines(self):
+        stream = tempfile.TemporaryFile()
+        stream.write(b'{"email": "a@example.com"}\n\n[1]\n')
+        stream.seek(0)
+        
+        rows = list(iter_rows(stream, 'ndjson'))
+        
+        self.assertEqual(rows, [(1, {'email': 'a@example.com'}, None), (2, None, 'Each line must be a JSON object.')])
+
+
+class CandidateNestedUpdateTest(CandidateTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.candidate = self.create_candidate("Ali", "Veli", "ali@example.com", "5550001122")
+        self.educations = [
+            Education.objects.create(
+                candidate=self.candidate,
+                school_name=f"School {i}",
+                department="CENG",
+                degree="BSc",
+                start_date=f"201{i}-09-01",
+                gpa="3.00"
+            )
+            for i in range(3)
+        ]
+        self.work_experience = WorkExperience.objects.create(
+            candidate=self.candidate,
+            company_name="Acme",
+            position="Engineer",
+            start_date="2020-01-01"
+        )
+        self.url = reverse('candidate-detail', args=[self.candidate.id])
+
+    def education_items(self):
+        return [
+            {
+                'id': education.id,
+                'school_name': education.school_name,
+                'department': education.department,
+                'degree': education.degree,
+                'start_date': education.start_date,
+                'gpa': education.gpa,
+            }
+            for education in self.educations
+        ]
+
+    def education_writes(self, context):
+        return [
+            query['sql'].split()[0] for query in context.captured_queries
+            if re.match(r'(UPDATE|INSERT INTO|DELETE FROM) "candidates_education"', query['sql'])
+        ]
+
+    def test_changing_one_gpa_updates_one_row(self):
+        items = self.education_items()
+        items[1]['gpa'] = '3.50'
+        
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(self.url, {'educations': items}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.education_writes(context), ['UPDATE'])
+        changed = Education.objects.get(id=self.educations[1].id)
+        self.assertEqual(str(changed.gpa), '3.50')
+        self.assertGreater(changed.updated_at, self.educations[1].updated_at)
+        self.assertEqual(Education.objects.get(id=self.educations[0].id).updated_at, self.educations[0].updated_at)
+
+    def test_unchanged_list_writes_nothing(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(self.url, {'educations': self.education_items()}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.education_writes(context), [])
+
+    def test_items_are_matched_by_id(self):
+        items = self.education_items()
+        items[0]['degree'] = 'MSc'
+        del items[2]
+        items.append({'school_name': 'New School', 'department': 'EE', 'degree': 'PhD', 'start_date': '2022-09-01'})
+        serializer = CandidateCreateSerializer(self.candidate, data={'educations': items}, partial=True)
+        serializer.is_valid(raise_exception=True)
+        
+        serializer.save()
+        
+        self.assertEqual(serializer.nested_changes, {'educations': {'created': 1, 'updated': 1, 'deleted': 1}})
+        self.assertEqual(
+            sorted(self.candidate.educations.values_list('school_name', 'degree')),
+            [('New School', 'PhD'), ('School 0', 'MSc'), ('School 1', 'BSc')]
+        )
+        # Lists left out of the request are not touched
+        self.assertEqual(list(self.candidate.work_experiences.all()), [self.work_experience])
+
+    def test_empty_list_changes_nothing(self):
+        response = self.client.patch(self.url, {'work_experiences': []}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(self.candidate.work_experiences.all()), [self.work_experience])
+        self.assertEqual(response.data['nested_changes'], {})
+
+    def test_clear_deletes_rows(self):
+        response = self.client.patch(self.url, {'clear': ['work_experiences']}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(self.candidate.work_experiences.exists())
+        self.assertEqual(self.candidate.educations.count(), 3)
+        self.assertEqual(
+            response.data['nested_changes'], {'work_experiences': {'created': 0, 'updated': 0, 'deleted': 1}}
+        )
+
+    def test_clear_and_list_together_are_rejected(self):
+        response = self.client.patch(self.url, {
+            'clear': ['educations'], 'educations': self.education_items(),
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('educations', response.data)
+        self.assertEqual(self.candidate.educations.count(), 3)
+
+    def test_response_reports_changes(self):
+        items = self.education_items()
+        items[0]['degree'] = 'MSc'
+        
+        response = self.client.patch(self.url, {'educations': items}, format='json')
+        
+        self.assertEqual(response.data['nested_changes'], {'educations': {'created': 0, 'updated': 1, 'deleted': 0}})
+
+    def test_ids_of_other_candidates_are_rejected(self):
+        other = self.create_candidate("Ayşe", "Kaya", "ayse@example.com", "5550003344")
+        foreign = Education.objects.create(
+            candidate=other, school_name="Other", department="CENG", degree="BSc", start_date="2015-09-01"
+        )
+        items = self.education_items() + [{
+            'id': foreign.id, 'school_name': 'Taken', 'department': 'CENG', 'degree': 'BSc', 'start_date': '2015-09-01'
+        }]
+        
+        response = self.client.patch(self.url, {'educations': items}, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('educations', response.data)
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.candidate, other)
+
+    def test_create_with_nested_rows(self):
+        response = self.client.post(reverse('candidate-list'), {
+            'first_name': 'Can',
+            'last_name': 'Demir',
+            'email': 'can@example.com',
+            'phone': '5554445566',
+            'work_experiences': [{'company_name': 'Acme', 'position': 'Engineer', 'start_date': '2021-01-01'}],
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Candidate.objects.get(email='can@example.com').work_experiences.count(), 1)
+
+
+class CandidateDedupTest(CandidateTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.ali = self.create_candidate("Ali", "Veli", "ali@example.com", "+90 555 111 22 33")
+        self.add_education(self.ali, "2010-09-01")
+        # Same person, applying again with another email
+        self.ali_again = self.create_candidate("ALİ", "VELİ", "ali.veli@mail.com", "0555 111 2233")
+        self.add_education(self.ali_again, "2010-09-15")
+        # A namesake: same name, nothing else in common
+        self.namesake = self.create_candidate("Ali", "Veli", "aveli@example.com", "5559990000")
+        self.add_education(self.namesake, "2015-09-01")
+        self.other = self.create_candidate("Ayşe", "Kaya", "ayse@example.com", "5554445566")
+        refresh_blocking_keys()
+
+    def add_education(self, candidate, start_date):
+        return Education.objects.create(
+            candidate=candidate, school_name="ODTÜ", department="CENG", degree="BSc", start_date=start_date
+        )
+
+    def test_blocking_keys(self):
+        keys = set(CandidateBlockingKey.objects.filter(candidate=self.ali_again).values_list('kind', 'key'))
+        
+        self.assertEqual(keys, {('phone', '5551112233'), ('name', 'ali veli|2010')})
+
+    def test_full_refresh_only_rewrites_changed_keys(self):
+        unchanged = CandidateBlockingKey.objects.get(candidate=self.ali, kind='name')
+        Candidate.objects.filter(pk=self.ali.pk).update(phone='5559998877')
+        
+        written = refresh_blocking_keys()
+        
+        self.assertEqual(written, CandidateBlockingKey.objects.count())
+        self.assertEqual(CandidateBlockingKey.objects.get(candidate=self.ali, kind='name').id, unchanged.id)
+        self.assertEqual(
+            CandidateBlockingKey.objects.get(candidate=self.ali, kind='phone').key, '5559998877'
+        )
+        # Readers and per-candidate refreshes are never locked out
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM pg_locks WHERE relation = %s::regclass AND mode = 'AccessExclusiveLock'",
+                [CandidateBlockingKey._meta.db_table]
+            )
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_pairs_are_scored_within_blocks(self):
+        pairs = list(find_duplicates())
+        
+        self.assertEqual([(a, b) for a, b, score in pairs], [(self.ali.id, self.ali_again.id)])
+        self.assertEqual(list(find_duplicates(max_block_size=1)), [])
+
+    def test_duplicates_endpoint(self):
+        response = self.client.get(reverse('candidate-duplicates', args=[self.ali.id]))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([candidate['id'] for candidate in response.data], [self.ali_again.id])
+        self.assertGreaterEqual(response.data[0]['duplicate_score'], 0.9)
+
+    def test_new_candidates_get_blocking_keys(self):
+        response = self.client.post(reverse('candidate-list'), {
+            'first_name': 'Ali', 'last_name': 'Veli', 'email': 'ali3@example.com', 'phone': '555-111-22-33',
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        candidate = Candidate.objects.get(email='ali3@example.com')
+        self.assertTrue(CandidateBlockingKey.objects.filter(candidate=candidate, kind='phone', key='5551112233').exists())
+
+    def test_merge_moves_rows_in_bulk(self):
+        activity_type = ActivityType.objects.create(name="Phone Call")
+        flow = self.ali_again.candidate_flows.get()
+        Activity.objects.create(
+            candidate_flow=flow,
+            activity_type=activity_type,
+            status=Status.objects.create(name="Positive", activity_type=activity_type),
+            created_by=self.user,
+            hr_company=self.hr_company
+        )
+        other_posting = JobPosting.objects.create(
+            title="Tester",
+            code="TST001",
+            description="Description",
+            hr_company=self.hr_company,
+            customer_company=self.customer_company,
+            created_by=self.user,
+            closing_date=timezone.now() + timedelta(days=30)
+        )
+        CandidateFlow.objects.create(
+            job_posting=other_posting, candidate=self.ali_again, hr_company=self.hr_company, created_by=self.user
+        )
+        
+        response = self.client.post(
+            reverse('candidate-merge', args=[self.ali.id]), {'duplicates': [self.ali_again.id]}, format='json'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {
+            'activities': 1, 'candidate_flows': 1, 'educations': 1, 'work_experiences': 0, 'candidates': 1,
+        })
+        self.assertFalse(Candidate.objects.filter(id=self.ali_again.id).exists())
+        self.assertEqual(self.ali.educations.count(), 2)
+        self.assertEqual(
+            sorted(self.ali.candidate_flows.values_list('job_posting_id', flat=True)),
+            sorted([self.job_posting.id, other_posting.id])
+        )
+        self.assertEqual(Activity.objects.get().candidate_flow.candidate, self.ali)
+        self.job_posting.refresh_from_db()
+        self.assertEqual(self.job_posting.active_flows_count, 3)
+
+    def test_merge_rejects_candidates_out_of_scope(self):
+        outsider = Candidate.objects.create(first_name="Ali", last_name="Veli", email="out@example.com", phone="5551112233")
+        
+        response = self.client.post(
+            reverse('candidate-merge', args=[self.ali.id]), {'duplicates': [outsider.id]}, format='json'
+        )
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(Candidate.objects.filter(id=outsider.id).exists())
+
+    def test_management_command_merges_groups(self):
+        stdout = StringIO()
+        
+        call_command('find_duplicate_candidates', '--merge', stdout=stdout)
+        
+        self.assertIn('Found 1 likely duplicate pairs', stdout.getvalue())
+        self.assertEqual(
+            sorted(Candidate.objects.values_list('email', flat=True)),
+            ['ali@example.com', 'aveli@example.com', 'ayse@example.com']
+        )
+
+
+class CandidatePhoneTest(CandidateTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.ali = self.create_candidate("Ali", "Veli", "ali@example.com", "0 (555) 111 22 33")
+        self.ayse = self.create_candidate("Ayşe", "Kaya", "ayse@example.com", "+1-555-0123")
+
+    def test_to_e164(self):
+        for phone, expected in [
+            ("+90 555 111 22 33", "+905551112233"),
+            ("0555 111 2233", "+905551112233"),
+            ("5551112233", "+905551112233"),
+            ("00905551112233", "+905551112233"),
+            ("905551112233", "+905551112233"),
+            ("+1-555-0123", "+15550123"),
+            ("111 22 33", None),
+            ("", None),
+        ]:
+            with self.subTest(phone=phone):
+                self.assertEqual(to_e164(phone), expected)
+
+    def test_is_complete(self):
+        for phone, expected in [
+            ("+1-555-0123", True),
+            ("00905551112233", True),
+            ("0555 111 2233", True),
+            ("5551112233", True),
+            ("905551112233", False),
+            ("51112233", False),
+            ("0555 111 223", False),
+            ("", False),
+        ]:
+            with self.subTest(phone=phone):
+                self.assertEqual(is_complete(phone), expected)
+
+    def test_save_normalizes_phone(self):
+        self.ali.refresh_from_db()
+        self.assertEqual(self.ali.phone_e164, "+905551112233")
+        
+        self.ali.phone = "0532 000 11 22"
+        self.ali.save(update_fields=['phone'])
+        
+        self.ali.refresh_from_db()
+        self.assertEqual(self.ali.phone_e164, "+905320001122")
+
+    def test_phone_filters(self):
+        for params, url_name, expected in [
+            ({'phone': '+90 555 111 2233'}, 'candidate-list', [self.ali.id]),
+            ({'phone': '22 33'}, 'candidate-list', [self.ali.id]),
+            ({'phone': '0123'}, 'candidate-list', [self.ayse.id]),
+            ({'phone': '555'}, 'candidate-list', []),
+            ({'phone': 'abc'}, 'candidate-list', []),
+            ({'candidate_phone': '05551112233'}, 'candidateflow-list', [self.ali.id]),
+            ({'candidate_phone': '1112233'}, 'candidateflow-list', [self.ali.id]),
+            # The end of a number, though as long as a full one
+            ({'phone': '51112233'}, 'candidate-list', [self.ali.id]),
+            ({'phone': '905551112233'}, 'candidate-list', [self.ali.id]),
+            ({'candidate_phone': '9055 5111 2233'}, 'candidateflow-list', [self.ali.id]),
+        ]:
+            with self.subTest(params=params):
+                results = self.client.get(reverse(url_name), params).data['results']
+                emails = [row['candidate_email'] if url_name == 'candidateflow-list' else row['email'] for row in results]
+                self.assertEqual(emails, [Candidate.objects.get(id=pk).email for pk in expected])
+
+    def test_phones_that_are_not_full_numbers_are_found(self):
+        short = self.create_candidate("Can", "Demir", "can@example.com", "111 22 33")
+        self.assertIsNone(short.phone_e164)
+
+        for phone, expected in [('22 33', [self.ali.id, short.id]), ('1112233', [self.ali.id, short.id])]:
+            with self.subTest(phone=phone):
+                self.assertEqual(
+                    sorted(Candidate.objects.filter(phone_lookup('phone', phone)).values_list('id', flat=True)),
+                    sorted(expected)
+                )
+
+    def test_phone_lookups_use_indexes(self):
+        with connection.cursor() as cursor:
+            # Enough full numbers that the few unparsed phones are worth
+            # their own index
+            cursor.execute(
+                f"""
+                INSERT INTO {Candidate._meta.db_table}
+                    (first_name, last_name, email, phone, phone_e164, is_active, created_at, updated_at)
+                SELECT 'F', 'L', 'candidate' || g || '@example.com', '0532' || lpad(g::text, 7, '0'),
+                    '+90532' || lpad(g::text, 7, '0'), true, now(), now()
+                FROM generate_series(1, 2000) AS g
+                """
+            )
+            cursor.execute(f'ANALYZE {Candidate._meta.db_table}')
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        for phone, indexes in [
+            ('05551112233', ['candidates__phone_e_7a9094_idx']),
+            ('112233', ['candidates_phone_e164_suffix', 'candidates_phone_raw_suffix']),
+        ]:
+            with self.subTest(phone=phone):
+                plan = Candidate.objects.filter(phone_lookup('phone', phone)).order_by().explain()
+                for index in indexes:
+                    self.assertIn(index, plan)
+
+    def test_backfill_command(self):
+        Candidate.objects.update(phone_e164=None)
+        stdout = StringIO()
+        
+        call_command('backfill_candidate_phones', '--chunk-size', '1', stdout=stdout)
+        
+        self.assertEqual(
+            dict(Candidate.objects.values_list('email', 'phone_e164')),
+            {'ali@example.com': '+905551112233', 'ayse@example.com': '+15550123'}
+        )
+        self.assertIn('Backfilled 2 phone numbers', stdout.getvalue())
+
+
+class CandidateMatchingTest(CandidateTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        invalidate_candidate_matrix()
+        self.job_posting.title = "Python Backend Developer"
+        self.job_posting.description = "Django REST APIs on PostgreSQL"
+        self.job_posting.save()
+        self.backend = self.create_candidate("Ali", "Veli", "ali@example.com", "5551112233")
+        self.add_work_experience(self.backend, "Backend Developer", "Python and Django APIs with PostgreSQL")
+        self.frontend = self.create_candidate("Ayşe", "Kaya", "ayse@example.com", "5552223344")
+        self.add_work_experience(self.frontend, "Frontend Developer", "React")
+        self.designer = self.create_candidate("Can", "Demir", "can@example.com", "5553334455")
+        self.designer_experience = self.add_work_experience(self.designer, "Graphic Designer", "Photoshop")
+        Education.objects.create(
+            candidate=self.designer, school_name="MSGSÜ", department="Graphic Design", degree="BA",
+            start_date="2012-09-01"
+        )
+        # Matches best, but only applied to a customer company the user cannot see
+        other_company = CustomerCompany.objects.create(name="Other Company", code="CC002")
+        other_posting = JobPosting.objects.create(
+            title="Backend", code="BE001", description="Backend", hr_company=self.hr_company,
+            customer_company=other_company, created_by=self.user, closing_date=timezone.now() + timedelta(days=30)
+        )
+        self.outsider = self.create_candidate("Deniz", "Ak", "deniz@example.com", "5554445566", other_posting)
+        self.add_work_experience(self.outsider, "Python Backend Developer", "Django REST APIs on PostgreSQL")
+        refresh_candidate_vectors(Candidate.objects.values_list('id', flat=True))
+        refresh_job_posting_vector(self.job_posting)
+
+    def add_work_experience(self, candidate, position, description):
+        return WorkExperience.objects.create(
+            candidate=candidate, company_name="Acme", position=position, description=description,
+            start_date="2020-01-01"
+        )
+
+    def matches(self, **params):
+        response = self.client.get(reverse('jobposting-matches', args=[self.job_posting.id]), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(match['candidate']['id'], match['score']) for match in response.data]
+
+    def test_candidates_are_ranked_within_scope(self):
+        matches = self.matches()
+        
+        self.assertEqual([pk for pk, score in matches], [self.backend.id, self.frontend.id])
+        self.assertGreater(matches[0][1], matches[1][1])
+        self.assertEqual([pk for pk, score in self.matches(limit=1)], [self.backend.id])
+
+    def test_superusers_see_every_candidate(self):
+        self.user.is_superuser = True
+        self.user.save()
+        
+        self.assertEqual([pk for pk, score in self.matches()][0], self.outsider.id)
+
+    def test_invalid_limit(self):
+        response = self.client.get(reverse('jobposting-matches', args=[self.job_posting.id]), {'limit': 'all'})
+        
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_document_counts(self):
+        document_counts = dict(MatchTerm.objects.values_list('term', 'document_count'))
+        
+        self.assertEqual(document_counts['developer'], 3)
+        self.assertEqual(document_counts['graphic'], 1)
+        self.assertNotIn('and', document_counts)
+
+    def test_work_experience_change_patches_the_matrix(self):
+        self.matches()
+        
+        response = self.client.patch(reverse('workexperience-detail', args=[self.designer_experience.id]), {
+            'position': 'Python Developer', 'description': 'Django and PostgreSQL',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        self.assertIn(self.designer.id, [pk for pk, score in self.matches()])
+        # Applied to the cached matrix instead of rebuilding it
+        self.assertEqual(candidate_matrix().dead_rows, 1)
+        self.assertEqual(MatchTerm.objects.get(term='developer').document_count, 4)
+
+    def test_syncs_extend_the_matrix_in_place(self):
+        self.matches()
+        for position in ['Python Developer', 'Django Developer', 'PostgreSQL Developer']:
+            matrix = candidate_matrix()
+            WorkExperience.objects.filter(id=self.designer_experience.id).update(position=position)
+            refresh_candidate_vectors([self.designer.id])
+            
+            self.assertIn(self.designer.id, [pk for pk, score in self.matches()])
+        
+        # Only the first sync outgrew the buffers the matrix was built with
+        self.assertIs(candidate_matrix().buffers[3], matrix.buffers[3])
+        self.assertEqual(candidate_matrix().dead_rows, 3)
+
+    @override_settings(CANDIDATE_MATCHING_MAX_STALE_ROWS=1)
+    def test_dead_rows_are_compacted(self):
+        self.matches()
+        for position in ['Python Developer', 'Django Developer']:
+            WorkExperience.objects.filter(id=self.designer_experience.id).update(position=position)
+            refresh_candidate_vectors([self.designer.id])
+            matches = self.matches()
+        
+        matrix = candidate_matrix()
+        self.assertEqual(matrix.dead_rows, 0)
+        self.assertEqual(sorted(matrix.candidate_ids.tolist()), sorted(Candidate.objects.values_list('id', flat=True)))
+        self.assertEqual(matches, self.matches())
+        self.assertIn(self.designer.id, [pk for pk, score in matches])
+
+    def test_vectors_committed_after_a_sync_are_applied(self):
+        self.matches()
+        synced_at = candidate_matrix().synced_at
+        WorkExperience.objects.filter(id=self.designer_experience.id).update(
+            position='Python Developer', description='Django and PostgreSQL'
+        )
+        refresh_candidate_vectors([self.designer.id])
+        # Stamped before the last sync, committed after it
+        CandidateMatchVector.objects.filter(candidate=self.designer).update(
+            updated_at=synced_at - timedelta(seconds=1)
+        )
+        
+        self.assertIn(self.designer.id, [pk for pk, score in self.matches()])
+        self.matches()
+        # Read again within the overlap, but replaced only once
+        self.assertEqual(candidate_matrix().dead_rows, 1)
+
+    def test_deleted_candidates_leave_room_for_the_next_best(self):
+        self.user.is_superuser = True
+        self.user.save()
+        self.assertEqual([pk for pk, score in self.matches(limit=2)], [self.outsider.id, self.backend.id])
+        
+        response = self.client.delete(reverse('candidate-detail', args=[self.outsider.id]))
+        
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual([pk for pk, score in self.matches(limit=2)], [self.backend.id, self.frontend.id])
+
+    def test_removed_terms_stop_counting(self):
+        response = self.client.delete(reverse('workexperience-detail', args=[self.designer_experience.id]))
+        
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(MatchTerm.objects.get(term='photoshop').document_count, 0)
+        self.assertEqual(MatchTerm.objects.get(term='graphic').document_count, 1)
+        
+        response = self.client.delete(reverse('candidate-detail', args=[self.designer.id]))
+        
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(MatchTerm.objects.get(term='graphic').document_count, 0)
+
+    def test_job_posting_update_refreshes_its_vector(self):
+        response = self.client.patch(reverse('jobposting-detail', args=[self.job_posting.id]), {
+            'title': 'Graphic Designer', 'description': 'Photoshop', 'customer_company': self.customer_company.id,
+        }, format='json')
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([pk for pk, score in self.matches()], [self.designer.id])
+
+    def test_rebuild_command(self):
+        CandidateMatchVector.objects.all().delete()
+        MatchTerm.objects.update(document_count=7)
+        stdout = StringIO()
+        
+        call_command('rebuild_match_vectors', '--chunk-size', '2', stdout=stdout)
+        
+        self.assertEqual(CandidateMatchVector.objects.count(), 4)
+        self.assertEqual(MatchTerm.objects.get(term='developer').document_count, 3)
+        self.assertEqual(MatchTerm.objects.get(term='rest').document_count, 1)
+        self.assertIn('Recomputed 4 candidate', stdout.getvalue())
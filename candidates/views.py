@@ -1,56 +1,65 @@
+import logging
 from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
+from drf_spectacular.utils import extend_schema
+from audit.recorder import record_event
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
+from django.db.models import OuterRef, Q
 from .models import Candidate, Education, WorkExperience
 from .serializers import (
-    CandidateSerializer, CandidateCreateSerializer,
-    EducationSerializer, WorkExperienceSerializer
+    CandidateSerializer, CandidateCreateSerializer, CandidateImportSerializer,
+    CandidateMergeSerializer, EducationSerializer, WorkExperienceSerializer
 )
 from common.permissions import IsHRUserPermission, CandidateAccessPermission
+from common.pagination import KeysetPagination, PaginatedActionMixin
+from common.phone import phone_lookup
+from common.search import contains_search_text
+from .dedup import duplicates_of, merge_candidates, refresh_blocking_keys
+from .importing import CandidateImportError, detect_format, import_candidates, iter_rows
+from .matching import refresh_candidate_vectors, remove_candidate_vectors
+from .scoping import in_scope, worked_at, studied_at
 
-class CandidateViewSet(viewsets.ModelViewSet):
+logger = logging.getLogger('wisehire.candidates')
+
+class CandidateViewSet(PaginatedActionMixin, viewsets.ModelViewSet):
     queryset = Candidate.objects.all()
     serializer_class = CandidateSerializer
     permission_classes = [IsHRUserPermission, CandidateAccessPermission]
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['is_active']
     search_fields = ['first_name', 'last_name', 'email', 'phone']
     
+    # Write actions re-read the nested lists they just saved, so only reads prefetch
+    read_actions = ['list', 'retrieve', 'search_by_experience', 'search_by_education', 'duplicates']
+    
     def get_queryset(self):
         user = self.request.user
-        if user.is_superuser:
-            return Candidate.objects.all()
-        
-        user_authorized_companies = user.get_authorized_customer_companies()
-        
-        queryset = Candidate.objects.filter(
-            candidate_flows__hr_company=user.hr_company,
-            candidate_flows__job_posting__customer_company__in=user_authorized_companies
-        ).distinct()
+        queryset = Candidate.objects.all()
+        if not user.is_superuser:
+            queryset = queryset.filter(in_scope(user.authorization_scope))
         
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(
-                Q(first_name__icontains=search) |
-                Q(last_name__icontains=search) |
-                Q(email__icontains=search) |
-                Q(phone__icontains=search)
-            )
+            queryset = queryset.filter(contains_search_text('search_text', search))
+        
+        phone = self.request.query_params.get('phone', None)
+        if phone:
+            phone_filter = phone_lookup('phone', phone)
+            queryset = queryset.filter(phone_filter) if phone_filter else queryset.none()
         
         company = self.request.query_params.get('company', None)
         if company:
-            queryset = queryset.filter(
-                work_experiences__company_name__icontains=company
-            ).distinct()
+            queryset = queryset.filter(worked_at(company))
         
         school = self.request.query_params.get('school', None)
         if school:
-            queryset = queryset.filter(
-                educations__school_name__icontains=school
-            ).distinct()
+            queryset = queryset.filter(studied_at(school))
         
+        if self.action in self.read_actions:
+            queryset = CandidateSerializer.eager_loading(queryset)
         return queryset
     
     def get_serializer_class(self):
@@ -58,6 +67,26 @@ class CandidateViewSet(viewsets.ModelViewSet):
             return CandidateCreateSerializer
         return CandidateSerializer
     
+    def perform_create(self, serializer):
+        candidate = serializer.save()
+        refresh_blocking_keys([candidate.id])
+        refresh_candidate_vectors([candidate.id])
+    
+    def perform_update(self, serializer):
+        candidate = serializer.save()
+        refresh_blocking_keys([candidate.id])
+        # The match vector is built from the nested lists alone
+        if any(any(changes.values()) for changes in serializer.nested_changes.values()):
+            refresh_candidate_vectors([candidate.id])
+        for related_name, changes in serializer.nested_changes.items():
+            logger.info("Candidate %s updated - %s created: %s, updated: %s, deleted: %s",
+                        serializer.instance.id, related_name,
+                        changes['created'], changes['updated'], changes['deleted'])
+    
+    def perform_destroy(self, instance):
+        remove_candidate_vectors([instance.id])
+        instance.delete()
+    
     
     @action(detail=False, methods=['get'])
     def search_by_experience(self, request):
@@ -66,12 +95,10 @@ class CandidateViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Company parameter is required'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        candidates = Candidate.objects.filter(
-            work_experiences__company_name__icontains=company
-        ).distinct()
+        # get_queryset() applies the company filter
+        candidates = self.get_queryset()
         
-        serializer = self.get_serializer(candidates, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(candidates)
     
     @action(detail=False, methods=['get'])
     def search_by_education(self, request):
@@ -80,12 +107,95 @@ class CandidateViewSet(viewsets.ModelViewSet):
             return Response({'error': 'School parameter is required'}, 
                           status=status.HTTP_400_BAD_REQUEST)
         
-        candidates = Candidate.objects.filter(
-            educations__school_name__icontains=school
-        ).distinct()
+        # get_queryset() applies the school filter
+        candidates = self.get_queryset()
+        
+        return self.paginated_response(candidates)
+    
+    @extend_schema(
+        operation_id="bulk_import_candidates",
+        summary="Bulk Import Candidates",
+        description=(
+            "Streams an uploaded CSV or NDJSON file into candidates, optionally adding each one to a job "
+            "posting. Emails that already exist are skipped; returns the per-row errors"
+        ),
+        request={'multipart/form-data': CandidateImportSerializer},
+        tags=['Candidates']
+    )
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def bulk_import(self, request):
+        serializer = CandidateImportSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data['file']
+        job_posting = serializer.validated_data.get('job_posting')
+        try:
+            file_format = detect_format(upload.name, upload.content_type)
+        except CandidateImportError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        def progress(report):
+            logger.info("Bulk candidate import - Processed: %s, Created: %s, File: %s",
+                        report['processed'], report['created'], upload.name)
+        
+        report = import_candidates(
+            iter_rows(upload, file_format),
+            job_posting=job_posting,
+            created_by=request.user,
+            progress=progress
+        )
         
-        serializer = self.get_serializer(candidates, many=True)
-        return Response(serializer.data)
+        logger.info("Bulk candidate import - Created: %s, Skipped: %s, Failed: %s, Imported by: %s (ID: %s)",
+                    report['created'], report['skipped'], report['failed'], request.user.username, request.user.id)
+        
+        if report['created']:
+            response_status = status.HTTP_201_CREATED
+        elif report['failed']:
+            response_status = status.HTTP_400_BAD_REQUEST
+        else:
+            response_status = status.HTTP_200_OK
+        return Response(report, status=response_status)
+
+    @extend_schema(
+        operation_id="candidate_duplicates",
+        summary="Likely Duplicates",
+        description="Candidates in scope that probably are the same person as this one, best match first",
+        tags=['Candidates']
+    )
+    @action(detail=True, methods=['get'])
+    def duplicates(self, request, pk=None):
+        candidate = self.get_object()
+        scores = duplicates_of(candidate)
+        
+        candidates = self.get_queryset().filter(id__in=scores)
+        data = [
+            {**row, 'duplicate_score': scores[row['id']]}
+            for row in self.get_serializer(candidates, many=True).data
+        ]
+        return Response(sorted(data, key=lambda row: -row['duplicate_score']))
+    
+    @extend_schema(
+        operation_id="merge_candidates",
+        summary="Merge Duplicates",
+        description="Moves the flows, educations and work experiences of the listed candidates to this one and deletes them",
+        request=CandidateMergeSerializer,
+        tags=['Candidates']
+    )
+    @action(detail=True, methods=['post'])
+    def merge(self, request, pk=None):
+        candidate = self.get_object()
+        serializer = CandidateMergeSerializer(data=request.data, context={'request': request, 'candidate': candidate})
+        serializer.is_valid(raise_exception=True)
+        duplicates = list(Candidate.objects.filter(id__in=serializer.validated_data['duplicates']).only('id'))
+        
+        moved = merge_candidates(candidate, [duplicate.id for duplicate in duplicates])
+        for duplicate in duplicates:
+            record_event(request, 'delete', duplicate, {'merged_into': candidate.id},
+                         hr_company_id=request.user.hr_company_id)
+        
+        logger.info("Candidates merged - Into: %s, Merged: %s, Merged by: %s (ID: %s)",
+                    candidate.id, [duplicate.id for duplicate in duplicates], request.user.username, request.user.id)
+        
+        return Response(moved)
 
 class EducationViewSet(viewsets.ModelViewSet):
     queryset = Education.objects.all()
@@ -99,12 +209,28 @@ class EducationViewSet(viewsets.ModelViewSet):
         if user.is_superuser:
             return Education.objects.all()
         
-        user_authorized_companies = user.get_authorized_customer_companies()
+        scope = user.authorization_scope
         
-        return Education.objects.filter(
-            candidate__candidate_flows__hr_company=user.hr_company,
-            candidate__candidate_flows__job_posting__customer_company__in=user_authorized_companies
-        ).distinct()
+        return Education.objects.filter(in_scope(scope, OuterRef('candidate_id')))
+    
+    # The first education year is part of the candidate's name blocking key,
+    # and the department and degree part of their match vector
+    def perform_create(self, serializer):
+        education = serializer.save()
+        refresh_blocking_keys([education.candidate_id])
+        refresh_candidate_vectors([education.candidate_id])
+    
+    def perform_update(self, serializer):
+        previous_candidate_id = serializer.instance.candidate_id
+        education = serializer.save()
+        candidate_ids = {previous_candidate_id, education.candidate_id}
+        refresh_blocking_keys(candidate_ids)
+        refresh_candidate_vectors(candidate_ids)
+    
+    def perform_destroy(self, instance):
+        instance.delete()
+        refresh_blocking_keys([instance.candidate_id])
+        refresh_candidate_vectors([instance.candidate_id])
 
 class WorkExperienceViewSet(viewsets.ModelViewSet):
     queryset = WorkExperience.objects.all()
@@ -118,9 +244,20 @@ class WorkExperienceViewSet(viewsets.ModelViewSet):
         if user.is_superuser:
             return WorkExperience.objects.all()
         
-        user_authorized_companies = user.get_authorized_customer_companies()
+        scope = user.authorization_scope
         
-        return WorkExperience.objects.filter(
-            candidate__candidate_flows__hr_company=user.hr_company,
-            candidate__candidate_flows__job_posting__customer_company__in=user_authorized_companies
-        ).distinct()
+        return WorkExperience.objects.filter(in_scope(scope, OuterRef('candidate_id')))
+    
+    # The position and description are part of the candidate's match vector
+    def perform_create(self, serializer):
+        work_experience = serializer.save()
+        refresh_candidate_vectors([work_experience.candidate_id])
+    
+    def perform_update(self, serializer):
+        previous_candidate_id = serializer.instance.candidate_id
+        work_experience = serializer.save()
+        refresh_candidate_vectors({previous_candidate_id, work_experience.candidate_id})
+    
+    def perform_destroy(self, instance):
+        instance.delete()
+        refresh_candidate_vectors([instance.candidate_id])
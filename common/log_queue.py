@@ -0,0 +1,112 @@
+import atexit
+import copy
+import logging
+import logging.config
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+_queue = queue.SimpleQueue()
+_listener = None
+_lock = threading.Lock()
+
+
+class DispatchingQueueListener(QueueListener):
+    """
+    The single writer thread of the process.
+
+    Each queued item carries the handlers its logger was configured with;
+    the record is formatted and written by those handlers here, off the
+    request thread.
+    """
+
+    def handle(self, item):
+        targets, record = item
+        for handler in targets:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+class AsyncHandler(QueueHandler):
+    """
+    Queues records for the writer thread instead of writing them in place.
+
+    As with QueueHandler, msg and args are merged before the record is
+    queued, so the log shows the arguments as they were at the call even if
+    the objects change before the writer thread gets to them. The target
+    handlers still apply their own format on the writer thread.
+    """
+
+    def __init__(self, targets):
+        super().__init__(_queue)
+        self.targets = tuple(targets)
+
+    def prepare(self, record):
+        # A copy: other handlers of the record's logger still see the original
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Rendered now too; the traceback's frames keep living objects
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        try:
+            enqueue(self.targets, self.prepare(record))
+        except Exception:
+            self.handleError(record)
+
+
+def configure_logging(config):
+    """
+    LOGGING_CONFIG callable: applies `config`, then puts the handlers of each
+    configured logger behind an AsyncHandler.
+    """
+    logging.config.dictConfig(config)
+    loggers = [logging.getLogger(name) for name in config.get('loggers', {})]
+    if 'root' in config:
+        loggers.append(logging.getLogger())
+    for logger in loggers:
+        if logger.handlers:
+            logger.handlers = [AsyncHandler(logger.handlers)]
+
+
+def enqueue(targets, record):
+    if _listener is None:
+        start_listener()
+    _queue.put_nowait((targets, record))
+
+
+def start_listener():
+    global _listener
+    with _lock:
+        if _listener is None:
+            _listener = DispatchingQueueListener(_queue)
+            _listener.start()
+
+
+def stop_listener():
+    """Writes out everything still queued and stops the writer thread."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def _reset_after_fork():
+    # The writer thread does not survive a fork (celery/gunicorn workers);
+    # the child starts its own on its first log call.
+    global _queue, _listener, _lock
+    _queue = queue.SimpleQueue()
+    _listener = None
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+# Registered after logging's own shutdown hook, so it runs first and the
+# queue is drained before the file handlers are closed.
+atexit.register(stop_listener)
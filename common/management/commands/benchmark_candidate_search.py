@@ -0,0 +1,118 @@
+import statistics
+import time
+import uuid
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from candidates.models import Candidate
+from common.search import contains_search_text
+
+FIRST_NAMES = ['Ahmet', 'Mehmet', 'Ayşe', 'Fatma', 'Emre', 'Zeynep', 'Can', 'Elif', 'John', 'Maria', 'David', 'Anna']
+LAST_NAMES = ['Yılmaz', 'Kaya', 'Demir', 'Şahin', 'Çelik', 'Öztürk', 'Smith', 'Johnson', 'Brown', 'Garcia', 'Miller']
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compare candidate search latency of the icontains filters and the trigram-indexed search column'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--candidates', type=int, default=1_000_000)
+        parser.add_argument('--iterations', type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                results = self.run(options['candidates'], options['iterations'])
+                raise Rollback
+        except Rollback:
+            pass
+
+        self.stdout.write(
+            f"Search latency over {options['candidates']} generated candidates, "
+            f"median of {options['iterations']} runs (ms), {self.server()}"
+        )
+        for term, timings in results.items():
+            before, after = timings['icontains'], timings['search_text']
+            self.stdout.write(
+                f'  {term!r}: icontains {before["median"]:.2f} ({before["scan"]}) | '
+                f'search_text {after["median"]:.2f} ({after["scan"]}) | '
+                f'{before["median"] / after["median"]:.1f}x'
+            )
+
+    def server(self):
+        # Timings are only comparable between runs on the same server and
+        # pg_trgm build, so every report names them
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT current_setting('server_version'), "
+                "(SELECT extversion FROM pg_extension WHERE extname = 'pg_trgm')"
+            )
+            version, trgm_version = cursor.fetchone()
+        return f'PostgreSQL {version}, pg_trgm {trgm_version or "not installed"}'
+
+    def run(self, count, iterations):
+        suffix = uuid.uuid4().hex[:8]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {Candidate._meta.db_table}
+                    (first_name, last_name, email, phone, is_active, created_at, updated_at)
+                SELECT
+                    (%s::text[])[1 + g %% %s],
+                    (%s::text[])[1 + (g / %s) %% %s],
+                    'candidate' || g || '.' || %s || '@example.com',
+                    lpad(((g::bigint * 7919) %% 10000000000)::text, 10, '0'),
+                    true,
+                    now() - g * interval '1 second',
+                    now()
+                FROM generate_series(1, %s) AS g
+                """,
+                [FIRST_NAMES, len(FIRST_NAMES), LAST_NAMES, len(FIRST_NAMES), len(LAST_NAMES), suffix, count]
+            )
+            cursor.execute(f'ANALYZE {Candidate._meta.db_table}')
+
+        terms = [
+            'Mehmet',                      # common
+            f'candidate{count // 2}.',     # one row
+            str((count // 3 * 7919) % 10_000_000_000).zfill(10)[2:8],  # phone fragment
+            'no such candidate',           # no match
+        ]
+        results = {}
+        for term in terms:
+            results[term] = {
+                'icontains': self.timed(self.icontains(term), iterations),
+                'search_text': self.timed(
+                    Candidate.objects.filter(contains_search_text('search_text', term)), iterations
+                ),
+            }
+        return results
+
+    def icontains(self, term):
+        # The filter CandidateViewSet ran before the search_text column existed
+        return Candidate.objects.filter(
+            Q(first_name__icontains=term) |
+            Q(last_name__icontains=term) |
+            Q(email__icontains=term) |
+            Q(phone__icontains=term)
+        )
+
+    def timed(self, queryset, iterations):
+        # The first page the list endpoint would fetch
+        page = queryset.order_by('-created_at', '-id')[:21]
+        timings = []
+        for i in range(iterations):
+            started = time.perf_counter()
+            list(page.all())
+            timings.append((time.perf_counter() - started) * 1000)
+        return {'median': statistics.median(timings), 'scan': self.scan(page)}
+
+    def scan(self, queryset):
+        plan = queryset.explain()
+        if 'candidates_search_trgm' in plan:
+            return 'trigram index'
+        if 'Seq Scan' in plan:
+            return 'seq scan'
+        return 'index scan'
@@ -0,0 +1,159 @@
+import logging
+import os
+import statistics
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from accounts.models import HRUser
+from candidates.models import Candidate
+from common.log_queue import AsyncHandler, start_listener, stop_listener
+from companies.models import HRCompany, CustomerCompany
+from flows.serializers import CandidateFlowCreateSerializer
+from flows.views import CandidateFlowViewSet
+from jobs.serializers import JobPostingCreateSerializer
+from jobs.views import JobPostingViewSet
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compare perform_create latency with synchronous and queued log handlers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=20, help='Untimed iterations per mode before the timed ones')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        # Console output would drown the report; keep the write, drop the text
+        console = logging._handlers.get('console')
+        devnull = open(os.devnull, 'w')
+        original_stream = console.setStream(devnull) if console else None
+
+        try:
+            with transaction.atomic():
+                results = self.run(iterations, options['warmup'])
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            if console:
+                console.setStream(original_stream)
+            devnull.close()
+
+        self.stdout.write(
+            f'perform_create latency over {iterations} iterations per mode, '
+            f'sync and async alternating (ms)'
+        )
+        for name, timings in results.items():
+            sync, queued = timings['sync'], timings['async']
+            self.stdout.write(
+                f'  {name}: sync mean {statistics.mean(sync):.3f} p95 {self.p95(sync):.3f} | '
+                f'async mean {statistics.mean(queued):.3f} p95 {self.p95(queued):.3f} | '
+                f'saved {statistics.mean(sync) - statistics.mean(queued):.3f}'
+            )
+
+    def run(self, iterations, warmup):
+        suffix = uuid.uuid4().hex[:8]
+        hr_company = HRCompany.objects.create(name='Benchmark HR', code=f'BHR{suffix}')
+        customer_company = CustomerCompany.objects.create(name='Benchmark Customer', code=f'BCC{suffix}')
+        user = HRUser.objects.create_user(
+            username=f'benchmark{suffix}',
+            email=f'benchmark{suffix}@example.com',
+            password='benchmark123',
+            hr_company=hr_company
+        )
+        user.authorized_customer_companies.add(customer_company)
+        candidates = Candidate.objects.bulk_create([
+            Candidate(
+                first_name='Bench',
+                last_name=f'Mark {i}',
+                email=f'candidate{i}.{suffix}@example.com',
+                phone='5550000000'
+            )
+            for i in range((iterations + warmup) * 2)
+        ])
+
+        request = Request(APIRequestFactory().post('/'))
+        request.user = user
+        closing_date = timezone.now() + timedelta(days=30)
+        job_postings = []
+        counter = iter(range((iterations + warmup) * 4))
+
+        def create_job_posting(viewset):
+            serializer = JobPostingCreateSerializer(data={
+                'title': 'Benchmark Engineer',
+                'code': f'BENCH-{suffix}-{next(counter)}',
+                'description': 'Benchmark posting',
+                'customer_company': customer_company.id,
+                'closing_date': closing_date,
+            }, context={'request': request})
+            serializer.is_valid(raise_exception=True)
+            return self.timed(viewset.perform_create, serializer, job_postings)
+
+        candidate_iter = iter(candidates)
+
+        def create_candidate_flow(viewset):
+            serializer = CandidateFlowCreateSerializer(data={
+                'job_posting': job_postings[0].id,
+                'candidate': next(candidate_iter).id,
+            }, context={'request': request})
+            serializer.is_valid(raise_exception=True)
+            return self.timed(viewset.perform_create, serializer)
+
+        cases = [
+            ('jobs.JobPostingViewSet', 'wisehire.jobs', JobPostingViewSet, create_job_posting),
+            ('flows.CandidateFlowViewSet', 'wisehire.flows', CandidateFlowViewSet, create_candidate_flow),
+        ]
+        results = {}
+        for name, logger_name, viewset_class, create in cases:
+            viewset = viewset_class(request=request, format_kwarg=None)
+            results[name] = {'sync': [], 'async': []}
+            for i in range(warmup + iterations):
+                # Alternating, so neither mode always runs on the warmer caches
+                for mode in ('sync', 'async') if i % 2 else ('async', 'sync'):
+                    with self.handlers(logger_name, mode):
+                        elapsed = create(viewset)
+                    if i >= warmup:
+                        results[name][mode].append(elapsed)
+        return results
+
+    def timed(self, perform_create, serializer, created=None):
+        started = time.perf_counter()
+        perform_create(serializer)
+        elapsed = (time.perf_counter() - started) * 1000
+        if created is not None:
+            created.append(serializer.instance)
+        return elapsed
+
+    @contextmanager
+    def handlers(self, logger_name, mode):
+        logger = logging.getLogger(logger_name)
+        original = logger.handlers[:]
+        if mode == 'sync':
+            # The handlers the queue would have written to, called in place
+            logger.handlers = [
+                target
+                for handler in original if isinstance(handler, AsyncHandler)
+                for target in handler.targets
+            ]
+        else:
+            # Started untimed; it would otherwise start on the first log call
+            start_listener()
+        try:
+            yield
+        finally:
+            logger.handlers = original
+            # Drain the queue so writes left over from one run do not slow the next
+            stop_listener()
+
+    def p95(self, timings):
+        return statistics.quantiles(timings, n=20)[-1]
@@ -1,3 +1,23 @@
 from django.db import models
 
-# Create your models here.
+
+class CounterFieldsModel(models.Model):
+    """
+    Base for models with denormalized counter columns that are only ever
+    moved by UPDATEs of their own (F() deltas, recounts). A full save()
+    would write back the counter values loaded with the instance and undo
+    every change made since, so saving an existing row leaves the
+    `counter_fields` out unless they are named in update_fields.
+    """
+    counter_fields = ()
+    
+    class Meta:
+        abstract = True
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and not field.generated and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
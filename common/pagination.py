@@ -0,0 +1,131 @@
+from datetime import datetime
+from django.db.models import F, Field, Func, Value
+from django.db.models.lookups import GreaterThan, LessThan
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+
+
+class Row(Func):
+    """SQL row value, "(a, b)", compared column by column."""
+    function = ''
+    output_field = Field()
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    CursorPagination whose cursor holds both created_at and id of the row it
+    stops at, so each page starts with a "(created_at, id) < (%s, %s)" row
+    comparison. DRF's own cursor only holds created_at and skips the rows
+    sharing it with an OFFSET, which bulk-created rows make common.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    # Served by the created_at indexes, which a row comparison can range scan
+    ordering = ('-created_at', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        current_position = self.cursor.position if self.cursor is not None else None
+
+        if reverse:
+            queryset = queryset.order_by('created_at', 'id')
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if current_position is not None:
+            # Walking backwards through a newest-first list means newer rows
+            compare = GreaterThan if reverse else LessThan
+            queryset = queryset.filter(compare(
+                Row(F('created_at'), F('id')), Row(*map(Value, self.decode_position(current_position)))
+            ))
+
+        # One row past the page tells whether another page follows
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        following_position = (
+            self._get_position_from_instance(results[-1], self.ordering)
+            if len(results) > len(self.page) else None
+        )
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.next_position = current_position is not None, current_position
+            self.has_previous, self.previous_position = following_position is not None, following_position
+        else:
+            self.has_next, self.next_position = following_position is not None, following_position
+            self.has_previous, self.previous_position = current_position is not None, current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def decode_position(self, position):
+        try:
+            created_at, pk = position.split('|')
+            return datetime.fromisoformat(created_at), int(pk)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def _get_position_from_instance(self, instance, ordering):
+        # Every position is unique, so DRF's links never need an offset
+        return f'{instance.created_at.isoformat()}|{instance.pk}'
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on (created_at, id), newest first: no COUNT(*) and no
+    OFFSET scan however deep the client pages, ties on created_at included.
+
+    Passing ?page=N opts into numbered pages with a total count. Querysets
+    the view has ordered itself (e.g. by search rank) are numbered as well,
+    since a cursor can only walk the keyset ordering.
+    """
+    page_query_param = 'page'
+
+    def __init__(self):
+        self.cursor_pagination = CreatedAtCursorPagination()
+        self.page_number_pagination = PageNumberPagination()
+        self.paginator = self.cursor_pagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.page_query_param in request.query_params or queryset.query.order_by:
+            self.paginator = self.page_number_pagination
+        else:
+            self.paginator = self.cursor_pagination
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.cursor_pagination.get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = self.cursor_pagination.get_schema_operation_parameters(view)
+        return parameters + [
+            parameter
+            for parameter in self.page_number_pagination.get_schema_operation_parameters(view)
+            if parameter['name'] == self.page_query_param
+        ]
+
+    @property
+    def display_page_controls(self):
+        return self.paginator.display_page_controls
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+
+class PaginatedActionMixin:
+    """For @action lists: serializes one page of `queryset` the way list() does."""
+
+    def paginated_response(self, queryset):
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
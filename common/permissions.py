@@ -8,25 +8,24 @@ class IsHRUserPermission(permissions.BasePermission):
         if getattr(request.user, 'is_superuser', False):
             return True
             
-        return (
-            hasattr(request.user, 'hr_company') and
-            getattr(request.user, 'hr_company', None) is not None
-        )
+        return getattr(request.user, 'hr_company_id', None) is not None
 
 class CustomerCompanyPermission(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj):
         if request.user.is_superuser:
             return True
-            
+        
+        scope = request.user.authorization_scope
+        
         if hasattr(obj, 'customer_company'):
-            return request.user.has_customer_company_permission(obj.customer_company)
+            return obj.customer_company_id in scope.customer_company_ids
         
         if hasattr(obj, 'job_posting'):
-            return request.user.has_customer_company_permission(obj.job_posting.customer_company)
+            return obj.job_posting.customer_company_id in scope.customer_company_ids
         
         if hasattr(obj, 'candidate_flow'):
-            return request.user.has_customer_company_permission(obj.candidate_flow.job_posting.customer_company)
+            return obj.candidate_flow.job_posting.customer_company_id in scope.customer_company_ids
         
         return False
 
@@ -34,12 +33,14 @@ class HRCompanyPermission(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.user.is_superuser:
             return True
+        
+        scope = request.user.authorization_scope
             
         if hasattr(obj, 'hr_company'):
-            return obj.hr_company == request.user.hr_company
+            return obj.hr_company_id == scope.hr_company_id
         
         if hasattr(obj, 'created_by'):
-            return obj.created_by.hr_company == request.user.hr_company
+            return obj.created_by.hr_company_id == scope.hr_company_id
         
         return False
 
@@ -48,9 +49,9 @@ class CandidateAccessPermission(permissions.BasePermission):
         if request.user.is_superuser:
             return True
         
-        user_authorized_companies = request.user.get_authorized_customer_companies()
+        scope = request.user.authorization_scope
         
         return obj.candidate_flows.filter(
-            hr_company=request.user.hr_company,
-            job_posting__customer_company__in=user_authorized_companies
+            hr_company_id=scope.hr_company_id,
+            job_posting__customer_company_id__in=scope.customer_company_ids
         ).exists()
\ No newline at end of file
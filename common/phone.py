@@ -0,0 +1,75 @@
+import re
+from django.conf import settings
+from django.db.models import CharField, F, Func, Q, Value
+from django.db.models.functions import Reverse
+from django.db.models.lookups import StartsWith
+
+# E.164 allows at most 15 digits after the "+"; shorter than this is not a
+# full number
+E164_MIN_DIGITS = 8
+E164_MAX_DIGITS = 15
+
+
+def to_e164(phone):
+    """
+    "+90 (555) 111-22-33", "0555 111 22 33" and "00905551112233" all become
+    "+905551112233". Numbers without a country code are taken to be in
+    settings.PHONE_DEFAULT_COUNTRY_CODE. Returns None for anything that is
+    not a full phone number.
+    """
+    phone = (phone or '').strip()
+    digits = re.sub(r'\D', '', phone)
+    if not phone.startswith('+'):
+        country_code = settings.PHONE_DEFAULT_COUNTRY_CODE
+        if digits.startswith('00'):
+            digits = digits[2:]
+        elif digits.startswith('0'):
+            # National trunk prefix
+            digits = country_code + digits[1:]
+        elif len(digits) == settings.PHONE_NATIONAL_NUMBER_LENGTH:
+            digits = country_code + digits
+    if not E164_MIN_DIGITS <= len(digits) <= E164_MAX_DIGITS:
+        return None
+    return f'+{digits}'
+
+
+def is_complete(phone):
+    """
+    Whether `phone` can only be a full number: it has an international
+    prefix ("+", "00"), or is a national number with or without its trunk
+    "0". A stored phone is always taken as full by to_e164(), but a search
+    term like "905551112233" may just as well be the end of a number.
+    """
+    phone = (phone or '').strip()
+    digits = re.sub(r'\D', '', phone)
+    national_length = settings.PHONE_NATIONAL_NUMBER_LENGTH
+    if phone.startswith('+') or digits.startswith('00'):
+        return True
+    if digits.startswith('0'):
+        return len(digits) == national_length + 1
+    return len(digits) == national_length
+
+
+def phone_digits(field):
+    """The digits of the free-text phone column `field`."""
+    return Func(F(field), Value(r'\D'), Value(''), Value('g'), function='REGEXP_REPLACE', output_field=CharField())
+
+
+def phone_lookup(field, phone):
+    """
+    Q matching rows whose phone column `field` holds `phone`, through its
+    E.164 copy `<field>_e164`: an equality when `phone` is a full number,
+    otherwise a suffix match on its digits served by an index on the
+    reversed column. Phones that could not be stored as E.164 are suffix
+    matched on their own digits. None when `phone` has no digits.
+    """
+    e164 = to_e164(phone) if is_complete(phone) else None
+    if e164:
+        return Q(**{f'{field}_e164': e164})
+    digits = re.sub(r'\D', '', phone or '')
+    if not digits:
+        return None
+    return Q(StartsWith(Reverse(F(f'{field}_e164')), digits[::-1])) | Q(
+        StartsWith(Reverse(phone_digits(field)), digits[::-1]),
+        **{f'{field}_e164__isnull': True}
+    )
@@ -0,0 +1,91 @@
+import unicodedata
+from functools import reduce
+from operator import or_
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import F, Func, Q, TextField, Value
+from django.db.models.functions import Concat, Lower
+
+# Postgres text search configurations for the languages in settings.LANGUAGES.
+# Documents are indexed under every config so stemming works whichever
+# language a posting or a query was written in.
+TEXT_SEARCH_CONFIGS = ('turkish', 'english')
+
+# Turkish letters folded to their ASCII base before lower-casing, so "IŞIK",
+# "ışık" and "Isik" all normalize to "isik". Applied ahead of lower() because
+# neither Postgres nor Python lower-cases I/İ the Turkish way.
+FOLD_FROM = 'İIıŞşĞğÇçÖöÜüÂâÎîÛû'
+FOLD_TO = 'iiissggccoouuaaiiuu'
+FOLD_TABLE = str.maketrans(FOLD_FROM, FOLD_TO)
+
+
+def weighted_search_vector(*weighted_fields):
+    """
+    Expression for a generated tsvector column: each (field, weight) pair is
+    indexed once per config in TEXT_SEARCH_CONFIGS.
+    """
+    vectors = [
+        SearchVector(field, config=config, weight=weight)
+        for config in TEXT_SEARCH_CONFIGS
+        for field, weight in weighted_fields
+    ]
+    return reduce(lambda combined, vector: combined + vector, vectors)
+
+
+def search_query(text):
+    """websearch_to_tsquery() of `text` under every config, OR'ed together."""
+    return reduce(or_, [
+        SearchQuery(text, config=config, search_type='websearch')
+        for config in TEXT_SEARCH_CONFIGS
+    ])
+
+
+def apply_search(queryset, text, vector_field='search_vector'):
+    """
+    Filters `queryset` to rows whose `vector_field` matches `text` and orders
+    them by rank, best match first. Blank text leaves the queryset as is.
+    """
+    text = (text or '').strip()
+    if not text:
+        return queryset
+    query = search_query(text)
+    return queryset.filter(**{vector_field: query}).annotate(
+        search_rank=SearchRank(F(vector_field), query)
+    ).order_by('-search_rank', *(queryset.query.order_by or queryset.model._meta.ordering))
+
+
+class NormalizeNFC(Func):
+    function = 'NORMALIZE'
+    template = '%(function)s(%(expressions)s, NFC)'
+    output_field = TextField()
+
+
+def search_text(*fields):
+    """
+    Expression for a generated column holding `fields` joined by spaces with
+    Turkish letters folded and lower-cased, for substring search through a
+    pg_trgm GIN index. normalize_search_text() applies the same steps to
+    search input.
+    """
+    parts = [F(fields[0])]
+    for field in fields[1:]:
+        parts += [Value(' '), F(field)]
+    return Lower(Func(
+        NormalizeNFC(Concat(*parts, output_field=TextField())),
+        Value(FOLD_FROM),
+        Value(FOLD_TO),
+        function='TRANSLATE',
+        output_field=TextField()
+    ))
+
+
+def normalize_search_text(text):
+    return unicodedata.normalize('NFC', text.strip()).translate(FOLD_TABLE).lower()
+
+
+def contains_search_text(field, text):
+    """
+    Q for rows whose search_text() column `field` contains `text`. Compiles to
+    a plain LIKE '%...%' on the column, which the trigram index can serve
+    (icontains would wrap the column in UPPER() and bypass it).
+    """
+    return Q(**{f'{field}__contains': normalize_search_text(text)})
@@ -1,3 +1,41 @@
-from django.test import TestCase
+import logging
+from django.test import SimpleTestCase
+from .log_queue import AsyncHandler, stop_listener
 
-# Create your tests here.
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+
+class AsyncHandlerTest(SimpleTestCase):
+    def setUp(self):
+        self.target = RecordingHandler()
+        self.logger = logging.getLogger('wisehire.tests.log_queue')
+        self.logger.handlers = [AsyncHandler([self.target])]
+        self.logger.propagate = False
+        self.addCleanup(setattr, self.logger, 'handlers', [])
+
+    def test_arguments_are_logged_as_they_were_at_the_call(self):
+        data = {'status': 'active'}
+        
+        self.logger.warning('Changed to %s', data)
+        data['status'] = 'inactive'
+        stop_listener()
+        
+        self.assertEqual(self.target.lines, ["WARNING Changed to {'status': 'active'}"])
+
+    def test_tracebacks_are_rendered_at_the_call(self):
+        try:
+            raise ValueError('broken')
+        except ValueError:
+            self.logger.exception('Failed')
+        stop_listener()
+        
+        self.assertTrue(self.target.lines[0].startswith('ERROR Failed\nTraceback'))
+        self.assertIn('ValueError: broken', self.target.lines[0])
@@ -0,0 +1,53 @@
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from .models import HRCompany, CustomerCompany
+
+
+def lock_companies(model, ids):
+    """
+    Row-locks the companies in a statement of its own, in id order.
+
+    Under READ COMMITTED an UPDATE ... SET = (SELECT COUNT ...) that waits
+    on another recount's row lock still counts with its original snapshot
+    and misses the rows that transaction added. Taking the lock first means
+    the recount statement starts only after every earlier recount of the
+    same company has committed, and sees its rows.
+    """
+    list(model.objects.filter(id__in=ids).order_by('id').select_for_update().values_list('id', flat=True))
+
+
+def refresh_hr_users_count(hr_company_ids):
+    """Recounts active_hr_users_count of the given HR companies with one UPDATE."""
+    hr_company_ids = {pk for pk in hr_company_ids if pk is not None}
+    if not hr_company_ids:
+        return
+
+    HRUser = HRCompany.hr_users.field.model
+    active_users = HRUser.objects.filter(
+        hr_company=OuterRef('pk'),
+        is_active=True
+    ).order_by().values('hr_company').annotate(count=Count('pk')).values('count')
+    with transaction.atomic(savepoint=False):
+        lock_companies(HRCompany, hr_company_ids)
+        HRCompany.objects.filter(id__in=hr_company_ids).update(
+            active_hr_users_count=Coalesce(Subquery(active_users), 0)
+        )
+
+
+def refresh_authorized_hr_users_count(customer_company_ids):
+    """Recounts active_authorized_hr_users_count of the given customer companies with one UPDATE."""
+    customer_company_ids = {pk for pk in customer_company_ids if pk is not None}
+    if not customer_company_ids:
+        return
+
+    AuthorizedCompanies = CustomerCompany.authorized_hr_users.through
+    active_users = AuthorizedCompanies.objects.filter(
+        customercompany=OuterRef('pk'),
+        hruser__is_active=True
+    ).order_by().values('customercompany').annotate(count=Count('pk')).values('count')
+    with transaction.atomic(savepoint=False):
+        lock_companies(CustomerCompany, customer_company_ids)
+        CustomerCompany.objects.filter(id__in=customer_company_ids).update(
+            active_authorized_hr_users_count=Coalesce(Subquery(active_users), 0)
+        )
@@ -0,0 +1,62 @@
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+LIST_VERSION_CACHE_KEY = 'company_list_version:{model}'
+LIST_PAYLOAD_CACHE_KEY = 'company_list:{name}:{version}:{scope}'
+
+
+def get_list_version(model):
+    """
+    Version of the company lists built from `model`, bumped by
+    companies.signals whenever a row of it is saved or deleted.
+    """
+    key = LIST_VERSION_CACHE_KEY.format(model=model._meta.label_lower)
+    version = cache.get(key)
+    if version is None:
+        # Same scheme as the scope versions: a lost key restarts from the
+        # clock, so it cannot hand out an old version again
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_list_version(model):
+    try:
+        cache.incr(LIST_VERSION_CACHE_KEY.format(model=model._meta.label_lower))
+    except ValueError:
+        pass
+
+
+def scope_digest(ids):
+    return hashlib.md5(','.join(map(str, sorted(ids))).encode()).hexdigest()
+
+
+def cached_list_response(request, name, model, scope, build):
+    """
+    Answers a company dropdown list from the cache.
+
+    The ETag is derived from the list version and the caller's tenant scope
+    only, so a matching If-None-Match gets a 304 without touching the
+    database or the serializer. Otherwise the payload is cached per
+    (version, scope) and shared by every user with the same scope.
+    """
+    version = get_list_version(model)
+    etag = f'"{name}-{version}-{scope}"'
+
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*'):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+    key = LIST_PAYLOAD_CACHE_KEY.format(name=name, version=version, scope=scope)
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, settings.COMPANY_LIST_CACHE_TIMEOUT)
+
+    # Browsers revalidate every time and never share the response
+    return Response(data, headers={'ETag': etag, 'Cache-Control': 'private, no-cache'})
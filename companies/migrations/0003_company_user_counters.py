@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:47
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    HRCompany = apps.get_model('companies', 'HRCompany')
+    CustomerCompany = apps.get_model('companies', 'CustomerCompany')
+    HRUser = apps.get_model('accounts', 'HRUser')
+    AuthorizedCompanies = HRUser.authorized_customer_companies.through
+
+    active_users = HRUser.objects.filter(
+        hr_company=OuterRef('pk'), is_active=True
+    ).order_by().values('hr_company').annotate(count=Count('pk')).values('count')
+    HRCompany.objects.update(active_hr_users_count=Coalesce(Subquery(active_users), 0))
+
+    authorized_users = AuthorizedCompanies.objects.filter(
+        customercompany=OuterRef('pk'), hruser__is_active=True
+    ).order_by().values('customercompany').annotate(count=Count('pk')).values('count')
+    CustomerCompany.objects.update(active_authorized_hr_users_count=Coalesce(Subquery(authorized_users), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0002_customercompany_companies_c_code_071934_idx_and_more'),
+        ('accounts', '0004_alter_hruser_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customercompany',
+            name='active_authorized_hr_users_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='hrcompany',
+            name='active_hr_users_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -1,12 +1,17 @@
 from django.db import models
+from common.models import CounterFieldsModel
 
 # Create your models here.
-class HRCompany(models.Model):
+class HRCompany(CounterFieldsModel):
     name = models.CharField(max_length=255)
     code = models.CharField(max_length=50, unique=True)
     is_active = models.BooleanField(default=True)
+    # Number of active HR users, kept current by accounts.signals
+    active_hr_users_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    
+    counter_fields = ('active_hr_users_count',)
 
     def __str__(self):
         return self.name
@@ -20,12 +25,16 @@ class HRCompany(models.Model):
             models.Index(fields=['-created_at']),  
         ]
 
-class CustomerCompany(models.Model):
+class CustomerCompany(CounterFieldsModel):
     name = models.CharField(max_length=255)
     code = models.CharField(max_length=50, unique=True)
     is_active = models.BooleanField(default=True)
+    # Number of active HR users authorized for the company, kept current by accounts.signals
+    active_authorized_hr_users_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    
+    counter_fields = ('active_authorized_hr_users_count',)
 
     def __str__(self):
         return self.name
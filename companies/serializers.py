@@ -18,7 +18,8 @@ class HRCompanySerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
     
     def get_hr_users_count(self, obj):
-        return obj.hr_users.filter(is_active=True).count()
+        # Annotated by HRCompanyViewSet; nested uses read the counter column
+        return getattr(obj, 'annotated_hr_users_count', obj.active_hr_users_count)
 
 class CustomerCompanySerializer(serializers.ModelSerializer):
     authorized_hr_users_count = serializers.SerializerMethodField()
@@ -37,7 +38,8 @@ class CustomerCompanySerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
     
     def get_authorized_hr_users_count(self, obj):
-        return obj.authorized_hr_users.filter(is_active=True).count()
+        # Annotated by CustomerCompanyViewSet; nested uses read the counter column
+        return getattr(obj, 'annotated_authorized_hr_users_count', obj.active_authorized_hr_users_count)
 
 class HRCompanySimpleSerializer(serializers.ModelSerializer):
     class Meta:
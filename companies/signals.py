@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .list_cache import bump_list_version
+from .models import HRCompany, CustomerCompany
+
+
+@receiver(post_save, sender=HRCompany)
+@receiver(post_delete, sender=HRCompany)
+@receiver(post_save, sender=CustomerCompany)
+@receiver(post_delete, sender=CustomerCompany)
+def company_changed(sender, **kwargs):
+    bump_list_version(sender)
@@ -1,3 +1,78 @@
-from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from accounts.models import HRUser
+from .models import HRCompany, CustomerCompany
 
-# Create your tests here.
+
+class CompanyListETagTest(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.hr_company = HRCompany.objects.create(name="HR Company", code="HR001")
+        self.customer_company1 = CustomerCompany.objects.create(name="Customer Company 1", code="CC001")
+        self.customer_company2 = CustomerCompany.objects.create(name="Customer Company 2", code="CC002")
+        self.user = HRUser.objects.create_user(
+            username="hruser",
+            email="hr@example.com",
+            password="hrpass123",
+            hr_company=self.hr_company
+        )
+        self.user.authorized_customer_companies.add(self.customer_company1)
+        self.client.force_authenticate(user=self.user)
+
+    def test_not_modified_without_queries(self):
+        url = reverse('customercompany-simple-list')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([company['id'] for company in response.data], [self.customer_company1.id])
+        etag = response['ETag']
+        
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_payload_cached_per_scope(self):
+        url = reverse('customercompany-my-authorized')
+        self.client.get(url)
+        
+        other_user = HRUser.objects.create_user(
+            username="otheruser",
+            email="other@example.com",
+            password="otherpass123",
+            hr_company=self.hr_company
+        )
+        other_user.authorized_customer_companies.add(self.customer_company1)
+        self.client.force_authenticate(user=HRUser.objects.get(pk=other_user.pk))
+        
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual([company['id'] for company in response.data], [self.customer_company1.id])
+
+    def test_etag_changes_with_company_and_authorizations(self):
+        url = reverse('customercompany-my-authorized')
+        etag = self.client.get(url)['ETag']
+        
+        self.customer_company1.name = "Renamed Customer"
+        self.customer_company1.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['name'], "Renamed Customer")
+        
+        etag = response['ETag']
+        self.user.authorized_customer_companies.add(self.customer_company2)
+        self.client.force_authenticate(user=HRUser.objects.get(pk=self.user.pk))
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+
+    def test_hr_company_simple_list(self):
+        url = reverse('hrcompany-simple-list')
+        response = self.client.get(url)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([company['id'] for company in response.data], [self.hr_company.id])
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code,
+            status.HTTP_304_NOT_MODIFIED
+        )
@@ -3,7 +3,9 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
+from django.db.models import Count, Q
 from drf_spectacular.utils import extend_schema
+from .list_cache import cached_list_response, scope_digest
 from .models import HRCompany, CustomerCompany
 from .serializers import (
     HRCompanySerializer,
@@ -76,10 +78,14 @@ class HRCompanyViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         queryset = super().get_queryset()
+        if self.action != 'simple_list':
+            queryset = queryset.annotate(
+                annotated_hr_users_count=Count('hr_users', filter=Q(hr_users__is_active=True))
+            )
         
         if not self.request.user.is_superuser:
-            if hasattr(self.request.user, 'hr_company'):
-                queryset = queryset.filter(id=self.request.user.hr_company.id)
+            if hasattr(self.request.user, 'hr_company_id'):
+                queryset = queryset.filter(id=self.request.user.hr_company_id)
             else:
                 queryset = queryset.none()
         
@@ -94,9 +100,12 @@ class HRCompanyViewSet(viewsets.ModelViewSet):
     )
     @action(detail=False, methods=['get'])
     def simple_list(self, request):
-        queryset = self.get_queryset().filter(is_active=True)
-        serializer = HRCompanySimpleSerializer(queryset, many=True)
-        return Response(serializer.data)
+        def build():
+            queryset = self.get_queryset().filter(is_active=True)
+            return HRCompanySimpleSerializer(queryset, many=True).data
+        
+        scope = 'all' if request.user.is_superuser else request.user.hr_company_id
+        return cached_list_response(request, 'hr-simple', HRCompany, scope, build)
     
     @extend_schema(
         operation_id="toggle_hr_company_active",
@@ -182,6 +191,13 @@ class CustomerCompanyViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         queryset = super().get_queryset()
+        if self.action != 'simple_list':
+            queryset = queryset.annotate(
+                annotated_authorized_hr_users_count=Count(
+                    'authorized_hr_users',
+                    filter=Q(authorized_hr_users__is_active=True)
+                )
+            )
         
         if not self.request.user.is_superuser:
             if hasattr(self.request.user, 'authorized_customer_companies'):
@@ -201,9 +217,15 @@ class CustomerCompanyViewSet(viewsets.ModelViewSet):
     )
     @action(detail=False, methods=['get'])
     def simple_list(self, request):
-        queryset = self.get_queryset().filter(is_active=True)
-        serializer = CustomerCompanySimpleSerializer(queryset, many=True)
-        return Response(serializer.data)
+        def build():
+            queryset = self.get_queryset().filter(is_active=True)
+            return CustomerCompanySimpleSerializer(queryset, many=True).data
+        
+        if request.user.is_superuser:
+            scope = 'all'
+        else:
+            scope = scope_digest(request.user.authorization_scope.customer_company_ids)
+        return cached_list_response(request, 'customer-simple', CustomerCompany, scope, build)
     
     @extend_schema(
         operation_id="my_authorized_customer_companies",
@@ -214,11 +236,17 @@ class CustomerCompanyViewSet(viewsets.ModelViewSet):
     )
     @action(detail=False, methods=['get'])
     def my_authorized(self, request):
-        if hasattr(request.user, 'authorized_customer_companies'):
-            companies = request.user.get_authorized_customer_companies()
-            serializer = CustomerCompanySimpleSerializer(companies, many=True)
-            return Response(serializer.data)
-        return Response([])
+        if not hasattr(request.user, 'authorized_customer_companies'):
+            return Response([])
+        
+        # The scope holds exactly the active authorized companies
+        company_ids = request.user.authorization_scope.customer_company_ids
+        
+        def build():
+            companies = CustomerCompany.objects.filter(id__in=company_ids)
+            return CustomerCompanySimpleSerializer(companies, many=True).data
+        
+        return cached_list_response(request, 'customer-authorized', CustomerCompany, scope_digest(company_ids), build)
     
     @extend_schema(
         operation_id="toggle_customer_company_active",
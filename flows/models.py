@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from jobs.models import JobPosting
 from candidates.models import Candidate
 from accounts.models import HRUser
@@ -77,6 +77,12 @@ class CandidateFlow(models.Model):
     def __str__(self):
         return f"{self.candidate.full_name} - {self.job_posting.title}"
     
+    def save(self, *args, **kwargs):
+        # flows.signals adjusts the job posting's pipeline counters; commit
+        # them together with the row (delete() is already atomic)
+        with transaction.atomic(savepoint=False):
+            super().save(*args, **kwargs)
+    
     class Meta:
         unique_together = ['job_posting', 'candidate']
         ordering = ['-created_at']
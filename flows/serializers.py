@@ -1,3 +1,4 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
 from .models import ActivityType, Status, CandidateFlow, Activity
 from jobs.serializers import JobPostingSerializer
@@ -36,6 +37,14 @@ class ActivitySerializer(serializers.ModelSerializer):
             'activity_type_detail', 'status_detail', 'created_by_detail', 'hr_company_detail'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+    
+    @staticmethod
+    def eager_loading(queryset, prefix=''):
+        """Loads what this serializer reads for the activities at `prefix` of `queryset`."""
+        queryset = queryset.select_related(
+            f'{prefix}activity_type', f'{prefix}status__activity_type', f'{prefix}hr_company'
+        )
+        return HRUserSerializer.eager_loading(queryset, f'{prefix}created_by__')
 
 class ActivityCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -69,6 +78,16 @@ class CandidateFlowSerializer(serializers.ModelSerializer):
             'created_by_detail', 'activities'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+    
+    @staticmethod
+    def eager_loading(queryset):
+        """Loads the whole tree this serializer renders for the flows of `queryset`."""
+        queryset = JobPostingSerializer.eager_loading(queryset, 'job_posting__')
+        queryset = CandidateSerializer.eager_loading(queryset.select_related('candidate'), 'candidate__')
+        queryset = HRUserSerializer.eager_loading(queryset.select_related('hr_company'), 'created_by__')
+        return queryset.prefetch_related(
+            Prefetch('activities', queryset=ActivitySerializer.eager_loading(Activity.objects.all()))
+        )
 
 class CandidateFlowCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -103,4 +122,8 @@ class CandidateFlowListSerializer(serializers.ModelSerializer):
             'id', 'flow_status', 'created_at', 'updated_at',
             'job_posting_title', 'job_posting_code', 'candidate_name',
             'candidate_email', 'candidate_phone', 'hr_company_name'
-        ]
\ No newline at end of file
+        ]
+    
+    @staticmethod
+    def eager_loading(queryset):
+        return queryset.select_related('job_posting', 'candidate', 'hr_company')
\ No newline at end of file
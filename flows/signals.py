@@ -0,0 +1,36 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from jobs.counters import apply_pipeline_count_changes
+from .models import CandidateFlow
+
+
+def counts_unaffected(update_fields):
+    return update_fields is not None and not {'job_posting', 'flow_status'} & set(update_fields)
+
+
+@receiver(pre_save, sender=CandidateFlow)
+def candidate_flow_saving(sender, instance, update_fields=None, **kwargs):
+    if instance._state.adding or counts_unaffected(update_fields):
+        return
+    # Locked until CandidateFlow.save() commits, so a concurrent status
+    # change waits and then reads this one's result as its previous state
+    instance._counted_state = CandidateFlow.objects.select_for_update().filter(pk=instance.pk).values_list(
+        'job_posting_id', 'flow_status'
+    ).first()
+
+
+@receiver(post_save, sender=CandidateFlow)
+def candidate_flow_saved(sender, instance, created, **kwargs):
+    current = (instance.job_posting_id, instance.flow_status)
+    if created:
+        apply_pipeline_count_changes({current: 1})
+        return
+    previous = instance.__dict__.pop('_counted_state', None)
+    if previous is None or previous == current:
+        return
+    apply_pipeline_count_changes({previous: -1, current: 1})
+
+
+@receiver(post_delete, sender=CandidateFlow)
+def candidate_flow_deleted(sender, instance, **kwargs):
+    apply_pipeline_count_changes({(instance.job_posting_id, instance.flow_status): -1})
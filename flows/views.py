@@ -3,7 +3,7 @@ from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
+from django.db.models import OuterRef, Q
 from .models import ActivityType, Status, CandidateFlow, Activity
 from .serializers import (
     ActivityTypeSerializer, StatusSerializer, CandidateFlowSerializer,
@@ -11,6 +11,11 @@ from .serializers import (
     ActivitySerializer, ActivityCreateSerializer
 )
 from common.permissions import IsHRUserPermission, CustomerCompanyPermission, HRCompanyPermission
+from common.pagination import KeysetPagination, PaginatedActionMixin
+from common.phone import phone_lookup
+from common.search import apply_search, contains_search_text
+from audit.recorder import record_event, field_values, diff
+from candidates.scoping import worked_at, studied_at
 
 logger = logging.getLogger('wisehire.flows')
 
@@ -42,23 +47,32 @@ class StatusViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(statuses, many=True)
         return Response(serializer.data)
 
-class CandidateFlowViewSet(viewsets.ModelViewSet):
+class CandidateFlowViewSet(PaginatedActionMixin, viewsets.ModelViewSet):
     queryset = CandidateFlow.objects.all()
     serializer_class = CandidateFlowSerializer
     permission_classes = [IsHRUserPermission, CustomerCompanyPermission]
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['flow_status', 'job_posting', 'candidate', 'hr_company']
     
+    # Actions rendering the full CandidateFlowSerializer tree
+    detail_actions = ['retrieve', 'my_flows', 'active_flows']
+    
     def get_queryset(self):
         user = self.request.user
         if user.is_superuser:
             queryset = CandidateFlow.objects.all()
         else:
+            scope = user.authorization_scope
             queryset = CandidateFlow.objects.filter(
-                hr_company=user.hr_company,
-                job_posting__customer_company__in=user.get_authorized_customer_companies()
+                hr_company_id=scope.hr_company_id,
+                job_posting__customer_company_id__in=scope.customer_company_ids
             )
         
+        queryset = apply_search(
+            queryset, self.request.query_params.get('q'), vector_field='job_posting__search_vector'
+        )
+        
         job_code = self.request.query_params.get('job_code', None)
         if job_code:
             queryset = queryset.filter(job_posting__code__icontains=job_code)
@@ -69,28 +83,25 @@ class CandidateFlowViewSet(viewsets.ModelViewSet):
         
         candidate_search = self.request.query_params.get('candidate_search', None)
         if candidate_search:
-            queryset = queryset.filter(
-                Q(candidate__first_name__icontains=candidate_search) |
-                Q(candidate__last_name__icontains=candidate_search) |
-                Q(candidate__email__icontains=candidate_search)
-            )
+            queryset = queryset.filter(contains_search_text('candidate__search_text', candidate_search))
         
         candidate_phone = self.request.query_params.get('candidate_phone', None)
         if candidate_phone:
-            queryset = queryset.filter(candidate__phone__icontains=candidate_phone)
+            phone_filter = phone_lookup('candidate__phone', candidate_phone)
+            queryset = queryset.filter(phone_filter) if phone_filter else queryset.none()
         
         experience_company = self.request.query_params.get('experience_company', None)
         if experience_company:
-            queryset = queryset.filter(
-                candidate__work_experiences__company_name__icontains=experience_company
-            ).distinct()
+            queryset = queryset.filter(worked_at(experience_company, OuterRef('candidate_id')))
         
         education_school = self.request.query_params.get('education_school', None)
         if education_school:
-            queryset = queryset.filter(
-                candidate__educations__school_name__icontains=education_school
-            ).distinct()
+            queryset = queryset.filter(studied_at(education_school, OuterRef('candidate_id')))
         
+        if self.action == 'list':
+            queryset = CandidateFlowListSerializer.eager_loading(queryset)
+        elif self.action in self.detail_actions:
+            queryset = CandidateFlowSerializer.eager_loading(queryset)
         return queryset
     
     def get_serializer_class(self):
@@ -103,60 +114,79 @@ class CandidateFlowViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         candidate_flow = serializer.save(
             created_by=self.request.user,
-            hr_company=self.request.user.hr_company
+            hr_company_id=self.request.user.hr_company_id
         )
         
-        logger.info(f"Candidate flow created - Candidate: {candidate_flow.candidate.first_name} {candidate_flow.candidate.last_name} "
-                   f"(Email: {candidate_flow.candidate.email}), "
-                   f"Job: {candidate_flow.job_posting.title} (Code: {candidate_flow.job_posting.code}), "
-                   f"Status: {candidate_flow.flow_status}, "
-                   f"Created by: {self.request.user.username} (ID: {self.request.user.id})")
+        # candidate and job_posting are the instances the serializer validated,
+        # so reading them here costs no query
+        candidate = candidate_flow.candidate
+        job_posting = candidate_flow.job_posting
+        logger.info("Candidate flow created - Candidate: %s %s (Email: %s), Job: %s (Code: %s), "
+                    "Status: %s, Created by: %s (ID: %s)",
+                    candidate.first_name, candidate.last_name, candidate.email,
+                    job_posting.title, job_posting.code, candidate_flow.flow_status,
+                    self.request.user.username, self.request.user.id)
+        record_event(self.request, 'create', candidate_flow, field_values(candidate_flow))
+    
+    def perform_update(self, serializer):
+        before = field_values(serializer.instance)
+        candidate_flow = serializer.save()
+        record_event(self.request, 'update', candidate_flow, diff(before, field_values(candidate_flow)))
+    
+    def perform_destroy(self, instance):
+        record_event(self.request, 'delete', instance, field_values(instance))
+        instance.delete()
     
     @action(detail=False, methods=['get'])
     def my_flows(self, request):
         queryset = self.get_queryset().filter(created_by=request.user)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(queryset)
     
     @action(detail=False, methods=['get'])
     def active_flows(self, request):
         queryset = self.get_queryset().filter(flow_status='active', is_active=True)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(queryset)
     
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
         old_status = instance.flow_status
         response = super().update(request, *args, **kwargs)
         if response.status_code == status.HTTP_200_OK:
-            logger.info(f"Candidate flow updated - Candidate: {instance.candidate.first_name} {instance.candidate.last_name}, "
-                       f"Job: {instance.job_posting.title}, "
-                       f"Status changed from '{old_status}' to '{instance.flow_status}', "
-                       f"Updated by: {request.user.username} (ID: {request.user.id})")
+            logger.info("Candidate flow updated - ID: %s, Candidate ID: %s, Job ID: %s, "
+                        "Status changed from '%s' to '%s', Updated by: %s (ID: %s)",
+                        instance.id, instance.candidate_id, instance.job_posting_id,
+                        old_status, instance.flow_status, request.user.username, request.user.id)
         return response
     
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        flow_info = f"Candidate: {instance.candidate.first_name} {instance.candidate.last_name}, Job: {instance.job_posting.title}, ID: {instance.id}"
+        flow_id, candidate_id, job_posting_id = instance.id, instance.candidate_id, instance.job_posting_id
         response = super().destroy(request, *args, **kwargs)
         if response.status_code == status.HTTP_204_NO_CONTENT:
-            logger.warning(f"Candidate flow deleted - {flow_info}, "
-                          f"Deleted by: {request.user.username} (ID: {request.user.id})")
+            logger.warning("Candidate flow deleted - ID: %s, Candidate ID: %s, Job ID: %s, Deleted by: %s (ID: %s)",
+                           flow_id, candidate_id, job_posting_id, request.user.username, request.user.id)
         return response
 
-class ActivityViewSet(viewsets.ModelViewSet):
+class ActivityViewSet(PaginatedActionMixin, viewsets.ModelViewSet):
     queryset = Activity.objects.all()
     serializer_class = ActivitySerializer
     permission_classes = [IsHRUserPermission, HRCompanyPermission]
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['candidate_flow', 'activity_type', 'status', 'created_by', 'hr_company']
     
+    read_actions = ['list', 'retrieve', 'by_candidate_flow', 'my_activities']
+    
     def get_queryset(self):
         user = self.request.user
         if user.is_superuser:
-            return Activity.objects.all()
+            queryset = Activity.objects.all()
+        else:
+            queryset = Activity.objects.filter(hr_company_id=user.hr_company_id)
         
-        return Activity.objects.filter(hr_company=user.hr_company)
+        if self.action in self.read_actions:
+            queryset = ActivitySerializer.eager_loading(queryset)
+        return queryset
     
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
@@ -166,14 +196,24 @@ class ActivityViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         activity = serializer.save(
             created_by=self.request.user,
-            hr_company=self.request.user.hr_company
+            hr_company_id=self.request.user.hr_company_id
         )
         
-        logger.info(f"Activity created - Type: {activity.activity_type.name}, "
-                   f"Status: {activity.status.name}, "
-                   f"Candidate Flow ID: {activity.candidate_flow.id}, "
-                   f"Candidate: {activity.candidate_flow.candidate.first_name} {activity.candidate_flow.candidate.last_name}, "
-                   f"Created by: {self.request.user.username} (ID: {self.request.user.id})")
+        logger.info("Activity created - Type: %s, Status: %s, Candidate Flow ID: %s, Candidate ID: %s, "
+                    "Created by: %s (ID: %s)",
+                    activity.activity_type.name, activity.status.name,
+                    activity.candidate_flow_id, activity.candidate_flow.candidate_id,
+                    self.request.user.username, self.request.user.id)
+        record_event(self.request, 'create', activity, field_values(activity))
+    
+    def perform_update(self, serializer):
+        before = field_values(serializer.instance)
+        activity = serializer.save()
+        record_event(self.request, 'update', activity, diff(before, field_values(activity)))
+    
+    def perform_destroy(self, instance):
+        record_event(self.request, 'delete', instance, field_values(instance))
+        instance.delete()
     
     @action(detail=False, methods=['get'])
     def by_candidate_flow(self, request):
@@ -183,14 +223,12 @@ class ActivityViewSet(viewsets.ModelViewSet):
                           status=status.HTTP_400_BAD_REQUEST)
         
         activities = self.get_queryset().filter(candidate_flow_id=candidate_flow_id)
-        serializer = self.get_serializer(activities, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(activities)
     
     @action(detail=False, methods=['get'])
     def my_activities(self, request):
         queryset = self.get_queryset().filter(created_by=request.user)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(queryset)
     
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -198,17 +236,17 @@ class ActivityViewSet(viewsets.ModelViewSet):
         response = super().update(request, *args, **kwargs)
         if response.status_code == status.HTTP_200_OK:
             new_status = instance.status.name if instance.status else 'None'
-            logger.info(f"Activity updated - Type: {instance.activity_type.name}, "
-                       f"Status changed from '{old_status}' to '{new_status}', "
-                       f"Candidate Flow ID: {instance.candidate_flow.id}, "
-                       f"Updated by: {request.user.username} (ID: {request.user.id})")
+            logger.info("Activity updated - Type: %s, Status changed from '%s' to '%s', "
+                        "Candidate Flow ID: %s, Updated by: %s (ID: %s)",
+                        instance.activity_type.name, old_status, new_status,
+                        instance.candidate_flow_id, request.user.username, request.user.id)
         return response
     
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        activity_info = f"Type: {instance.activity_type.name}, Status: {instance.status.name if instance.status else 'None'}, ID: {instance.id}"
+        activity_id, activity_type_id, status_id = instance.id, instance.activity_type_id, instance.status_id
         response = super().destroy(request, *args, **kwargs)
         if response.status_code == status.HTTP_204_NO_CONTENT:
-            logger.warning(f"Activity deleted - {activity_info}, "
-                          f"Deleted by: {request.user.username} (ID: {request.user.id})")
+            logger.warning("Activity deleted - ID: %s, Type ID: %s, Status ID: %s, Deleted by: %s (ID: %s)",
+                           activity_id, activity_type_id, status_id, request.user.username, request.user.id)
         return response
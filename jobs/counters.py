@@ -0,0 +1,52 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from .models import JobPosting
+
+# CandidateFlow.flow_status -> JobPosting counter column
+PIPELINE_COUNTER_FIELDS = {
+    'active': 'active_flows_count',
+    'completed': 'completed_flows_count',
+    'rejected': 'rejected_flows_count',
+    'on_hold': 'on_hold_flows_count',
+}
+
+
+def apply_pipeline_count_changes(changes):
+    """
+    Applies {(job_posting_id, flow_status): delta} to the counters in place,
+    one UPDATE per job posting.
+    """
+    by_job_posting = {}
+    for (job_posting_id, flow_status), delta in changes.items():
+        field = PIPELINE_COUNTER_FIELDS.get(flow_status)
+        if job_posting_id is None or field is None or not delta:
+            continue
+        fields = by_job_posting.setdefault(job_posting_id, {})
+        fields[field] = fields.get(field, 0) + delta
+
+    for job_posting_id, fields in by_job_posting.items():
+        # Not clamped at zero: a counter going negative is drift, which the
+        # columns' CHECK constraint turns into an error instead of hiding it
+        JobPosting.objects.filter(pk=job_posting_id).update(**{
+            field: F(field) + delta for field, delta in fields.items() if delta
+        })
+
+
+def refresh_pipeline_counts(job_posting_ids=None):
+    """
+    Recounts the pipeline counters of the given job postings (all of them if
+    None) from CandidateFlow with one UPDATE. Returns the number of rows updated.
+    """
+    CandidateFlow = JobPosting.candidate_flows.field.model
+    queryset = JobPosting.objects.all()
+    if job_posting_ids is not None:
+        queryset = queryset.filter(id__in={pk for pk in job_posting_ids if pk is not None})
+
+    counts = {}
+    for flow_status, field in PIPELINE_COUNTER_FIELDS.items():
+        flows = CandidateFlow.objects.filter(
+            job_posting=OuterRef('pk'),
+            flow_status=flow_status
+        ).order_by().values('job_posting').annotate(count=Count('pk')).values('count')
+        counts[field] = Coalesce(Subquery(flows), 0)
+    return queryset.update(**counts)
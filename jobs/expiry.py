@@ -0,0 +1,108 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from common.redis import get_redis
+from .models import JobPosting
+
+EXPIRY_SCHEDULE_KEY = 'job_expiry_schedule'
+
+# Removes members only if their score is still due, so a posting that got a
+# new closing date while it was being closed keeps its new schedule entry.
+REMOVE_IF_DUE = """
+local removed = 0
+for i = 2, #ARGV do
+    local score = redis.call('ZSCORE', KEYS[1], ARGV[i])
+    if score and tonumber(score) <= tonumber(ARGV[1]) then
+        removed = removed + redis.call('ZREM', KEYS[1], ARGV[i])
+    end
+end
+return removed
+"""
+
+
+def schedule(job_posting):
+    """Keeps the schedule entry of `job_posting` in line with its status and closing date."""
+    if job_posting.status == 'active' and job_posting.closing_date:
+        get_redis().zadd(EXPIRY_SCHEDULE_KEY, {job_posting.pk: job_posting.closing_date.timestamp()})
+    else:
+        unschedule(job_posting.pk)
+
+
+def unschedule(job_posting_id):
+    get_redis().zrem(EXPIRY_SCHEDULE_KEY, job_posting_id)
+
+
+def close_due():
+    """
+    Closes the postings whose closing date has passed, reading only the due
+    part of the schedule. Nothing touches the database when nothing is due.
+    Returns the number of postings closed.
+    """
+    client = get_redis()
+    remove_if_due = client.register_script(REMOVE_IF_DUE)
+    chunk_size = settings.JOB_EXPIRY_CHUNK_SIZE
+    now = time.time()
+    closed = 0
+
+    while True:
+        due_ids = [int(pk) for pk in client.zrangebyscore(EXPIRY_SCHEDULE_KEY, '-inf', now, start=0, num=chunk_size)]
+        if not due_ids:
+            break
+        # closing_date is re-checked so a stale entry never closes a posting early
+        closed += JobPosting.objects.filter(
+            id__in=due_ids,
+            status='active',
+            closing_date__lte=timezone.now()
+        ).update(status='inactive')
+        remove_if_due(keys=[EXPIRY_SCHEDULE_KEY], args=[now, *due_ids])
+        if len(due_ids) < chunk_size:
+            break
+
+    return closed
+
+
+def reconcile():
+    """
+    Nightly safety net: closes any overdue active posting the schedule
+    missed, then rebuilds the schedule from the database.
+    Returns the number of postings closed.
+    """
+    chunk_size = settings.JOB_EXPIRY_CHUNK_SIZE
+    closed = 0
+    while True:
+        overdue_ids = list(
+            JobPosting.objects.filter(
+                status='active',
+                closing_date__lt=timezone.now()
+            ).order_by('closing_date').values_list('id', flat=True)[:chunk_size]
+        )
+        if not overdue_ids:
+            break
+        closed += JobPosting.objects.filter(id__in=overdue_ids, status='active').update(status='inactive')
+
+    client = get_redis()
+    started = timezone.now()
+    rebuild_key = f'{EXPIRY_SCHEDULE_KEY}:rebuild'
+    client.delete(rebuild_key)
+    upcoming = JobPosting.objects.filter(status='active').values_list('id', 'closing_date')
+    batch = {}
+    for pk, closing_date in upcoming.iterator(chunk_size=chunk_size):
+        batch[pk] = closing_date.timestamp()
+        if len(batch) >= chunk_size:
+            client.zadd(rebuild_key, batch)
+            batch = {}
+    if batch:
+        client.zadd(rebuild_key, batch)
+
+    if client.exists(rebuild_key):
+        client.rename(rebuild_key, EXPIRY_SCHEDULE_KEY)
+    else:
+        client.delete(EXPIRY_SCHEDULE_KEY)
+    # Saves that landed in the old key while the new one was being built. A
+    # save is stamped before it commits, so one stamped shortly before the
+    # rebuild started may have committed after the rebuild read its row
+    saved_since = started - timedelta(seconds=settings.JOB_EXPIRY_RECONCILE_OVERLAP_SECONDS)
+    for job_posting in JobPosting.objects.filter(updated_at__gte=saved_since).only('id', 'status', 'closing_date'):
+        schedule(job_posting)
+    return closed
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from jobs.counters import refresh_pipeline_counts
+from jobs.models import JobPosting
+
+
+class Command(BaseCommand):
+    help = 'Recount the per-status candidate flow counters of job postings'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'job_posting_ids', nargs='*', type=int,
+            help='Job postings to rebuild (default: all)'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Job postings recounted per transaction'
+        )
+
+    def handle(self, *args, **options):
+        ids = JobPosting.objects.order_by('pk').values_list('pk', flat=True)
+        if options['job_posting_ids']:
+            ids = ids.filter(pk__in=options['job_posting_ids'])
+        ids = list(ids)
+        chunk_size = options['chunk_size']
+
+        updated = 0
+        for start in range(0, len(ids), chunk_size):
+            with transaction.atomic():
+                updated += refresh_pipeline_counts(ids[start:start + chunk_size])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt pipeline counters of {updated} job postings'))
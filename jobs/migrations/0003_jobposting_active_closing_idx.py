@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-17 20:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0003_company_user_counters'),
+        ('jobs', '0002_jobposting_jobs_jobpos_hr_comp_5eea1e_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jobposting',
+            index=models.Index(condition=models.Q(('status', 'active')), fields=['closing_date'], name='jobs_active_closing_idx'),
+        ),
+    ]
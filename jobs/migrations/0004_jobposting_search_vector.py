@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:00
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0003_company_user_counters'),
+        ('jobs', '0003_jobposting_active_closing_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobposting',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('title', config='turkish', weight='A'), '||', django.contrib.postgres.search.SearchVector('code', config='turkish', weight='A'), django.contrib.postgres.search.SearchConfig('turkish')), '||', django.contrib.postgres.search.SearchVector('description', config='turkish', weight='B'), django.contrib.postgres.search.SearchConfig('turkish')), '||', django.contrib.postgres.search.SearchVector('title', config='english', weight='A'), django.contrib.postgres.search.SearchConfig('turkish')), '||', django.contrib.postgres.search.SearchVector('code', config='english', weight='A'), django.contrib.postgres.search.SearchConfig('turkish')), '||', django.contrib.postgres.search.SearchVector('description', config='english', weight='B'), django.contrib.postgres.search.SearchConfig('turkish')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        migrations.AddIndex(
+            model_name='jobposting',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='jobs_search_vector_gin'),
+        ),
+    ]
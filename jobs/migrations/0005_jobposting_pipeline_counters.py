@@ -0,0 +1,50 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:02
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    JobPosting = apps.get_model('jobs', 'JobPosting')
+    CandidateFlow = apps.get_model('flows', 'CandidateFlow')
+
+    counts = {}
+    for flow_status in ('active', 'completed', 'rejected', 'on_hold'):
+        flows = CandidateFlow.objects.filter(
+            job_posting=OuterRef('pk'), flow_status=flow_status
+        ).order_by().values('job_posting').annotate(count=Count('pk')).values('count')
+        counts[f'{flow_status}_flows_count'] = Coalesce(Subquery(flows), 0)
+    JobPosting.objects.update(**counts)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0004_jobposting_search_vector'),
+        ('flows', '0003_activity_flows_activ_candida_1cd543_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobposting',
+            name='active_flows_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='jobposting',
+            name='completed_flows_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='jobposting',
+            name='on_hold_flows_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='jobposting',
+            name='rejected_flows_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-17 21:59
+
+import django.contrib.postgres.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0005_jobposting_pipeline_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobPostingMatchVector',
+            fields=[
+                ('job_posting', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='match_vector', serialize=False, to='jobs.jobposting')),
+                ('term_ids', django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), default=list, size=None)),
+                ('term_counts', django.contrib.postgres.fields.ArrayField(base_field=models.PositiveIntegerField(), default=list, size=None)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -1,8 +1,13 @@
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from companies.models import HRCompany, CustomerCompany
 from accounts.models import HRUser
+from common.models import CounterFieldsModel
+from common.search import weighted_search_vector
 
-class JobPosting(models.Model):
+class JobPosting(CounterFieldsModel):
     STATUS_CHOICES = [
         ('active', 'Active'),
         ('inactive', 'Inactive'),
@@ -29,8 +34,21 @@ class JobPosting(models.Model):
     closing_date = models.DateTimeField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
     is_active = models.BooleanField(default=True)
+    # Candidate flows per flow_status, kept current by flows.signals
+    active_flows_count = models.PositiveIntegerField(default=0, editable=False)
+    completed_flows_count = models.PositiveIntegerField(default=0, editable=False)
+    rejected_flows_count = models.PositiveIntegerField(default=0, editable=False)
+    on_hold_flows_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Kept up to date by Postgres; queried through common.search.apply_search
+    search_vector = models.GeneratedField(
+        expression=weighted_search_vector(('title', 'A'), ('code', 'A'), ('description', 'B')),
+        output_field=SearchVectorField(),
+        db_persist=True
+    )
+    
+    counter_fields = ('active_flows_count', 'completed_flows_count', 'rejected_flows_count', 'on_hold_flows_count')
     
     def __str__(self):
         return f"{self.code} - {self.title}"
@@ -49,4 +67,28 @@ class JobPosting(models.Model):
             models.Index(fields=['status', 'is_active']), 
             models.Index(fields=['hr_company', 'is_active']),  
             models.Index(fields=['-created_at']), 
+            # Only active postings can expire; keeps the expiry sweep index small
+            models.Index(
+                fields=['closing_date'],
+                name='jobs_active_closing_idx',
+                condition=models.Q(status='active')
+            ),
+            GinIndex(fields=['search_vector'], name='jobs_search_vector_gin'),
         ]
+
+
+class JobPostingMatchVector(models.Model):
+    """
+    Sparse term counts of a posting's title and description, in the
+    vocabulary of candidates.models.MatchTerm. Maintained by
+    candidates.matching.refresh_job_posting_vector().
+    """
+    job_posting = models.OneToOneField(
+        JobPosting,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='match_vector'
+    )
+    term_ids = ArrayField(models.IntegerField(), default=list)
+    term_counts = ArrayField(models.PositiveIntegerField(), default=list)
+    updated_at = models.DateTimeField(auto_now=True)
@@ -1,7 +1,12 @@
 from rest_framework import serializers
 from .models import JobPosting
-from companies.serializers import HRCompanySerializer, CustomerCompanySerializer
-from accounts.serializers import HRUserSerializer
+from companies.serializers import (
+    HRCompanySerializer,
+    CustomerCompanySerializer,
+    HRCompanySimpleSerializer,
+    CustomerCompanySimpleSerializer
+)
+from accounts.serializers import HRUserSerializer, HRUserSimpleSerializer
 
 class JobPostingSerializer(serializers.ModelSerializer):
     hr_company_detail = HRCompanySerializer(source='hr_company', read_only=True)
@@ -16,6 +21,28 @@ class JobPostingSerializer(serializers.ModelSerializer):
             'hr_company_detail', 'customer_company_detail', 'created_by_detail'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+    
+    @staticmethod
+    def eager_loading(queryset, prefix=''):
+        """Loads what this serializer reads for the job postings at `prefix` of `queryset`."""
+        queryset = queryset.select_related(f'{prefix}hr_company', f'{prefix}customer_company')
+        return HRUserSerializer.eager_loading(queryset, f'{prefix}created_by__')
+
+class JobPostingListSerializer(serializers.ModelSerializer):
+    """List payload: no description, related rows in their simple form."""
+    hr_company_detail = HRCompanySimpleSerializer(source='hr_company', read_only=True)
+    customer_company_detail = CustomerCompanySimpleSerializer(source='customer_company', read_only=True)
+    created_by_detail = HRUserSimpleSerializer(source='created_by', read_only=True)
+    
+    class Meta:
+        model = JobPosting
+        fields = [
+            'id', 'title', 'code', 'hr_company', 'customer_company',
+            'created_by', 'closing_date', 'status', 'is_active', 'created_at', 'updated_at',
+            'active_flows_count', 'completed_flows_count', 'rejected_flows_count', 'on_hold_flows_count',
+            'hr_company_detail', 'customer_company_detail', 'created_by_detail'
+        ]
+        read_only_fields = fields
 
 class JobPostingCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -0,0 +1,18 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .expiry import schedule, unschedule
+from .models import JobPosting
+
+
+@receiver(post_save, sender=JobPosting)
+def job_posting_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'status', 'closing_date'} & set(update_fields):
+        return
+    transaction.on_commit(lambda: schedule(instance))
+
+
+@receiver(post_delete, sender=JobPosting)
+def job_posting_deleted(sender, instance, **kwargs):
+    job_posting_id = instance.pk
+    transaction.on_commit(lambda: unschedule(job_posting_id))
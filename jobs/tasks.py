@@ -1,32 +1,31 @@
 import logging
-from datetime import datetime
-from django.utils import timezone
 from celery import shared_task
-from .models import JobPosting
+from .expiry import close_due, reconcile
 
 logger = logging.getLogger('wisehire.jobs')
 
 
+@shared_task
+def close_due_jobs():
+    count = close_due()
+    if count:
+        logger.info("Closed %s expired job postings", count)
+    return count
+
+
 @shared_task
 def close_expired_jobs():
-    logger.info("Starting expired jobs closure task")
+    logger.info("Starting expired jobs reconciliation")
     
     try:
-        now = timezone.now()
-        expired_jobs = JobPosting.objects.filter(
-            closing_date__lt=now,
-            status='active'
-        )
-        
-        count = expired_jobs.count()
+        count = reconcile()
         if count > 0:
-            expired_jobs.update(status='inactive')
-            logger.info(f"Closed {count} expired job postings")
+            logger.info("Reconciliation closed %s expired job postings the scheduler missed", count)
             return f"Closed {count} expired job postings"
         else:
             logger.info("No expired job postings found")
             return "No expired job postings found"
             
     except Exception as e:
-        logger.error(f"Error closing expired jobs: {str(e)}")
-        return f"Error: {str(e)}"
\ No newline at end of file
+        logger.error("Error closing expired jobs: %s", e)
+        return f"Error: {str(e)}"
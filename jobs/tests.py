@@ -1,3 +1,462 @@
-from django.test import TestCase
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from accounts.models import HRUser
+from candidates.models import Candidate
+from common.redis import get_redis
+from companies.models import HRCompany, CustomerCompany
+from flows.models import CandidateFlow
+from .expiry import EXPIRY_SCHEDULE_KEY, close_due, reconcile
+from .models import JobPosting
+from .views import JobPostingViewSet
 
-# Create your tests here.
+
+class JobPostingTestMixin:
+    def setUp(self):
+        self.client = APIClient()
+        self.hr_company = HRCompany.objects.create(name="HR Company", code="HR001")
+        self.customer_company = CustomerCompany.objects.create(name="Customer Company", code="CC001")
+        self.user = HRUser.objects.create_user(
+            username="hruser",
+            email="hr@example.com",
+            password="hrpass123",
+            hr_company=self.hr_company
+        )
+        self.user.authorized_customer_companies.add(self.customer_company)
+        self.client.force_authenticate(user=self.user)
+
+    def create_posting(self, code, title="Developer", description="Description", closing_date=None):
+        return JobPosting.objects.create(
+            title=title,
+            code=code,
+            description=description,
+            hr_company=self.hr_company,
+            customer_company=self.customer_company,
+            created_by=self.user,
+            closing_date=closing_date or timezone.now() + timedelta(days=30)
+        )
+
+
+class JobExpirySchedulerTest(JobPostingTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        get_redis().delete(EXPIRY_SCHEDULE_KEY)
+
+    def create_posting(self, code, closing_date):
+        with self.captureOnCommitCallbacks(execute=True):
+            return super().create_posting(code, closing_date=closing_date)
+
+    def scheduled_ids(self):
+        return {int(pk) for pk in get_redis().zrange(EXPIRY_SCHEDULE_KEY, 0, -1)}
+
+    def test_closes_only_due_postings(self):
+        due = self.create_posting("DUE001", timezone.now() - timedelta(seconds=1))
+        upcoming = self.create_posting("UP001", timezone.now() + timedelta(days=1))
+        self.assertEqual(self.scheduled_ids(), {due.id, upcoming.id})
+        
+        self.assertEqual(close_due(), 1)
+        
+        due.refresh_from_db()
+        upcoming.refresh_from_db()
+        self.assertEqual(due.status, 'inactive')
+        self.assertEqual(upcoming.status, 'active')
+        self.assertEqual(self.scheduled_ids(), {upcoming.id})
+
+    def test_nothing_due_touches_no_table(self):
+        self.create_posting("UP001", timezone.now() + timedelta(days=1))
+        
+        with self.assertNumQueries(0):
+            self.assertEqual(close_due(), 0)
+
+    def test_deactivated_posting_is_unscheduled(self):
+        posting = self.create_posting("UP001", timezone.now() + timedelta(days=1))
+        
+        posting.status = 'inactive'
+        with self.captureOnCommitCallbacks(execute=True):
+            posting.save()
+        
+        self.assertEqual(self.scheduled_ids(), set())
+
+    def test_reconcile_closes_missed_postings_and_rebuilds(self):
+        missed = self.create_posting("MISS001", timezone.now() - timedelta(hours=1))
+        upcoming = self.create_posting("UP001", timezone.now() + timedelta(days=1))
+        get_redis().delete(EXPIRY_SCHEDULE_KEY)
+        
+        self.assertEqual(reconcile(), 1)
+        
+        missed.refresh_from_db()
+        self.assertEqual(missed.status, 'inactive')
+        self.assertEqual(self.scheduled_ids(), {upcoming.id})
+
+    def test_reconcile_keeps_saves_committed_during_the_rebuild(self):
+        posting = self.create_posting("UP001", timezone.now() + timedelta(days=1))
+        closing_date = timezone.now() + timedelta(hours=1)
+        client = get_redis()
+        rename = client.rename
+        
+        def save_then_rename(source, destination):
+            # A save stamped before the rebuild started, committed after it read the postings
+            JobPosting.objects.filter(pk=posting.pk).update(
+                closing_date=closing_date, updated_at=timezone.now() - timedelta(seconds=5)
+            )
+            client.zadd(EXPIRY_SCHEDULE_KEY, {posting.pk: closing_date.timestamp()})
+            return rename(source, destination)
+        
+        with mock.patch.object(client, 'rename', side_effect=save_then_rename):
+            reconcile()
+        
+        self.assertEqual(client.zscore(EXPIRY_SCHEDULE_KEY, posting.pk), closing_date.timestamp())
+
+
+class JobPostingListTest(JobPostingTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.create_postings(1)
+
+    def create_postings(self, count):
+        start = JobPosting.objects.count()
+        JobPosting.objects.bulk_create([
+            JobPosting(
+                title="Developer",
+                code=f"DEV{start + i:03d}",
+                description="A long description " * 50,
+                hr_company=self.hr_company,
+                customer_company=self.customer_company,
+                created_by=self.user,
+                closing_date=timezone.now() + timedelta(days=30)
+            )
+            for i in range(count)
+        ])
+
+    def test_list_payload_is_lean(self):
+        response = self.client.get(reverse('jobposting-list'))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        posting = response.data['results'][0]
+        self.assertNotIn('description', posting)
+        self.assertEqual(posting['created_by_detail']['username'], 'hruser')
+        self.assertEqual(posting['customer_company_detail']['code'], 'CC001')
+        self.assertEqual(posting['active_flows_count'], 0)
+
+    def test_detail_keeps_full_payload(self):
+        posting = JobPosting.objects.get()
+        response = self.client.get(reverse('jobposting-detail', args=[posting.id]))
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('description', response.data)
+        self.assertIn('authorized_customer_companies_detail', response.data['created_by_detail'])
+
+    def test_query_count_independent_of_rows(self):
+        for url in (reverse('jobposting-list'), reverse('jobposting-active-postings')):
+            with self.subTest(url=url):
+                # Warm the cached authorization scope first
+                self.client.get(url)
+                with CaptureQueriesContext(connection) as context:
+                    self.client.get(url)
+                self.create_postings(5)
+                with self.assertNumQueries(len(context.captured_queries)):
+                    self.client.get(url)
+
+
+class JobPostingSearchTest(JobPostingTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.sales = self.create_posting("SAL001", "Satış Temsilcisi", "Bölge satış temsilcileri aranıyor.")
+        self.developer = self.create_posting("DEV001", "Backend Developer", "Managing developers on Django services.")
+        self.accountant = self.create_posting("ACC001", "Accountant", "Works with the developers on billing.")
+
+    def search(self, url_name, q):
+        response = self.client.get(reverse(url_name), {'q': q})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['results']
+
+    def test_matches_stemmed_turkish_and_english(self):
+        turkish = self.search('jobposting-list', 'temsilci')
+        english = self.search('jobposting-list', 'developer')
+        
+        self.assertEqual([posting['code'] for posting in turkish], ['SAL001'])
+        self.assertEqual({posting['code'] for posting in english}, {'DEV001', 'ACC001'})
+
+    def test_title_matches_rank_above_description_matches(self):
+        results = self.search('jobposting-list', 'developer')
+        
+        self.assertEqual([posting['code'] for posting in results], ['DEV001', 'ACC001'])
+
+    def test_code_is_searchable(self):
+        results = self.search('jobposting-list', 'ACC001')
+        
+        self.assertEqual([posting['code'] for posting in results], ['ACC001'])
+
+    def test_blank_query_lists_everything(self):
+        self.assertEqual(len(self.search('jobposting-list', '  ')), 3)
+
+    def test_candidate_flows_search_by_job_posting(self):
+        for job_posting in (self.sales, self.developer):
+            candidate = Candidate.objects.create(
+                first_name="Test",
+                last_name=job_posting.code,
+                email=f"{job_posting.code.lower()}@example.com",
+                phone="5550000000"
+            )
+            CandidateFlow.objects.create(
+                job_posting=job_posting,
+                candidate=candidate,
+                hr_company=self.hr_company,
+                created_by=self.user
+            )
+        
+        results = self.search('candidateflow-list', 'satış')
+        
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['job_posting_code'], 'SAL001')
+
+
+class PipelineCounterTest(JobPostingTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.first = self.create_posting("JOB001")
+        self.second = self.create_posting("JOB002")
+        self.candidates = [
+            Candidate.objects.create(
+                first_name="Test",
+                last_name=str(i),
+                email=f"candidate{i}@example.com",
+                phone="5550000000"
+            )
+            for i in range(3)
+        ]
+
+    def create_flow(self, job_posting, candidate, flow_status='active'):
+        return CandidateFlow.objects.create(
+            job_posting=job_posting,
+            candidate=candidate,
+            hr_company=self.hr_company,
+            created_by=self.user,
+            flow_status=flow_status
+        )
+
+    def counts(self, job_posting):
+        job_posting.refresh_from_db()
+        return (
+            job_posting.active_flows_count,
+            job_posting.completed_flows_count,
+            job_posting.rejected_flows_count,
+            job_posting.on_hold_flows_count,
+        )
+
+    def test_create_status_change_and_delete(self):
+        flow = self.create_flow(self.first, self.candidates[0])
+        self.create_flow(self.first, self.candidates[1], flow_status='on_hold')
+        self.assertEqual(self.counts(self.first), (1, 0, 0, 1))
+        
+        flow.flow_status = 'rejected'
+        flow.save()
+        self.assertEqual(self.counts(self.first), (0, 0, 1, 1))
+        
+        flow.delete()
+        self.assertEqual(self.counts(self.first), (0, 0, 0, 1))
+
+    def test_moving_flow_to_another_posting(self):
+        flow = self.create_flow(self.first, self.candidates[0], flow_status='completed')
+        
+        flow.job_posting = self.second
+        flow.save()
+        
+        self.assertEqual(self.counts(self.first), (0, 0, 0, 0))
+        self.assertEqual(self.counts(self.second), (0, 1, 0, 0))
+
+    def test_unrelated_update_skips_counters(self):
+        flow = self.create_flow(self.first, self.candidates[0])
+        
+        with self.assertNumQueries(1):
+            flow.notes = "Called back"
+            flow.save(update_fields=['notes', 'updated_at'])
+
+    def test_saving_a_stale_posting_keeps_counters(self):
+        for request in [
+            lambda: self.client.post(reverse('jobposting-deactivate', args=[self.first.id])),
+            lambda: self.client.patch(reverse('jobposting-detail', args=[self.first.id]), {
+                'title': 'Senior Developer', 'customer_company': self.customer_company.id,
+            }, format='json'),
+        ]:
+            # Loaded before another request adds a flow to the posting
+            stale = JobPosting.objects.get(pk=self.first.pk)
+            self.create_flow(self.first, Candidate.objects.create(
+                first_name="Test", last_name="Stale", email=f"stale{CandidateFlow.objects.count()}@example.com",
+                phone="5550000000"
+            ))
+            with mock.patch.object(JobPostingViewSet, 'get_object', return_value=stale):
+                response = request()
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        self.assertEqual(self.counts(self.first), (2, 0, 0, 0))
+        self.assertEqual((self.first.status, self.first.title), ('inactive', 'Senior Developer'))
+
+    def test_rebuild_command_fixes_drift(self):
+        self.create_flow(self.first, self.candidates[0])
+        self.create_flow(self.second, self.candidates[1], flow_status='rejected')
+        JobPosting.objects.update(active_flows_count=7, rejected_flows_count=0)
+        
+        out = StringIO()
+        call_command('rebuild_pipeline_counters', stdout=out)
+        
+        self.assertEqual(self.counts(self.first), (1, 0, 0, 0))
+        self.assertEqual(self.counts(self.second), (0, 0, 1, 0))
+        self.assertIn('2 job postings', out.getvalue())
+
+
+class PipelineCounterConcurrencyTest(JobPostingTestMixin, TransactionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.job_posting = self.create_posting("JOB001")
+        self.flow = CandidateFlow.objects.create(
+            job_posting=self.job_posting,
+            candidate=Candidate.objects.create(
+                first_name="Test", last_name="Candidate", email="candidate@example.com", phone="5550000000"
+            ),
+            hr_company=self.hr_company,
+            created_by=self.user
+        )
+    
+    def change_status(self, flow_status, saved=None, proceed=None):
+        # Loaded before the other request saves, as a concurrent request would
+        flow = CandidateFlow.objects.get(pk=self.flow.pk)
+        try:
+            with transaction.atomic():
+                if proceed:
+                    flow.flow_status = flow_status
+                    flow.save()
+                    saved.set()
+                    proceed.wait(5)
+                    # Let the other save block on the flow row
+                    time.sleep(1)
+                else:
+                    saved.wait(5)
+                    flow.flow_status = flow_status
+                    flow.save()
+        finally:
+            connection.close()
+    
+    def test_concurrent_status_changes_keep_counts(self):
+        saved, second_started = threading.Event(), threading.Event()
+        first = threading.Thread(target=self.change_status, args=('completed', saved, second_started))
+        first.start()
+        
+        def second_change():
+            second_started.set()
+            self.change_status('rejected', saved)
+        second = threading.Thread(target=second_change)
+        second.start()
+        first.join()
+        second.join()
+        
+        self.job_posting.refresh_from_db()
+        self.assertEqual(
+            (
+                self.job_posting.active_flows_count,
+                self.job_posting.completed_flows_count,
+                self.job_posting.rejected_flows_count,
+            ),
+            (0, 0, 1)
+        )
+
+
+class JobPostingPaginationTest(JobPostingTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        # Same created_at for a few rows, so the id tie-breaker is exercised
+        created_at = timezone.now()
+        self.postings = JobPosting.objects.bulk_create([
+            JobPosting(
+                title="Developer",
+                code=f"DEV{i:03d}",
+                description="Description",
+                hr_company=self.hr_company,
+                customer_company=self.customer_company,
+                created_by=self.user,
+                closing_date=created_at + timedelta(days=30)
+            )
+            for i in range(7)
+        ])
+        for i, posting in enumerate(self.postings):
+            posting.created_at = created_at - timedelta(minutes=i // 3)
+        JobPosting.objects.bulk_update(self.postings, ['created_at'])
+
+    def walk(self, url, params):
+        codes = []
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            codes.extend(posting['code'] for posting in response.data['results'])
+            if not response.data['next']:
+                return codes
+            response = self.client.get(response.data['next'])
+
+    def expected_codes(self):
+        ordered = sorted(self.postings, key=lambda posting: (posting.created_at, posting.id), reverse=True)
+        return [posting.code for posting in ordered]
+
+    def test_list_walks_cursor_pages_newest_first(self):
+        codes = self.walk(reverse('jobposting-list'), {'page_size': 2})
+        
+        self.assertEqual(codes, self.expected_codes())
+
+    def test_pages_are_row_comparisons_without_offset(self):
+        # Every row shares one timestamp, as a bulk import leaves them
+        JobPosting.objects.update(created_at=timezone.now())
+        url = reverse('jobposting-list')
+        pages = []
+        response = self.client.get(url, {'page_size': 2})
+        while response.data['next']:
+            pages.append([posting['code'] for posting in response.data['results']])
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(response.data['next'])
+            sql = queries.captured_queries[-1]['sql']
+            self.assertIn('("jobs_jobposting"."created_at", "jobs_jobposting"."id") <', sql)
+            self.assertNotIn('OFFSET', sql)
+        pages.append([posting['code'] for posting in response.data['results']])
+        
+        self.assertEqual(
+            [code for page in pages for code in page],
+            [posting.code for posting in sorted(self.postings, key=lambda posting: posting.id, reverse=True)]
+        )
+        # And back again through the previous links
+        for page in reversed(pages[:-1]):
+            response = self.client.get(response.data['previous'])
+            self.assertEqual([posting['code'] for posting in response.data['results']], page)
+        self.assertIsNone(response.data['previous'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('jobposting-list'), {'cursor': 'cD1ub3QtYS1wb3NpdGlvbg=='})
+        
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_actions_are_paginated(self):
+        for url_name in ('jobposting-my-postings', 'jobposting-active-postings'):
+            with self.subTest(url_name=url_name):
+                codes = self.walk(reverse(url_name), {'page_size': 3})
+                self.assertEqual(codes, self.expected_codes())
+
+    def test_page_number_mode_is_opt_in(self):
+        response = self.client.get(reverse('jobposting-list'), {'page': 1})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 7)
+        self.assertEqual(len(response.data['results']), 7)
+
+    def test_search_results_keep_rank_order_with_page_numbers(self):
+        response = self.client.get(reverse('jobposting-list'), {'q': 'DEV003'})
+        
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['code'], 'DEV003')
@@ -2,57 +2,130 @@ import logging
 from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 from django_filters.rest_framework import DjangoFilterBackend
+from django.conf import settings
 from django.db.models import Q
 from .models import JobPosting
-from .serializers import JobPostingSerializer, JobPostingCreateSerializer
+from .serializers import JobPostingSerializer, JobPostingListSerializer, JobPostingCreateSerializer
 from common.permissions import IsHRUserPermission, CustomerCompanyPermission, HRCompanyPermission
+from common.pagination import KeysetPagination, PaginatedActionMixin
+from common.search import apply_search
+from audit.recorder import record_event, field_values, diff
+from candidates.matching import match_candidates, refresh_job_posting_vector
+from candidates.models import Candidate
+from candidates.scoping import in_scope
+from candidates.serializers import CandidateSerializer
 
 logger = logging.getLogger('wisehire.jobs')
 
-class JobPostingViewSet(viewsets.ModelViewSet):
+class JobPostingViewSet(PaginatedActionMixin, viewsets.ModelViewSet):
     queryset = JobPosting.objects.all()
     serializer_class = JobPostingSerializer
     permission_classes = [IsHRUserPermission, CustomerCompanyPermission]
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['status', 'customer_company', 'hr_company']
     
+    list_actions = ['list', 'my_postings', 'active_postings']
+    
     def get_queryset(self):
         user = self.request.user
         if user.is_superuser:
-            return JobPosting.objects.all()
+            queryset = JobPosting.objects.all()
+        else:
+            scope = user.authorization_scope
+            queryset = JobPosting.objects.filter(
+                hr_company_id=scope.hr_company_id,
+                customer_company_id__in=scope.customer_company_ids
+            )
         
-        return JobPosting.objects.filter(
-            hr_company=user.hr_company,
-            customer_company__in=user.get_authorized_customer_companies()
-        )
+        # The tsvector is only ever read by Postgres itself
+        queryset = queryset.defer('search_vector')
+        if self.action in self.list_actions:
+            queryset = queryset.select_related(
+                'hr_company', 'customer_company', 'created_by'
+            ).defer('description')
+            queryset = apply_search(queryset, self.request.query_params.get('q'))
+        elif self.action in ['retrieve', 'activate', 'deactivate']:
+            queryset = JobPostingSerializer.eager_loading(queryset)
+        return queryset
     
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return JobPostingCreateSerializer
+        if self.action in self.list_actions:
+            return JobPostingListSerializer
         return JobPostingSerializer
     
     def perform_create(self, serializer):
         job_posting = serializer.save(
             created_by=self.request.user,
-            hr_company=self.request.user.hr_company
+            hr_company_id=self.request.user.hr_company_id
         )
         
-        logger.info(f"Job posting created - Title: {job_posting.title}, Code: {job_posting.code}, "
-                   f"Customer Company: {job_posting.customer_company.name}, "
-                   f"Created by: {self.request.user.username} (ID: {self.request.user.id})")
+        logger.info("Job posting created - Title: %s, Code: %s, Customer Company: %s, Created by: %s (ID: %s)",
+                    job_posting.title, job_posting.code, job_posting.customer_company.name,
+                    self.request.user.username, self.request.user.id)
+        record_event(self.request, 'create', job_posting, field_values(job_posting))
+        refresh_job_posting_vector(job_posting)
+    
+    def perform_update(self, serializer):
+        before = field_values(serializer.instance)
+        job_posting = serializer.save()
+        changes = diff(before, field_values(job_posting))
+        record_event(self.request, 'update', job_posting, changes)
+        if 'title' in changes or 'description' in changes:
+            refresh_job_posting_vector(job_posting)
+    
+    def perform_destroy(self, instance):
+        record_event(self.request, 'delete', instance, field_values(instance))
+        instance.delete()
     
     @action(detail=False, methods=['get'])
     def my_postings(self, request):
         queryset = self.get_queryset().filter(created_by=request.user)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(queryset)
     
     @action(detail=False, methods=['get'])
     def active_postings(self, request):
         queryset = self.get_queryset().filter(status='active', is_active=True)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return self.paginated_response(queryset)
+    
+    @extend_schema(
+        operation_id="job_posting_matches",
+        summary="Matching Candidates",
+        description=(
+            "Candidates in scope whose work experiences and educations best match the posting's title and "
+            "description, best match first, with their TF-IDF cosine similarity as `score`"
+        ),
+        parameters=[OpenApiParameter('limit', OpenApiTypes.INT, description='Number of matches (default 20, at most 100)')],
+        tags=['Job Postings']
+    )
+    @action(detail=True, methods=['get'])
+    def matches(self, request, pk=None):
+        try:
+            limit = int(request.query_params.get('limit', settings.CANDIDATE_MATCHING_DEFAULT_LIMIT))
+        except ValueError:
+            return Response({'error': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, settings.CANDIDATE_MATCHING_MAX_LIMIT))
+        
+        job_posting = self.get_object()
+        candidates = Candidate.objects.all()
+        candidate_ids = None
+        if not request.user.is_superuser:
+            candidates = candidates.filter(in_scope(request.user.authorization_scope))
+            candidate_ids = candidates.values_list('id', flat=True)
+        matches = match_candidates(job_posting, limit, candidate_ids)
+        
+        # Guards against candidates deleted since match_candidates() checked
+        candidates = CandidateSerializer.eager_loading(candidates.filter(id__in=[pk for pk, score in matches]))
+        candidates = {candidate.id: candidate for candidate in candidates}
+        return Response([
+            {'score': score, 'candidate': CandidateSerializer(candidates[pk], context={'request': request}).data}
+            for pk, score in matches if pk in candidates
+        ])
     
     @action(detail=True, methods=['post'])
     def deactivate(self, request, pk=None):
@@ -60,10 +133,11 @@ class JobPostingViewSet(viewsets.ModelViewSet):
         old_status = job_posting.status
         job_posting.status = 'inactive'
         job_posting.save()
+        record_event(request, 'update', job_posting, {'status': [old_status, 'inactive']})
         
-        logger.info(f"Job posting deactivated - Title: {job_posting.title}, Code: {job_posting.code}, "
-                   f"Status changed from '{old_status}' to 'inactive', "
-                   f"Deactivated by: {request.user.username} (ID: {request.user.id})")
+        logger.info("Job posting deactivated - Title: %s, Code: %s, Status changed from '%s' to 'inactive', "
+                    "Deactivated by: %s (ID: %s)",
+                    job_posting.title, job_posting.code, old_status, request.user.username, request.user.id)
         
         serializer = self.get_serializer(job_posting)
         return Response(serializer.data)
@@ -74,10 +148,11 @@ class JobPostingViewSet(viewsets.ModelViewSet):
         old_status = job_posting.status
         job_posting.status = 'active'
         job_posting.save()
+        record_event(request, 'update', job_posting, {'status': [old_status, 'active']})
         
-        logger.info(f"Job posting activated - Title: {job_posting.title}, Code: {job_posting.code}, "
-                   f"Status changed from '{old_status}' to 'active', "
-                   f"Activated by: {request.user.username} (ID: {request.user.id})")
+        logger.info("Job posting activated - Title: %s, Code: %s, Status changed from '%s' to 'active', "
+                    "Activated by: %s (ID: %s)",
+                    job_posting.title, job_posting.code, old_status, request.user.username, request.user.id)
         
         serializer = self.get_serializer(job_posting)
         return Response(serializer.data)
@@ -91,16 +166,15 @@ class JobPostingViewSet(viewsets.ModelViewSet):
         }
         response = super().update(request, *args, **kwargs)
         if response.status_code == status.HTTP_200_OK:
-            logger.info(f"Job posting updated - Title: {instance.title}, Code: {instance.code}, "
-                       f"Updated by: {request.user.username} (ID: {request.user.id}), "
-                       f"Changes: {request.data}")
+            logger.info("Job posting updated - Title: %s, Code: %s, Updated by: %s (ID: %s), Changes: %s",
+                        instance.title, instance.code, request.user.username, request.user.id, request.data)
         return response
     
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        job_info = f"Title: {instance.title}, Code: {instance.code}, ID: {instance.id}"
+        title, code, job_posting_id = instance.title, instance.code, instance.id
         response = super().destroy(request, *args, **kwargs)
         if response.status_code == status.HTTP_204_NO_CONTENT:
-            logger.warning(f"Job posting deleted - {job_info}, "
-                          f"Deleted by: {request.user.username} (ID: {request.user.id})")
+            logger.warning("Job posting deleted - Title: %s, Code: %s, ID: %s, Deleted by: %s (ID: %s)",
+                           title, code, job_posting_id, request.user.username, request.user.id)
         return response
@@ -69,7 +69,16 @@ const JobPostings = () => {
     }
   };
 
-  const handleEdit = (job) => {
+  const handleEdit = async (listedJob) => {
+    // The list payload leaves out the description, load the full posting
+    let job;
+    try {
+      job = await apiService.getJobPosting(listedJob.id);
+    } catch (error) {
+      console.error('Error loading job posting:', error);
+      setError(error);
+      return;
+    }
     setEditingJob(job);
     setFormData({
       title: job.title,
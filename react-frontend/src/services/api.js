@@ -3,9 +3,50 @@ const BASE_URL = 'http://0.0.0.0:8000';
 class ApiService {
   constructor() {
     this.token = localStorage.getItem('token');
+    this.refreshToken = localStorage.getItem('refreshToken');
+    this.refreshing = null;
   }
 
-  async request(endpoint, options = {}) {
+  async refreshAccessToken() {
+    if (!this.refreshToken) {
+      return false;
+    }
+
+    if (!this.refreshing) {
+      this.refreshing = fetch(`${BASE_URL}/api/auth/auth/refresh/`, {
+        method: 'POST',
+        mode: 'cors',
+        headers: {
+          'Content-Type': 'application/json',
+          'Accept': 'application/json',
+        },
+        body: JSON.stringify({ refresh: this.refreshToken }),
+      })
+        .then(async (response) => {
+          if (!response.ok) {
+            return false;
+          }
+          const data = await response.json();
+          this.setTokens(data.access, data.refresh || this.refreshToken);
+          return true;
+        })
+        .catch(() => false)
+        .finally(() => {
+          this.refreshing = null;
+        });
+    }
+
+    return this.refreshing;
+  }
+
+  setTokens(access, refresh) {
+    this.token = access;
+    this.refreshToken = refresh;
+    localStorage.setItem('token', access);
+    localStorage.setItem('refreshToken', refresh);
+  }
+
+  async request(endpoint, options = {}, retry = true) {
     const url = `${BASE_URL}${endpoint}`;
     const config = {
       mode: 'cors',
@@ -27,6 +68,10 @@ class ApiService {
       
       if (!response.ok) {
         if (response.status === 401) {
+          if (retry && await this.refreshAccessToken()) {
+            return this.request(endpoint, options, false);
+          }
+          this.token = null;
           this.logout();
           throw new Error('Authentication failed');
         }
@@ -63,8 +108,7 @@ class ApiService {
     });
     
     if (response.access) {
-      this.token = response.access;
-      localStorage.setItem('token', response.access);
+      this.setTokens(response.access, response.refresh);
     }
     
     return response;
@@ -102,6 +146,10 @@ class ApiService {
     return this.request(`/api/jobs/job-postings/?page=${page}`);
   }
 
+  async getJobPosting(id) {
+    return this.request(`/api/jobs/job-postings/${id}/`);
+  }
+
   async createJobPosting(data) {
     return this.request('/api/jobs/job-postings/', {
       method: 'POST',
@@ -360,6 +408,10 @@ class ApiService {
       
       if (!response.ok) {
         if (response.status === 401) {
+          if (retry && await this.refreshAccessToken()) {
+            return this.request(endpoint, options, false);
+          }
+          this.token = null;
           this.logout();
           throw new Error('Authentication failed');
         }
@@ -390,8 +442,21 @@ class ApiService {
   }
 
   logout() {
+    if (this.refreshToken) {
+      fetch(`${BASE_URL}/api/auth/auth/logout/`, {
+        method: 'POST',
+        mode: 'cors',
+        headers: {
+          'Content-Type': 'application/json',
+          ...(this.token ? { Authorization: `Bearer ${this.token}` } : {}),
+        },
+        body: JSON.stringify({ refresh: this.refreshToken }),
+      }).catch(() => {});
+    }
     this.token = null;
+    this.refreshToken = null;
     localStorage.removeItem('token');
+    localStorage.removeItem('refreshToken');
   }
 }
 
@@ -84,14 +84,14 @@ def compile_latex_to_pdf(latex_content, output_path):
                     shutil.copy2(pdf_file, output_path)
                     return True
                 else:
-                    logger.error(f"PDF file not found after compilation: {pdf_file}")
+                    logger.error("PDF file not found after compilation: %s", pdf_file)
                     return False
             else:
-                logger.error(f"LaTeX compilation failed: {result.stderr}")
+                logger.error("LaTeX compilation failed: %s", result.stderr)
                 return False
                 
     except Exception as e:
-        logger.error(f"Error compiling LaTeX: {str(e)}")
+        logger.error("Error compiling LaTeX: %s", e)
         return False
 
 
@@ -135,7 +135,7 @@ def generate_weekly_activity_report():
             report.completed_at = timezone.now()
             report.save()
             
-            logger.info(f"Weekly activity report generated successfully: {output_path}")
+            logger.info("Weekly activity report generated successfully: %s", output_path)
             return f"Weekly activity report generated: {filename}"
         else:
             report.status = 'failed'
@@ -146,7 +146,7 @@ def generate_weekly_activity_report():
             return "Failed to generate weekly activity report"
             
     except Exception as e:
-        logger.error(f"Error generating weekly activity report: {str(e)}")
+        logger.error("Error generating weekly activity report: %s", e)
         if 'report' in locals():
             report.status = 'failed'
             report.error_message = str(e)
@@ -193,7 +193,7 @@ def generate_monthly_activity_report():
             report.completed_at = timezone.now()
             report.save()
             
-            logger.info(f"Monthly activity report generated successfully: {output_path}")
+            logger.info("Monthly activity report generated successfully: %s", output_path)
             return f"Monthly activity report generated: {filename}"
         else:
             report.status = 'failed'
@@ -204,7 +204,7 @@ def generate_monthly_activity_report():
             return "Failed to generate monthly activity report"
             
     except Exception as e:
-        logger.error(f"Error generating monthly activity report: {str(e)}")
+        logger.error("Error generating monthly activity report: %s", e)
         if 'report' in locals():
             report.status = 'failed'
             report.error_message = str(e)
@@ -61,7 +61,7 @@ class ReportViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            logger.info(f"Report generation task started: {task.id} for type: {report_type}")
+            logger.info("Report generation task started: %s for type: %s", task.id, report_type)
             
             return Response({
                 'message': message,
@@ -70,7 +70,7 @@ class ReportViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_202_ACCEPTED)
             
         except Exception as e:
-            logger.error(f"Error starting report generation: {str(e)}")
+            logger.error("Error starting report generation: %s", e)
             return Response(
                 {'error': _('Failed to start report generation')},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -100,13 +100,13 @@ class ReportViewSet(viewsets.ModelViewSet):
                 filename=filename
             )
             
-            logger.info(f"Report downloaded: {report.id} by user: {request.user.id}")
+            logger.info("Report downloaded: %s by user: %s", report.id, request.user.id)
             return response
             
         except Report.DoesNotExist:
             raise Http404(_("Report not found"))
         except Exception as e:
-            logger.error(f"Error downloading report: {str(e)}")
+            logger.error("Error downloading report: %s", e)
             return Response(
                 {'error': _('Failed to download report')},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -122,7 +122,7 @@ class ReportViewSet(viewsets.ModelViewSet):
                 )
             
             task = generate_weekly_activity_report.delay()
-            logger.info(f"Weekly report generation task started: {task.id}")
+            logger.info("Weekly report generation task started: %s", task.id)
             
             return Response({
                 'message': _("Weekly activity report generation started"),
@@ -130,7 +130,7 @@ class ReportViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_202_ACCEPTED)
             
         except Exception as e:
-            logger.error(f"Error starting weekly report generation: {str(e)}")
+            logger.error("Error starting weekly report generation: %s", e)
             return Response(
                 {'error': _('Failed to start weekly report generation')},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -146,7 +146,7 @@ class ReportViewSet(viewsets.ModelViewSet):
                 )
             
             task = generate_monthly_activity_report.delay()
-            logger.info(f"Monthly report generation task started: {task.id}")
+            logger.info("Monthly report generation task started: %s", task.id)
             
             return Response({
                 'message': _("Monthly activity report generation started"),
@@ -154,7 +154,7 @@ class ReportViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_202_ACCEPTED)
             
         except Exception as e:
-            logger.error(f"Error starting monthly report generation: {str(e)}")
+            logger.error("Error starting monthly report generation: %s", e)
             return Response(
                 {'error': _('Failed to start monthly report generation')},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 from datetime import timedelta
+from celery.schedules import crontab
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -15,6 +16,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     'rest_framework',
     'rest_framework_simplejwt',
@@ -29,6 +31,7 @@ INSTALLED_APPS = [
     'flows',
     'reports',
     'common',
+    'audit',
 ]
 
 MIDDLEWARE = [
@@ -95,7 +98,7 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.ScopedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
@@ -121,15 +124,92 @@ CORS_ALLOW_CREDENTIALS = True
 
 CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/1')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    }
+}
+
+AUTHORIZATION_SCOPE_CACHE_TIMEOUT = 60 * 60
+
+# Company dropdown payloads, keyed by list version and tenant scope
+COMPANY_LIST_CACHE_TIMEOUT = 60 * 60
+
+# Revoked JWT ids: how often each process replays new revocations into its
+# bloom filter (also the longest a revocation may go unnoticed elsewhere) and
+# how often the filter is rebuilt to drop expired entries.
+TOKEN_REVOCATION_SYNC_INTERVAL = 1.0
+TOKEN_REVOCATION_REBUILD_INTERVAL = 60 * 60
+TOKEN_REVOCATION_BLOOM_CAPACITY = 1000000
+TOKEN_REVOCATION_BLOOM_ERROR_RATE = 0.001
+
+# Failed logins allowed per email / per client IP inside the sliding window
+LOGIN_THROTTLE_WINDOW = 15 * 60
+LOGIN_THROTTLE_EMAIL_LIMIT = 5
+LOGIN_THROTTLE_IP_LIMIT = 50
+
+# Password verification pool: concurrent hashes, extra queued requests and
+# how long a request waits for its result before giving up
+PASSWORD_HASHING_WORKERS = 4
+PASSWORD_HASHING_QUEUE_LIMIT = 16
+PASSWORD_HASHING_TIMEOUT = 10
+
+# Bulk user provisioning: rows per upload, and the thread pool used to hash
+# passwords once an upload has at least POOL_THRESHOLD rows
+BULK_PROVISIONING_MAX_ROWS = 1000
+BULK_PROVISIONING_HASH_WORKERS = os.cpu_count() or 2
+BULK_PROVISIONING_POOL_THRESHOLD = 8
+
+# Bulk candidate import: rows validated, de-duplicated and written per
+# transaction. Uploads above FILE_UPLOAD_MAX_MEMORY_SIZE are spooled to disk
+# by Django and read from there line by line
+CANDIDATE_IMPORT_CHUNK_SIZE = 500
+# Failed and skipped rows listed in an import report; the counts cover all of them
+CANDIDATE_IMPORT_REPORT_LIMIT = 100
+
+# Candidate duplicate detection: blocks with more candidates than this are
+# too unspecific to compare pairwise, and pairs scoring below the minimum are
+# not reported
+CANDIDATE_DEDUP_MAX_BLOCK_SIZE = 50
+CANDIDATE_DEDUP_MIN_SCORE = 0.5
+
+# Phone numbers without a country code (common.phone.to_e164): the country
+# they are assumed to be in, and how many digits a number there has after
+# the trunk prefix
+PHONE_DEFAULT_COUNTRY_CODE = '90'
+PHONE_NATIONAL_NUMBER_LENGTH = 10
+
+# Candidate matching (candidates.matching): each process keeps every candidate
+# vector in memory and applies the changed ones on each request. It is rebuilt
+# from scratch after this many seconds, which also drops deleted candidates and
+# re-weights old rows with the current term frequencies, and the rows replaced
+# by changes are dropped in memory once there are this many of them
+CANDIDATE_MATCHING_REBUILD_SECONDS = 3600
+CANDIDATE_MATCHING_MAX_STALE_ROWS = 50000
+# Vectors are stamped before their transaction commits, so each sync also
+# re-reads those stamped this many seconds before the last one; longer than
+# any transaction writing vectors takes
+CANDIDATE_MATCHING_SYNC_OVERLAP_SECONDS = 60
+# Matches returned by /job-postings/{id}/matches/ without and with ?limit=
+CANDIDATE_MATCHING_DEFAULT_LIMIT = 20
+CANDIDATE_MATCHING_MAX_LIMIT = 100
+
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Europe/Istanbul'
 
 CELERY_BEAT_SCHEDULE = {
+    'close-due-jobs': {
+        'task': 'jobs.tasks.close_due_jobs',
+        'schedule': 15.0,
+    },
     'close-expired-jobs': {
         'task': 'jobs.tasks.close_expired_jobs',
-        'schedule': 180.0,
+        'schedule': crontab(hour=3, minute=0),
     },
     'generate-weekly-activity-report': {
         'task': 'reports.tasks.generate_weekly_activity_report',
@@ -139,8 +219,25 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'reports.tasks.generate_monthly_activity_report',
         'schedule': 2592000.0, 
     },
+    'create-audit-partitions': {
+        'task': 'audit.tasks.create_audit_partitions',
+        'schedule': 86400.0,
+    },
 }
 
+# Job postings closed per UPDATE by the expiry scheduler and its nightly sweep
+JOB_EXPIRY_CHUNK_SIZE = 500
+# updated_at is stamped before a save commits, so after rebuilding the
+# schedule the sweep re-schedules the postings saved this many seconds before
+# it started too; longer than any transaction saving a posting takes
+JOB_EXPIRY_RECONCILE_OVERLAP_SECONDS = 60
+
+# Audit events are buffered per process and written in batches
+AUDIT_BUFFER_SIZE = 200
+AUDIT_BUFFER_FLUSH_INTERVAL = 5.0
+# Monthly partitions of audit_auditevent created ahead of time
+AUDIT_PARTITION_MONTHS_AHEAD = 3
+
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'Europe/Istanbul'
 USE_I18N = True
@@ -161,6 +258,10 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Log records are written by one background thread per process; the
+# loggers below only put them on a queue (common.log_queue).
+LOGGING_CONFIG = 'common.log_queue.configure_logging'
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -262,7 +363,7 @@ SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
     'SCHEMA_PATH_PREFIX': '/api/',
     'AUTHENTICATION_WHITELIST': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.ScopedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'APPEND_COMPONENTS': {
@@ -47,6 +47,7 @@ urlpatterns = [
     path('api/candidates/', include('candidates.urls')),
     path('api/flows/', include('flows.urls')),
     path('api/', include('reports.urls')),
+    path('api/audit/', include('audit.urls')),
     #
     path('rosetta/', include('rosetta.urls')),
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),